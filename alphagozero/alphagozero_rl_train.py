@@ -10,21 +10,27 @@ from alphagozero.alphago_evaluate import evaluate_network
 
 
 def train_cycle(curr_iteration, board_size, num_games, rounds_per_move=10, c=2.0, batch_size=1024, lr=0.01,
-                games_parallel=2, eval_games=40, eval_ratio=0.55, eval_parallel=2):
+                games_parallel=2, eval_games=40, eval_ratio=0.55, eval_parallel=2, replay=None, train_samples=None):
 
-    # generate new games to train on
-    experience = generate_games(curr_iteration, num_games, board_size, rounds_per_move, c,
-                                max_jobs=games_parallel)
-
-    # add this new experience to existing experience (if any)
-    if os.path.exists('agz_experience.h5'):
-        with h5py.File('agz_experience.h5', 'a') as existing:
-            previous_experience = zero.load_experience(h5py.File('agz_experience.h5'))
-            experience = zero.combine_buffers(board_size, [previous_experience, experience])
-
-    # save experience before training, since I crash keras a lot and don't want to waste time
-    with h5py.File('agz_experience.h5', 'a') as expfile:
-        experience.serialize(expfile)
+    if replay is not None:
+        # a zero.ZeroReplayBuffer keeps the recent games itself, trains on train_samples positions drawn from it
+        generate_games(curr_iteration, num_games, board_size, rounds_per_move, c, max_jobs=games_parallel,
+                       replay=replay)
+        experience = replay.sample(train_samples) if train_samples else replay.experience()
+    else:
+        # generate new games to train on
+        experience = generate_games(curr_iteration, num_games, board_size, rounds_per_move, c,
+                                    max_jobs=games_parallel)
+
+        # add this new experience to existing experience (if any)
+        if os.path.exists('agz_experience.h5'):
+            with h5py.File('agz_experience.h5', 'a') as existing:
+                previous_experience = zero.load_experience(h5py.File('agz_experience.h5'))
+                experience = zero.combine_buffers(board_size, [previous_experience, experience])
+
+        # save experience before training, since I crash keras a lot and don't want to waste time
+        with h5py.File('agz_experience.h5', 'a') as expfile:
+            experience.serialize(expfile)
 
     # open training agent
     if os.path.exists('agz_bot_train.h5'):
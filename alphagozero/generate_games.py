@@ -1,6 +1,7 @@
 import os
 import sys
 import concurrent.futures
+import functools
 import time
 
 from keras import backend as K
@@ -8,17 +9,20 @@ from keras import backend as K
 import h5py
 import dlgo.zero as zero
 from dlgo.networks.zero import zero_model
+from dlgo.inference import InferenceServer
+from dlgo.kerasutil import load_agent_model
 
-from dlgo.goboard_fast import GameState
+from dlgo.utils import get_goboard_by_name
 from dlgo.gotypes import Player
 from dlgo import scoring
 
 
-def generate_game(board_size, game_id_str, rounds_per_move=10, c=2.0):
+def generate_game(board_size, game_id_str, rounds_per_move=10, c=2.0, board='goboard_fast', search_batch_size=None,
+                  inference_client=None):
     start = time.time()
     print(f'Generating {game_id_str}...')
 
-    game = GameState.new_game(board_size)
+    game = get_goboard_by_name(board).GameState.new_game(board_size)
     encoder = zero.ZeroEncoder(board_size)
 
     # load current best agent, if any
@@ -27,16 +31,22 @@ def generate_game(board_size, game_id_str, rounds_per_move=10, c=2.0):
     if os.path.exists('agz_bot.h5'):
 
         with h5py.File('agz_bot.h5') as bot_file:
-            black_agent = zero.load_zero_agent(bot_file)
-            white_agent = zero.load_zero_agent(bot_file)
+            black_agent = zero.load_zero_agent(bot_file, model=inference_client)
+            white_agent = zero.load_zero_agent(bot_file, model=inference_client)
+
+        # the saved batch size is kept unless one is asked for
+        if search_batch_size is not None:
+            black_agent.batch_size = white_agent.batch_size = search_batch_size
 
     else:
         print(f'WARN: using default model to generate {game_id_str}')
 
-        model = zero_model(board_size)
+        model = inference_client if inference_client is not None else zero_model(board_size)
 
-        black_agent = zero.ZeroAgent(model, encoder, rounds_per_move=rounds_per_move, c=c)
-        white_agent = zero.ZeroAgent(model, encoder, rounds_per_move=rounds_per_move, c=c)
+        black_agent = zero.ZeroAgent(model, encoder, rounds_per_move=rounds_per_move, c=c,
+                                     batch_size=search_batch_size or 1)
+        white_agent = zero.ZeroAgent(model, encoder, rounds_per_move=rounds_per_move, c=c,
+                                     batch_size=search_batch_size or 1)
 
     agents = {
         Player.black: black_agent,
@@ -67,6 +77,9 @@ def generate_game(board_size, game_id_str, rounds_per_move=10, c=2.0):
 
     combined = zero.combine_experience([c1, c2], board_size)
 
+    print(f'Search in {game_id_str}, black: {black_agent.search_stats.summary()}')
+    print(f'Search in {game_id_str}, white: {white_agent.search_stats.summary()}')
+
     c1 = c2 = game_result = None
     model = encoder = None
     game = None
@@ -84,24 +97,43 @@ def generate_game(board_size, game_id_str, rounds_per_move=10, c=2.0):
     return combined, game_id_str, time.time() - start
 
 
-def generate_games(iteration, num_games, board_size, rounds_per_move, c, max_jobs=2):
+def generate_games(iteration, num_games, board_size, rounds_per_move, c, max_jobs=2, board='goboard_fast',
+                   search_batch_size=None, use_inference_server=False, replay=None):
+    # with a zero.ZeroReplayBuffer as replay, every game is added to it as generation iteration
+    # and the replay buffer is returned in place of the experience of this iteration
     print(f'Beginning iteration #{iteration}...')
     K.clear_session()
 
-    experience = None
+    game_experiences = []
     submitted_count = 0
 
+    # with an inference server one process holds the model and batches positions from all games
+    server = None
+    free_clients = [None] * max_jobs
+    if use_inference_server:
+        if os.path.exists('agz_bot.h5'):
+            model_loader = functools.partial(load_agent_model, 'agz_bot.h5')
+        else:
+            model_loader = functools.partial(zero_model, board_size)
+
+        server = InferenceServer(model_loader, num_clients=max_jobs).start()
+        free_clients = list(server.clients)
+
     with concurrent.futures.ProcessPoolExecutor(max_workers=max_jobs) as executor:
         jobs = {}
 
         while submitted_count < num_games or len(jobs.keys()) > 0:
             while len(jobs) < max_jobs and submitted_count < num_games:
+                client = free_clients.pop()
                 job = executor.submit(generate_game,
                                       board_size,
                                       f'Iteration #[{iteration}] / Game {submitted_count + 1} of {num_games}',
                                       rounds_per_move,
-                                      c)
-                jobs[job] = job
+                                      c,
+                                      board,
+                                      search_batch_size,
+                                      client)
+                jobs[job] = client
                 submitted_count += 1
 
             for completed in concurrent.futures.as_completed(jobs):
@@ -110,19 +142,28 @@ def generate_games(iteration, num_games, board_size, rounds_per_move, c, max_job
 
                     print(f'Absorbing experience from {game_id}...')
 
-                    experience = zero.combine_buffers(board_size, [experience, combined_exp_this_game])\
-                        if experience is not None else combined_exp_this_game
+                    if replay is not None:
+                        replay.add_game(combined_exp_this_game, generation=iteration)
+                    else:
+                        game_experiences.append(combined_exp_this_game)
 
                     print(f'Game {game_id} completed in {elapsed:.2f} seconds')
 
-                    del jobs[completed]
+                    free_clients.append(jobs.pop(completed))
 
                     break
 
                 except KeyboardInterrupt:
                     sys.exit(-1)
 
-    # todo: limit size somehow? AGZ limited to last 500,000 games
-    # maybe not needed, we're not likely to reach that anyways
+    if server is not None:
+        server.stop()
+
+    if replay is not None:
+        return replay
+
+    if not game_experiences:
+        return None
 
-    return experience
+    # concatenated once, combining game by game copied everything played so far for every game
+    return zero.combine_buffers(board_size, game_experiences)
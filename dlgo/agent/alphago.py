@@ -1,6 +1,7 @@
 import numpy as np
 from dlgo.agent.base import Agent
 from dlgo.goboard_fast import Move
+from dlgo.search_stats import SearchStats
 # from dlgo import kerasutil
 import operator
 
@@ -10,6 +11,10 @@ __all__ = [
 ]
 
 
+def same_position(state, other):
+    return state.next_player == other.next_player and state.board == other.board
+
+
 class AlphaGoNode:
     def __init__(self, parent=None, probability=1.0):
         self.parent = parent  # <1>
@@ -28,9 +33,11 @@ class AlphaGoNode:
                    key=lambda child: child[1].q_value + child[1].u_value)
 
     def expand_children(self, moves, probabilities):
+        num_children = len(self.children)
         for move, prob in zip(moves, probabilities):
             if move not in self.children:
                 self.children[move] = AlphaGoNode(probability=prob)
+        return len(self.children) - num_children
 
     def update_values(self, leaf_value):
         if self.parent is not None:
@@ -54,7 +61,7 @@ class AlphaGoNode:
 class AlphaGoMCTS(Agent):
     def __init__(self, policy_agent, fast_policy_agent, value_agent,
                  lambda_value=0.5, num_simulations=1000,
-                 depth=50, rollout_limit=100):
+                 depth=50, rollout_limit=100, transpositions=None):
         Agent.__init__(self)
         self.policy = policy_agent
         self.rollout_policy = fast_policy_agent
@@ -65,31 +72,46 @@ class AlphaGoMCTS(Agent):
         self.depth = depth
         self.rollout_limit = rollout_limit
         self.root = AlphaGoNode()
+        self.root_state = None  # the position self.root belongs to, if any
+        # an optional dlgo.transposition.TranspositionTable, so that transposed positions reuse network outputs
+        self.transpositions = transpositions
+        self.search_stats = SearchStats()
 
     def select_move(self, game_state):
+        stats = self.search_stats
+        stats.begin_move()
+
+        self.root = self.reuse_subtree(game_state)
+
         # From current state play out a number of simulations
         for simulation in range(self.num_simulations):
             current_state = game_state
             node = self.root
 
             # Play moves until the specified depth is reached.
+            stats.enter('select')
             for depth in range(self.depth):
                 # If the current node doesn't have any children...
                 if not node.children:
                     if current_state.is_over():
                         break
+                    stats.enter('expand')
                     moves, probabilities = self.policy_probabilities(current_state)  # <4>
 
                     # expand them with probabilities from the strong policy.
-                    node.expand_children(moves, probabilities)
+                    stats.count('nodes', node.expand_children(moves, probabilities))
+                    stats.leave()
 
                 # If there are children, we can select one and play the corresponding move.
                 move, node = node.select_child()
                 current_state = current_state.apply_move(move)
+            stats.leave()
 
             # Compute output of value network and a rollout by the fast policy.
-            value = self.value.predict(current_state)
+            value = self.evaluate(current_state, 'value', self.value.predict)
+            stats.enter('rollout')
             rollout = self.policy_rollout(current_state)
+            stats.leave()
 
             if rollout == 1:
                 print("yay")
@@ -98,23 +120,70 @@ class AlphaGoMCTS(Agent):
             weighted_value = (1 - self.lambda_value) * value + self.lambda_value * rollout
 
             # Update values for this node in the backup phase
+            stats.enter('backup')
             node.update_values(weighted_value)
+            stats.leave()
+        stats.count('rounds', self.num_simulations)
 
         # Pick most visited child of the root as next move.
         move = max(self.root.children,
                    key=lambda z: self.root.children.get(z).visit_count)
 
-        self.root = AlphaGoNode()
-        # If the picked move is a child, set new root to this child node.
-        if move in self.root.children:
-            self.root = self.root.children[move]
-            self.root.parent = None
+        # Keep the picked move's subtree, it becomes the root if the game continues from there.
+        self.root = self.root.children[move]
+        self.root.parent = None
+        self.root_state = game_state.apply_move(move)
+
+        stats.end_move()
         return move
 
+    def diagnostics(self):
+        return self.search_stats.diagnostics()
+
+    def reuse_subtree(self, game_state):
+        """Returns the node for game_state from the tree kept after the last move, or a new root."""
+        node, state = self.root, self.root_state
+
+        if state is not None and not same_position(state, game_state):
+            last_move = game_state.last_move
+            if last_move is not None and last_move in node.children:
+                node, state = node.children[last_move], state.apply_move(last_move)
+
+        if state is None or not same_position(state, game_state):
+            return AlphaGoNode()
+
+        node.parent = None
+        return node
+
+    def evaluate(self, game_state, name, predict):
+        """Returns predict(game_state), looking it up in the transposition table first if there is one."""
+        if self.transpositions is None:
+            return self.predict(predict, game_state)
+
+        outputs = self.transpositions.get(game_state)
+        if outputs is None:
+            outputs = {}
+            self.transpositions.put(game_state, outputs)
+        if name in outputs:
+            self.search_stats.count('transposition_hits')
+        else:
+            outputs[name] = self.predict(predict, game_state)
+
+        return outputs[name]
+
+    def predict(self, predict, game_state):
+        # the agents encode the position and run their model in one call, both count as predict
+        self.search_stats.enter('predict')
+        output = predict(game_state)
+        self.search_stats.leave()
+        return output
+
     def policy_probabilities(self, game_state):
         encoder = self.policy._encoder
-        outputs = self.policy.predict(game_state)
+        outputs = self.evaluate(game_state, 'policy', self.policy.predict)
+        self.search_stats.enter('legality')
         legal_moves = game_state.legal_moves()
+        self.search_stats.leave()
         if not legal_moves:
             return [], []
         encoded_points = [encoder.encode_point(move.point) for move in legal_moves if move.point]
@@ -7,6 +7,7 @@ from dlgo.agent.helpers import is_point_an_eye
 from dlgo import encoders
 from dlgo import goboard
 from dlgo import kerasutil
+from dlgo.prediction_cache import predict_states
 
 __all__ = [
     'PolicyAgent',
@@ -38,9 +39,7 @@ class PolicyAgent(Agent):
         self._temperature = 0.0
 
     def predict(self, game_state):
-        encoded_state = self._encoder.encode(game_state)
-        input_tensor = np.array([encoded_state])
-        return self._model.predict(input_tensor)[0]
+        return predict_states(self._model, self._encoder, [game_state])[0]
 
     def set_temperature(self, temperature):
         self._temperature = temperature
@@ -49,18 +48,20 @@ class PolicyAgent(Agent):
         self._collector = collector      # Allows the self-play driver program to attach a collector to the agent
 
     def select_move(self, game_state):  # 9.12 and 9.17
-        board_tensor = self._encoder.encode(game_state)
-        x = np.array([board_tensor])            # The Keras Predict call makes batch predictions,
         num_moves = self._encoder.board_width * self._encoder.board_height
 
-        # move_probs = self._model.predict(x)[0]           # so you wrap your single board in an array and
+        # only a collector that stores full board tensors needs the encoding, the prediction reuses it
+        board_tensor = None
+        if self._collector is not None and not self._collector.compact:
+            board_tensor = self._encoder.encode(game_state)
 
         if np.random.random() < self._temperature:
             # Explore random moves.
             move_probs = np.ones(num_moves) / num_moves
         else:
             # Follow our current policy.
-            move_probs = self._model.predict(x)[0]
+            model_input = None if board_tensor is None else np.array([board_tensor])
+            move_probs = predict_states(self._model, self._encoder, [game_state], model_input=model_input)[0]
 
         # move_probs = clip_probs(move_probs)     # pull out the first item the resulting array
         eps = 1e-5
@@ -81,7 +82,7 @@ class PolicyAgent(Agent):
             if is_valid and (not is_an_eye):
                 if self._collector is not None:     # At the time it chooses a move, notifies the collector of the deci
                     self._collector.record_decision(
-                        state=board_tensor,
+                        state=game_state if self._collector.compact else board_tensor,
                         action=point_idx
                     )
                 return goboard.Move.play(point)
@@ -116,7 +117,7 @@ class PolicyAgent(Agent):
             experience, self._encoder.board_width, self._encoder.board_height)
 
         self._model.fit(
-            experience.states, target_vectors,
+            experience.encoded_states(self._encoder), target_vectors,
             batch_size=batch_size,
             epochs=1)
 
@@ -4,6 +4,7 @@ from dlgo.agent.helpers import is_point_an_eye
 from dlgo import encoders
 from dlgo import goboard
 from dlgo import kerasutil
+from dlgo.prediction_cache import predict_states
 
 
 class DeepLearningAgent(Agent):
@@ -13,9 +14,7 @@ class DeepLearningAgent(Agent):
         self.encoder = encoder
 
     def predict(self, game_state):
-        encoded_state = self.encoder.encode(game_state)
-        input_tensor = np.array([encoded_state])
-        return self.model.predict(input_tensor)[0]
+        return predict_states(self.model, self.encoder, [game_state])[0]
 
     def select_move(self, game_state):
         num_moves = self.encoder.board_width * self.encoder.board_height
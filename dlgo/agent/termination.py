@@ -60,6 +60,9 @@ class TerminationAgent(Agent):
         else:
             return self.agent.select_move(game_state)
 
+    def diagnostics(self):
+        return self.agent.diagnostics()
+
 
 def get(termination):
     if termination == 'opponent_passes':
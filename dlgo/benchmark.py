@@ -0,0 +1,449 @@
+"""Micro-benchmarks for the board implementations.
+
+Every board module (goboard_slow, goboard, goboard_fast, goboard_array)
+replays the same fixed corpus of SGF games and is timed on:
+
+    place_stone      stones placed replaying every game on a bare Board
+    captures         place_stone calls that capture, from the positions before them
+    legal_moves      legal move lists of sampled positions, an is_valid_move
+                     loop over every point where the GameState has no legal_moves
+    is_valid_move    validity checks of every point of sampled positions
+    encode_<name>    encoder.encode of sampled positions, per encoder
+    rollouts         random games (FastRandomBot against itself) from an empty board
+    batch_rollouts   random games played by BatchRollout from an empty board, in
+                     one batch; BatchRollout keeps its own arrays, so only the
+                     conversion of the start position depends on the board
+    mcts_playouts    MCTSAgent rounds from an empty board, with the rollouts
+                     played on the board being benchmarked
+
+Each benchmark runs repeat times and keeps the fastest run, reported as a
+rate (higher is better). A board that lacks what a benchmark needs, like the
+move ages of the AlphaGo encoder or legal_moves for MCTS, gets a skipped entry
+instead.
+
+The default corpus, benchmark_corpus.sgf next to this module, holds four
+seeded random 19x19 games of 400 moves with 125 captures between them. Real
+game records can be used instead with --sgf, every game of every file is read. Results are saved as JSON; run
+with --baseline to compare against an earlier file, which exits with status 1
+when any rate dropped by more than --threshold.
+
+    python -m dlgo.benchmark --boards goboard_fast goboard_array --output new.json --baseline old.json
+"""
+
+import argparse
+import contextlib
+import copy
+import io
+import json
+import os
+import platform
+import random
+import sys
+import time
+from collections import namedtuple
+
+import numpy as np
+
+from dlgo.agent.naive import FastRandomBot
+from dlgo.encoders.base import get_encoder_by_name
+from dlgo.gosgf import SgfGame
+from dlgo.gosgf.sgf_grammar import parse_sgf_collection
+from dlgo.gotypes import Player, Point
+from dlgo.mcts import MCTSAgent
+from dlgo.mcts.rollout import BatchRollout
+from dlgo.utils import get_goboard_by_name
+
+__all__ = [
+    'BOARDS',
+    'ENCODERS',
+    'compare_results',
+    'load_corpus',
+    'run_benchmarks',
+]
+
+BOARDS = ('goboard_slow', 'goboard', 'goboard_fast', 'goboard_array')
+ENCODERS = ('oneplane', 'sevenplane', 'alphago')
+DEFAULT_CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmark_corpus.sgf')
+
+
+class CorpusGame(namedtuple('CorpusGame', 'board_size setup moves')):
+    """A game record independent of board implementation.
+
+    setup lists the black handicap stones, moves the (player, point) pairs
+    played with point None for a pass.
+    """
+    pass
+
+
+class Unsupported(Exception):
+    pass
+
+
+def read_sgf_files(paths):
+    """The SgfGames of SGF files and of the .sgf files in directories, every game of a collection."""
+    file_names = []
+    for path in paths:
+        if os.path.isdir(path):
+            file_names.extend(os.path.join(path, name) for name in sorted(os.listdir(path)) if name.endswith('.sgf'))
+        else:
+            file_names.append(path)
+
+    games = []
+    for file_name in file_names:
+        with open(file_name, 'rb') as f:
+            games.extend(SgfGame.from_coarse_game_tree(tree) for tree in parse_sgf_collection(f.read()))
+    return games
+
+
+def load_corpus(records):
+    """CorpusGames from SgfGames or SGF strings of a single game each."""
+    corpus = []
+    for record in records:
+        sgf = record if isinstance(record, SgfGame) else SgfGame.from_string(record)
+        setup = []
+        if sgf.get_handicap():
+            for stones in sgf.get_root().get_setup_stones():
+                setup.extend(Point(row + 1, col + 1) for row, col in stones)
+
+        moves = []
+        for node in sgf.get_main_sequence():
+            color, move_tuple = node.get_move()
+            if color is None:
+                continue
+            player = Player.black if color == 'b' else Player.white
+            point = Point(move_tuple[0] + 1, move_tuple[1] + 1) if move_tuple is not None else None
+            moves.append((player, point))
+
+        corpus.append(CorpusGame(sgf.get_size(), setup, moves))
+    return corpus
+
+
+def replay(goboard, game):
+    """The GameState of goboard before every move of a corpus game, with the move's player and point."""
+    if game.setup:
+        board = goboard.Board(game.board_size, game.board_size)
+        for point in game.setup:
+            board.place_stone(Player.black, point)
+        game_state = goboard.GameState(board, Player.white, None, None)
+    else:
+        game_state = goboard.GameState.new_game(game.board_size)
+
+    positions = []
+    for player, point in game.moves:
+        positions.append((game_state, player, point))
+        move = goboard.Move.play(point) if point is not None else goboard.Move.pass_turn()
+        game_state = game_state.apply_move(move)
+    return positions
+
+
+def legal_moves(goboard, game_state, points):
+    if hasattr(game_state, 'legal_moves'):
+        return game_state.legal_moves()
+
+    moves = [goboard.Move.play(point) for point in points]
+    moves = [move for move in moves if game_state.is_valid_move(move)]
+    return moves + [goboard.Move.pass_turn(), goboard.Move.resign()]
+
+
+def num_stones(board, points):
+    return sum(1 for point in points if board.get(point) is not None)
+
+
+# Every benchmark prepares its inputs outside the timed part and returns the
+# function to time, the number of operations it performs and their unit.
+
+def place_stone_benchmark(goboard, games, options):
+    def run():
+        for game in games:
+            board = goboard.Board(game.board_size, game.board_size)
+            for player, point in game.moves:
+                if point is not None:
+                    board.place_stone(player, point)
+
+    return run, sum(point is not None for game in games for _, point in game.moves), 'stones/s'
+
+
+def captures_benchmark(goboard, games, options):
+    if 'capture_positions' not in options:
+        options['capture_positions'] = [(game_state.board, player, point)
+                                        for positions in options['positions']
+                                        for game_state, player, point in positions
+                                        if point is not None and is_capture(game_state.board, player, point)]
+    if not options['capture_positions']:
+        raise Unsupported('the corpus has no captures')
+
+    # fresh copies every time, the run places the stones
+    captures = [(copy.deepcopy(board), player, point) for board, player, point in options['capture_positions']]
+
+    def run():
+        for board, player, point in captures:
+            board.place_stone(player, point)
+
+    return run, len(captures), 'captures/s'
+
+
+def is_capture(board, player, point):
+    points = _points(board.num_rows, board.num_cols)
+    copied = copy.deepcopy(board)
+    before = num_stones(copied, points)
+    copied.place_stone(player, point)
+    return num_stones(copied, points) <= before
+
+
+def legal_moves_benchmark(goboard, games, options):
+    samples = options['samples']
+    points = _points(*options['board_shape'])
+
+    def run():
+        for game_state in samples:
+            legal_moves(goboard, game_state, points)
+
+    return run, len(samples), 'positions/s'
+
+
+def is_valid_move_benchmark(goboard, games, options):
+    samples = options['samples']
+    moves = [goboard.Move.play(point) for point in _points(*options['board_shape'])]
+
+    def run():
+        for game_state in samples:
+            for move in moves:
+                game_state.is_valid_move(move)
+
+    return run, len(samples) * len(moves), 'checks/s'
+
+
+def encode_benchmark(encoder_name):
+    def benchmark(goboard, games, options):
+        samples = options['samples']
+        encoder = get_encoder_by_name(encoder_name, options['board_shape'])
+        try:
+            encoder.encode(samples[0])
+        except AttributeError as e:
+            raise Unsupported(str(e))
+
+        def run():
+            for game_state in samples:
+                encoder.encode(game_state)
+
+        return run, len(samples), 'positions/s'
+    return benchmark
+
+
+def rollouts_benchmark(goboard, games, options):
+    board_size = options['rollout_size']
+    num_games = options['num_rollouts']
+    max_moves = 4 * board_size * board_size
+    bot = FastRandomBot()
+
+    def run():
+        for _ in range(num_games):
+            game_state = goboard.GameState.new_game(board_size)
+            num_moves = 0
+            while not game_state.is_over() and num_moves < max_moves:
+                game_state = game_state.apply_move(bot.select_move(game_state))
+                num_moves += 1
+
+    return run, num_games, 'games/s'
+
+
+def batch_rollouts_benchmark(goboard, games, options):
+    board_size = options['rollout_size']
+    num_games = options['batch_rollouts']
+    game_state = goboard.GameState.new_game(board_size)
+    rollout = BatchRollout(board_size, board_size)
+
+    def run():
+        rollout.play(game_state, num_games)
+
+    return run, num_games, 'games/s'
+
+
+class BoardMCTSAgent(MCTSAgent):
+    """An MCTSAgent that plays its rollouts on the board of the position it searches.
+
+    MCTSAgent itself plays them on a goboard_array copy, which would time goboard_array
+    whatever board is benchmarked.
+    """
+    def __init__(self, num_rounds, temperature, max_moves):
+        super().__init__(num_rounds, temperature)
+        self.max_moves = max_moves
+        self.bot = FastRandomBot()
+
+    def simulate_random_game(self, game_state):
+        num_moves = 0
+        while not game_state.is_over() and num_moves < self.max_moves:
+            game_state = game_state.apply_move(self.bot.select_move(game_state))
+            num_moves += 1
+
+        return game_state.winner()
+
+
+def mcts_benchmark(goboard, games, options):
+    board_size = options['rollout_size']
+    game_state = goboard.GameState.new_game(board_size)
+    if not hasattr(game_state, 'legal_moves'):
+        raise Unsupported('GameState has no legal_moves')
+    agent = BoardMCTSAgent(options['mcts_rounds'], temperature=1.4, max_moves=4 * board_size * board_size)
+
+    def run():
+        # the agent prints its candidate moves
+        with contextlib.redirect_stdout(io.StringIO()):
+            agent.select_move(game_state)
+
+    return run, options['mcts_rounds'], 'playouts/s'
+
+
+_point_lists = {}
+
+
+def _points(num_rows, num_cols):
+    points = _point_lists.get((num_rows, num_cols))
+    if points is None:
+        points = _point_lists[num_rows, num_cols] = [Point(row, col) for row in range(1, num_rows + 1)
+                                                     for col in range(1, num_cols + 1)]
+    return points
+
+
+def benchmarks(encoders):
+    yield 'place_stone', place_stone_benchmark
+    yield 'captures', captures_benchmark
+    yield 'legal_moves', legal_moves_benchmark
+    yield 'is_valid_move', is_valid_move_benchmark
+    for name in encoders:
+        yield 'encode_' + name, encode_benchmark(name)
+    yield 'rollouts', rollouts_benchmark
+    yield 'batch_rollouts', batch_rollouts_benchmark
+    yield 'mcts_playouts', mcts_benchmark
+
+
+def measure(prepare, repeat, seed):
+    best = None
+    for _ in range(repeat):
+        # setup runs every time, a run may change its inputs (captures places its stones)
+        random.seed(seed)
+        np.random.seed(seed)
+        run, count, unit = prepare()
+        start = time.perf_counter()
+        run()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    return {'rate': count / best if best > 0 else float('inf'), 'unit': unit, 'count': count, 'seconds': best}
+
+
+def run_benchmarks(corpus, boards=BOARDS, encoders=ENCODERS, repeat=3, sample_every=25, rollout_size=9,
+                   num_rollouts=5, batch_rollouts=256, mcts_rounds=100, seed=0, log=None):
+    """Runs every benchmark on every board module and returns the results as a JSON-ready dict."""
+    board_size = corpus[0].board_size
+    if any(game.board_size != board_size for game in corpus):
+        raise ValueError('all corpus games have to be on the same board size')
+
+    results = {}
+    for board_name in boards:
+        goboard = get_goboard_by_name(board_name)
+        positions = [replay(goboard, game) for game in corpus]
+        options = {
+            'positions': positions,
+            'samples': [game_state for game in positions for game_state, _, _ in game[::sample_every]],
+            'board_shape': (board_size, board_size),
+            'rollout_size': rollout_size,
+            'num_rollouts': num_rollouts,
+            'batch_rollouts': batch_rollouts,
+            'mcts_rounds': mcts_rounds,
+        }
+
+        results[board_name] = {}
+        for name, benchmark in benchmarks(encoders):
+            try:
+                result = measure(lambda: benchmark(goboard, corpus, options), repeat, seed)
+            except Unsupported as e:
+                result = {'skipped': str(e)}
+            results[board_name][name] = result
+            if log is not None:
+                log(board_name, name, result)
+
+    return {
+        'meta': {
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'machine': platform.machine(),
+            'processor': platform.processor(),
+            'num_games': len(corpus),
+            'num_moves': sum(len(game.moves) for game in corpus),
+            'repeat': repeat,
+            'sample_every': sample_every,
+            'rollout_size': rollout_size,
+            'num_rollouts': num_rollouts,
+            'batch_rollouts': batch_rollouts,
+            'mcts_rounds': mcts_rounds,
+            'seed': seed,
+        },
+        'results': results,
+    }
+
+
+def compare_results(baseline, current, threshold=0.1):
+    """(board, benchmark, baseline rate, current rate) of every rate that dropped by more than threshold."""
+    regressions = []
+    for board_name, benchmark_results in current['results'].items():
+        for name, result in benchmark_results.items():
+            old = baseline['results'].get(board_name, {}).get(name, {})
+            if 'rate' in result and 'rate' in old and result['rate'] < old['rate'] * (1 - threshold):
+                regressions.append((board_name, name, old['rate'], result['rate']))
+    return regressions
+
+
+def print_result(board_name, name, result):
+    if 'skipped' in result:
+        print('%-14s %-20s skipped: %s' % (board_name, name, result['skipped']))
+    else:
+        print('%-14s %-20s %12.1f %s' % (board_name, name, result['rate'], result['unit']))
+    sys.stdout.flush()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the board implementations')
+    parser.add_argument('--boards', nargs='+', default=list(BOARDS), choices=BOARDS)
+    parser.add_argument('--encoders', nargs='+', default=list(ENCODERS))
+    parser.add_argument('--sgf', nargs='+', default=[DEFAULT_CORPUS],
+                        help='SGF files, which may hold several games each, or directories of .sgf files')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--sample-every', type=int, default=25,
+                        help='take every n-th corpus position for the per-position benchmarks')
+    parser.add_argument('--rollout-size', type=int, default=9)
+    parser.add_argument('--num-rollouts', type=int, default=5)
+    parser.add_argument('--batch-rollouts', type=int, default=256, help='games in the batch of batch_rollouts')
+    parser.add_argument('--mcts-rounds', type=int, default=100)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default='benchmark_results.json')
+    parser.add_argument('--baseline', help='earlier results to check for regressions')
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help='largest accepted drop of a rate against the baseline, as a fraction')
+    args = parser.parse_args()
+
+    corpus = load_corpus(read_sgf_files(args.sgf))
+    results = run_benchmarks(corpus, boards=args.boards, encoders=args.encoders, repeat=args.repeat,
+                             sample_every=args.sample_every, rollout_size=args.rollout_size,
+                             num_rollouts=args.num_rollouts, batch_rollouts=args.batch_rollouts,
+                             mcts_rounds=args.mcts_rounds, seed=args.seed,
+                             log=print_result)
+
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print('Saved results to %s' % args.output)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare_results(baseline, results, args.threshold)
+        for board_name, name, old, new in regressions:
+            print('REGRESSION %s %s: %.1f -> %.1f (%+.1f%%)' % (board_name, name, old, new, 100 * (new / old - 1)))
+        if regressions:
+            sys.exit(1)
+        print('No regressions beyond %.0f%%' % (100 * args.threshold))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from dlgo.benchmark import compare_results, load_corpus, read_sgf_files, run_benchmarks
+from dlgo.gotypes import Player, Point
+
+# white's stone on aa (row 5, col 1 on 5x5) is captured by black's b[ab]
+CORPUS = ['(;GM[1]FF[4]SZ[5];B[ba];W[aa];B[ab];W[cc];B[];W[dd])']
+
+
+class BenchmarkTest(unittest.TestCase):
+    def test_load_corpus(self):
+        game = load_corpus(CORPUS)[0]
+        self.assertEqual(5, game.board_size)
+        self.assertEqual((Player.black, Point(5, 2)), game.moves[0])
+        self.assertEqual((Player.black, None), game.moves[4])
+
+    def test_read_sgf_files(self):
+        path = tempfile.mkdtemp()
+        try:
+            # a game spread over several lines and a collection of two games
+            with open(os.path.join(path, 'one.sgf'), 'w') as f:
+                f.write(CORPUS[0].replace(';', '\n;'))
+            with open(os.path.join(path, 'two.sgf'), 'w') as f:
+                f.write(CORPUS[0] + '\n\n' + CORPUS[0])
+
+            games = load_corpus(read_sgf_files([path]))
+        finally:
+            shutil.rmtree(path)
+
+        self.assertEqual(3, len(games))
+        for game in games:
+            self.assertEqual(load_corpus(CORPUS)[0], game)
+
+    def test_run(self):
+        results = run_benchmarks(load_corpus(CORPUS), boards=['goboard', 'goboard_fast'], encoders=['oneplane'],
+                                 repeat=1, sample_every=2, rollout_size=5, num_rollouts=1, batch_rollouts=8,
+                                 mcts_rounds=5)
+
+        fast = results['results']['goboard_fast']
+        self.assertEqual(5, fast['place_stone']['count'])
+        self.assertEqual(1, fast['captures']['count'])
+        self.assertEqual(3 * 25, fast['is_valid_move']['count'])
+        self.assertGreater(fast['mcts_playouts']['rate'], 0)
+        self.assertEqual(8, fast['batch_rollouts']['count'])
+        self.assertIn('skipped', results['results']['goboard']['mcts_playouts'])
+
+    def test_compare(self):
+        baseline = {'results': {'goboard_fast': {'place_stone': {'rate': 100.0}, 'rollouts': {'rate': 10.0}}}}
+        current = {'results': {'goboard_fast': {'place_stone': {'rate': 95.0}, 'rollouts': {'rate': 8.0},
+                                                'mcts_playouts': {'rate': 1.0}}}}
+
+        self.assertEqual([('goboard_fast', 'rollouts', 10.0, 8.0)], compare_results(baseline, current, 0.1))
+        self.assertEqual([], compare_results(baseline, current, 0.25))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+"""Compact storage of board positions for experience buffers.
+
+Experience buffers normally hold every decision as an encoded float64
+tensor, 11 planes of 19x19 for the zero encoder, which is mostly zeros and
+constants. A packed position keeps what those planes are computed from: one
+bit per point for black stones, white stones and points that ko forbids, and
+the player to move. That is 139 bytes on 19x19 instead of about 32 KB.
+
+Packed positions are records of position_dtype, so arrays of them can be
+concatenated, sliced and written to HDF5 like the encoded states.
+encode_positions turns them back into the planes of any encoder that
+implements encode_arrays (oneplane, sevenplane and the zero encoder), exactly
+as encoder.encode would have encoded the original game state.
+"""
+
+import numpy as np
+
+from dlgo import goboard_array
+from dlgo.encoders.encoder_utils import ko_points
+from dlgo.gotypes import Player
+
+__all__ = [
+    'encode_positions',
+    'is_packed',
+    'pack_position',
+    'position_dtype',
+    'unpack_position',
+]
+
+
+def position_dtype(num_rows, num_cols):
+    num_bytes = (num_rows * num_cols + 7) // 8
+    return np.dtype([
+        ('black', np.uint8, (num_bytes,)),
+        ('white', np.uint8, (num_bytes,)),
+        ('ko', np.uint8, (num_bytes,)),
+        ('next_player', np.int8),
+    ])
+
+
+def is_packed(states):
+    return states.dtype.names is not None and 'next_player' in states.dtype.names
+
+
+def pack_position(game_state):
+    board = game_state.board
+    array_state = goboard_array.GameState.from_game_state(game_state)
+    colors, _, _ = array_state.board.point_arrays()
+
+    position = np.zeros(1, dtype=position_dtype(board.num_rows, board.num_cols))[0]
+    position['black'] = np.packbits(colors == Player.black.value)
+    position['white'] = np.packbits(colors == Player.white.value)
+    position['ko'] = np.packbits(ko_points(array_state))
+    position['next_player'] = game_state.next_player.value
+    return position
+
+
+def unpack_position(position, num_rows, num_cols):
+    """Returns the colour array, the ko mask and the player to move of a packed position."""
+    num_points = num_rows * num_cols
+    shape = (num_rows, num_cols)
+
+    colors = np.zeros(shape, dtype=np.int8)
+    colors[np.unpackbits(position['black'])[:num_points].reshape(shape).astype(bool)] = Player.black.value
+    colors[np.unpackbits(position['white'])[:num_points].reshape(shape).astype(bool)] = Player.white.value
+    ko = np.unpackbits(position['ko'])[:num_points].reshape(shape).astype(bool)
+
+    return colors, ko, Player(int(position['next_player']))
+
+
+def encode_positions(encoder, positions, out=None):
+    """Encodes packed positions into a float32 array, or into the first len(positions) entries of out."""
+    _, num_rows, num_cols = encoder.shape()
+    if out is None:
+        out = np.zeros((len(positions),) + tuple(encoder.shape()), dtype=np.float32)
+    else:
+        out = out[:len(positions)]
+        out.fill(0)
+
+    for board_tensor, position in zip(out, positions):
+        colors, ko, next_player = unpack_position(position, num_rows, num_cols)
+        _, liberties, _ = goboard_array.Board.from_colors(colors).point_arrays()
+        encoder.encode_arrays(board_tensor, next_player, colors, liberties, ko)
+
+    return out
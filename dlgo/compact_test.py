@@ -0,0 +1,52 @@
+import random
+import unittest
+
+import numpy as np
+
+from dlgo.compact import encode_positions, is_packed, pack_position, position_dtype, unpack_position
+from dlgo.encoders.oneplane import OnePlaneEncoder
+from dlgo.encoders.sevenplane import SevenPlaneEncoder
+from dlgo.goboard_fast import GameState, Move
+from dlgo.gotypes import Player, Point
+from dlgo.zero.encoder import ZeroEncoder
+
+
+def random_states(board_size, num_moves, seed):
+    rng = random.Random(seed)
+    game_state = GameState.new_game(board_size)
+    states = [game_state]
+    for _ in range(num_moves):
+        if game_state.is_over():
+            break
+        plays = [move for move in game_state.legal_moves() if move.is_play]
+        game_state = game_state.apply_move(rng.choice(plays) if plays else Move.pass_turn())
+        states.append(game_state)
+    return states
+
+
+class CompactPositionTest(unittest.TestCase):
+    def test_size(self):
+        self.assertEqual(3 * 46 + 1, position_dtype(19, 19).itemsize)
+
+    def test_unpack(self):
+        game_state = GameState.new_game(5).apply_move(Move.play(Point(2, 3)))
+        colors, ko, next_player = unpack_position(pack_position(game_state), 5, 5)
+
+        self.assertEqual(Player.white, next_player)
+        self.assertEqual([(1, 2)], list(zip(*colors.nonzero())))
+        self.assertEqual(Player.black.value, colors[1, 2])
+        self.assertFalse(ko.any())
+
+    def test_encode_positions(self):
+        # long games on a small board go through plenty of captures and kos
+        states = random_states(5, 150, seed=1)
+        positions = np.array([pack_position(game_state) for game_state in states])
+        self.assertTrue(is_packed(positions))
+
+        for encoder in (OnePlaneEncoder((5, 5)), SevenPlaneEncoder((5, 5)), ZeroEncoder(5)):
+            expected = np.array([encoder.encode(game_state) for game_state in states])
+            np.testing.assert_array_equal(expected, encode_positions(encoder, positions))
+
+
+if __name__ == '__main__':
+    unittest.main()
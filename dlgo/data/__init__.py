@@ -1,3 +1,5 @@
 from .generator import *
 from .index_processor import *
+from .packed import *
+from .prefetch import *
 from .parallel_processor import *
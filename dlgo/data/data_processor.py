@@ -14,6 +14,7 @@ from dlgo.gosgf import SgfGame
 from dlgo.goboard_fast import Board, GameState, Move
 from dlgo.gotypes import Player, Point
 from dlgo.encoders.base import get_encoder_by_name
+from dlgo.encoders.incremental import IncrementalEncoder
 
 from dlgo.data.index_processor import KGSIndex
 from dlgo.data.sampling import Sampler
@@ -79,6 +80,8 @@ class GoDataProcessor:
         features = np.zeros(feature_shape)
         labels = np.zeros((total_examples,))
 
+        # the positions of a game follow each other, so only the changes of each move get encoded
+        encoder = IncrementalEncoder(self.encoder) if IncrementalEncoder.supports(self.encoder) else self.encoder
         counter = 0
         for index in game_list:
             # reads the SGF contents as a string
@@ -104,7 +107,7 @@ class GoDataProcessor:
                         move = Move.pass_turn()
                     if first_move_done and point is not None:
                         # Encode the current games state as features
-                        features[counter] = self.encoder.encode(game_state)
+                        encoder.encode_into(game_state, features[counter])
                         # Encode the next move as label
                         labels[counter] = self.encoder.encode_point(point)
                         counter += 1
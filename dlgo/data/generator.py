@@ -1,27 +1,92 @@
 # 7.13, 7.14, and 7.15
 
 import glob
+import threading
+from collections import OrderedDict
+
 import numpy as np
 from keras.utils import to_categorical
 
 
+def npy_length(file_name):
+    """Number of rows of the array in a .npy file, read from its header."""
+    with open(file_name, 'rb') as f:
+        version = np.lib.format.read_magic(f)
+        if version == (1, 0):
+            shape, _, _ = np.lib.format.read_array_header_1_0(f)
+        else:
+            shape, _, _ = np.lib.format.read_array_header_2_0(f)
+    return shape[0]
+
+
 class DataGenerator:
+    # memory maps kept open by take(), each holds a file handle for its features and one for its labels
+    max_open_chunks = 16
+
     def __init__(self, data_directory, samples):
         self.data_directory = data_directory
         self.samples = samples
         # Has access to samples from earlier
         self.files = set(file_name for file_name, index in samples)
         self.num_samples = None
+        self._chunks = None
+        self._arrays = OrderedDict()
+        self._arrays_lock = threading.Lock()
 
     # May need to know number of applications
     def get_num_samples(self, batch_size=128, num_classes=19 * 19):
-        if self.num_samples is not None:
-            return self.num_samples
-        else:
-            self.num_samples = 0
-            for X, y in self._generate(batch_size=batch_size, num_classes=num_classes):
-                self.num_samples += X.shape[0]
-            return self.num_samples
+        if self.num_samples is None:
+            # _generate drops the last partial batch of every file
+            self.num_samples = sum(size - size % batch_size for _, size in self.chunks())
+        return self.num_samples
+
+    # Feature file and number of positions of every chunk, taken from the .npy headers without loading the data
+    def chunks(self):
+        if self._chunks is None:
+            self._chunks = []
+            for zip_file_name in sorted(self.files):
+                file_name = zip_file_name.replace('.tar.gz', '') + 'train'
+                base = self.data_directory + '/' + file_name + '_features_*.npy'
+                for feature_file in sorted(glob.glob(base)):
+                    self._chunks.append((feature_file, npy_length(feature_file)))
+        return self._chunks
+
+    def _load(self, feature_file):
+        # the least recently used maps are dropped, so a large corpus doesn't run out of file handles
+        with self._arrays_lock:
+            if feature_file in self._arrays:
+                self._arrays.move_to_end(feature_file)
+                return self._arrays[feature_file]
+
+            label_file = feature_file.replace('features', 'labels')
+            arrays = np.load(feature_file, mmap_mode='r'), np.load(label_file, mmap_mode='r')
+            self._arrays[feature_file] = arrays
+            while len(self._arrays) > self.max_open_chunks:
+                self._arrays.popitem(last=False)
+            return arrays
+
+    def __len__(self):
+        return sum(size for _, size in self.chunks())
+
+    # Features and one-hot labels of the positions at indices, counting through all chunks in order
+    def take(self, indices, num_classes=19 * 19):
+        chunks = self.chunks()
+        offsets = np.cumsum([0] + [size for _, size in chunks])
+        indices = np.asarray(indices)
+        chunk_ids = np.searchsorted(offsets, indices, side='right') - 1
+
+        x = None
+        y = np.zeros((len(indices),), dtype=int)
+        for chunk_id in np.unique(chunk_ids):
+            selected = np.nonzero(chunk_ids == chunk_id)[0]
+            features, labels = self._load(chunks[chunk_id][0])
+            rows = indices[selected] - offsets[chunk_id]
+            if x is None:
+                x = np.zeros((len(indices),) + features.shape[1:], dtype='float32')
+            x[selected] = features[rows]
+            y[selected] = labels[rows]
+
+        return x, to_categorical(y, num_classes)
 
     def _generate(self, batch_size, num_classes):
         for zip_file_name in self.files:
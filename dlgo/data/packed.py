@@ -0,0 +1,157 @@
+"""Packed on-disk training data.
+
+The processors write every archive as pairs of small feature and label .npy
+chunks, which DataGenerator and consolidate_games load, cast to float32 and
+expand with to_categorical one by one. A packed dataset puts all of them into
+one feature array of uint8 (int8 for encoders with negative entries, like
+oneplane) and one array of int16 label indices, plus an index file with the
+number of samples and where every archive's positions start.
+
+PackedDataset memory-maps both arrays, so a batch is a slice of the files
+that only becomes float32 features and one-hot labels when it is handed out.
+Corpora far larger than memory can be trained on straight from disk.
+"""
+
+import glob
+import json
+import os.path
+
+import numpy as np
+
+__all__ = [
+    'PackedDataset',
+    'pack_chunks',
+    'pack_games',
+    'one_hot',
+]
+
+
+def one_hot(labels, num_classes):
+    encoded = np.zeros((len(labels), num_classes), dtype=np.float32)
+    encoded[np.arange(len(labels)), labels] = 1
+    return encoded
+
+
+def chunk_number(feature_file):
+    # <prefix>_features_<n>.npy
+    return int(feature_file.rsplit('_', 1)[1][:-len('.npy')])
+
+
+def pack_games(data_dir, name, samples, feature_dtype=None):
+    """Packs the chunks the processors wrote for the archives in samples into the dataset name."""
+    prefixes = sorted(set(zip_file_name.replace('.tar.gz', '') + name for zip_file_name, index in samples))
+    return pack_chunks(data_dir, name, prefixes, feature_dtype)
+
+
+def pack_chunks(data_dir, name, prefixes, feature_dtype=None):
+    """Packs the <prefix>_features_<n>.npy and <prefix>_labels_<n>.npy chunks of every prefix.
+
+    feature_dtype defaults to uint8, or int8 if the first chunk has negative
+    entries. Chunks that don't fit into it exactly raise a ValueError.
+    """
+    chunks = []
+    for prefix in prefixes:
+        feature_files = sorted(glob.glob(os.path.join(data_dir, prefix + '_features_*.npy')), key=chunk_number)
+        chunks.append((prefix, feature_files))
+
+    # the shapes come from the .npy headers, nothing is read yet
+    sizes = {}
+    feature_shape = None
+    for prefix, feature_files in chunks:
+        for feature_file in feature_files:
+            features = np.load(feature_file, mmap_mode='r')
+            sizes[feature_file] = features.shape[0]
+            feature_shape = features.shape[1:]
+            if feature_dtype is None:
+                feature_dtype = np.int8 if features.min() < 0 else np.uint8
+
+    if feature_shape is None:
+        raise ValueError('no chunks to pack for ' + name)
+
+    num_samples = sum(sizes.values())
+    features_path, labels_path, index_path = PackedDataset.paths(data_dir, name)
+    features = np.lib.format.open_memmap(features_path, mode='w+', dtype=feature_dtype,
+                                         shape=(num_samples,) + tuple(feature_shape))
+    labels = np.lib.format.open_memmap(labels_path, mode='w+', dtype=np.int16, shape=(num_samples,))
+
+    sources = []
+    position = 0
+    for prefix, feature_files in chunks:
+        start = position
+        for feature_file in feature_files:
+            chunk = np.load(feature_file)
+            stop = position + len(chunk)
+            features[position:stop] = chunk
+            if not np.array_equal(features[position:stop], chunk):
+                raise ValueError('{} does not fit into {}'.format(feature_file, np.dtype(feature_dtype).name))
+            labels[position:stop] = np.load(feature_file.replace('features', 'labels'))
+            position = stop
+        sources.append({'prefix': prefix, 'start': start, 'stop': position})
+
+    features.flush()
+    labels.flush()
+    del features, labels
+
+    with open(index_path, 'w') as index_file:
+        json.dump({
+            'num_samples': num_samples,
+            'feature_shape': list(feature_shape),
+            'feature_dtype': np.dtype(feature_dtype).name,
+            'sources': sources,
+        }, index_file, indent=2)
+
+    return PackedDataset(data_dir, name)
+
+
+class PackedDataset:
+    """A packed dataset, read through memory maps.
+
+    generate and get_num_samples work like DataGenerator's, so a packed
+    dataset can be passed to fit_generator in its place.
+    """
+    def __init__(self, data_dir, name):
+        self.data_dir = data_dir
+        self.name = name
+
+        features_path, labels_path, index_path = self.paths(data_dir, name)
+        with open(index_path) as index_file:
+            self.index = json.load(index_file)
+
+        self.features = np.load(features_path, mmap_mode='r')
+        self.labels = np.load(labels_path, mmap_mode='r')
+
+    @staticmethod
+    def paths(data_dir, name):
+        base = os.path.join(data_dir, name)
+        return base + '_features.npy', base + '_labels.npy', base + '_index.json'
+
+    @staticmethod
+    def exists(data_dir, name):
+        return all(os.path.isfile(path) for path in PackedDataset.paths(data_dir, name))
+
+    def __len__(self):
+        return self.index['num_samples']
+
+    def get_num_samples(self, batch_size=128, num_classes=19 * 19):
+        # generate only hands out full batches
+        return len(self) - len(self) % batch_size
+
+    def batch(self, start, stop, num_classes=19 * 19):
+        x = self.features[start:stop].astype(np.float32)
+        y = one_hot(self.labels[start:stop], num_classes)
+        return x, y
+
+    def take(self, indices, num_classes=19 * 19):
+        # indices should be sorted, so the reads go through the files in order
+        x = self.features[indices].astype(np.float32)
+        y = one_hot(self.labels[indices], num_classes)
+        return x, y
+
+    def _generate(self, batch_size, num_classes):
+        for start in range(0, len(self) - batch_size + 1, batch_size):
+            yield self.batch(start, start + batch_size, num_classes)
+
+    def generate(self, batch_size=128, num_classes=19 * 19):
+        while True:
+            for item in self._generate(batch_size, num_classes):
+                yield item
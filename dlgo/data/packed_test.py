@@ -0,0 +1,72 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from dlgo.data.packed import PackedDataset, one_hot, pack_chunks, pack_games
+
+
+class PackedDatasetTest(unittest.TestCase):
+    def setUp(self):
+        self.data_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.data_dir)
+
+    def write_chunks(self, prefix, sizes, low=0):
+        features = []
+        labels = []
+        for chunk, size in enumerate(sizes):
+            x = np.random.randint(low, 2, size=(size, 2, 3, 3)).astype(np.float32)
+            y = np.random.randint(0, 9, size=size)
+            np.save(os.path.join(self.data_dir, '%s_features_%d' % (prefix, chunk)), x)
+            np.save(os.path.join(self.data_dir, '%s_labels_%d' % (prefix, chunk)), y)
+            features.append(x)
+            labels.append(y)
+        return np.concatenate(features), np.concatenate(labels)
+
+    def test_pack_games(self):
+        # chunk 10 sorts before chunk 2 by name, the packed order follows the chunk numbers
+        x_a, y_a = self.write_chunks('KGS-atrain', [4, 4, 4, 4, 4, 4, 4, 4, 4, 4, 3])
+        x_b, y_b = self.write_chunks('KGS-btrain', [5])
+        samples = [('KGS-b.tar.gz', 1), ('KGS-a.tar.gz', 7), ('KGS-a.tar.gz', 2)]
+
+        dataset = pack_games(self.data_dir, 'train', samples)
+
+        self.assertEqual(48, len(dataset))
+        self.assertEqual(np.uint8, dataset.features.dtype)
+        self.assertEqual(np.int16, dataset.labels.dtype)
+        self.assertEqual([{'prefix': 'KGS-atrain', 'start': 0, 'stop': 43},
+                          {'prefix': 'KGS-btrain', 'start': 43, 'stop': 48}], dataset.index['sources'])
+        self.assertTrue(PackedDataset.exists(self.data_dir, 'train'))
+
+        x, y = PackedDataset(self.data_dir, 'train').batch(40, 46, num_classes=9)
+        self.assertEqual(np.float32, x.dtype)
+        np.testing.assert_array_equal(np.concatenate([x_a, x_b])[40:46], x)
+        np.testing.assert_array_equal(one_hot(np.concatenate([y_a, y_b])[40:46], 9), y)
+
+    def test_generate(self):
+        self.write_chunks('KGS-atrain', [7, 7])
+        dataset = pack_chunks(self.data_dir, 'train', ['KGS-atrain'])
+
+        self.assertEqual(12, dataset.get_num_samples(batch_size=4))
+        batches = list(dataset._generate(batch_size=4, num_classes=9))
+        self.assertEqual(3, len(batches))
+        self.assertEqual((4, 2, 3, 3), batches[0][0].shape)
+        self.assertEqual((4, 9), batches[0][1].shape)
+
+    def test_feature_dtype(self):
+        x, _ = self.write_chunks('KGS-atrain', [6], low=-1)
+        dataset = pack_chunks(self.data_dir, 'train', ['KGS-atrain'])
+
+        self.assertEqual(np.int8, dataset.features.dtype)
+        np.testing.assert_array_equal(x, dataset.batch(0, 6, num_classes=9)[0])
+
+        with self.assertRaises(ValueError):
+            pack_chunks(self.data_dir, 'test', ['KGS-atrain'], feature_dtype=np.uint8)
+
+
+if __name__ == '__main__':
+    unittest.main()
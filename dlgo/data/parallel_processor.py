@@ -12,30 +12,35 @@ from os import sys
 from keras.utils import to_categorical
 
 from dlgo.gosgf import SgfGame
-from dlgo.goboard_fast import Board, GameState, Move
+from dlgo.goboard_fast import Move
 from dlgo.gotypes import Player, Point
 from dlgo.data.index_processor import KGSIndex
 from dlgo.data.sampling import Sampler
 from dlgo.data.generator import DataGenerator
+from dlgo.data.packed import pack_games
 from dlgo.encoders.base import get_encoder_by_name
+from dlgo.encoders.incremental import IncrementalEncoder
+from dlgo.utils import get_goboard_by_name
 
 
 def worker(jobinfo):
     try:
-        clazz, encoder, zip_file, data_file_name, game_list = jobinfo
-        clazz(encoder=encoder).process_zip(zip_file, data_file_name, game_list)
+        clazz, encoder, board, zip_file, data_file_name, game_list = jobinfo
+        clazz(encoder=encoder, board=board).process_zip(zip_file, data_file_name, game_list)
     except (KeyboardInterrupt, SystemExit):
         raise Exception('>>> Exiting child process.')
 
 
 class GoDataProcessor:
-    def __init__(self, encoder='oneplane', data_directory='data'):
+    def __init__(self, encoder='oneplane', data_directory='data', board='goboard_fast'):
         self.encoder_string = encoder
         self.encoder = get_encoder_by_name(encoder, 19)
         self.data_dir = data_directory
+        self.board_string = board
+        self.goboard = get_goboard_by_name(board)
 
     def load_go_data(self, data_type='train', num_samples=1000,
-                     use_generator=False):
+                     use_generator=False, packed=False):
         index = KGSIndex(data_directory=self.data_dir)
         index.download_files()
 
@@ -43,6 +48,9 @@ class GoDataProcessor:
         data = sampler.draw_data(data_type, num_samples)
 
         self.map_to_workers(data_type, data)
+        if packed:
+            # one memory-mapped dataset instead of loading the chunks into memory
+            return pack_games(self.data_dir, data_type, data)
         if use_generator:
             generator = DataGenerator(self.data_dir, data)
             return generator
@@ -76,6 +84,8 @@ class GoDataProcessor:
         features = np.zeros(feature_shape)
         labels = np.zeros((total_examples,))
 
+        # the positions of a game follow each other, so only the changes of each move get encoded
+        encoder = IncrementalEncoder(self.encoder) if IncrementalEncoder.supports(self.encoder) else self.encoder
         counter = 0
         for index in game_list:
             name = name_list[index + 1]
@@ -97,7 +107,7 @@ class GoDataProcessor:
                     else:
                         move = Move.pass_turn()
                     if first_move_done and point is not None:
-                        features[counter] = self.encoder.encode(game_state)
+                        encoder.encode_into(game_state, features[counter])
                         labels[counter] = self.encoder.encode_point(point)
                         counter += 1
                     game_state = game_state.apply_move(move)
@@ -169,19 +179,18 @@ class GoDataProcessor:
 
         return features, labels
 
-    @staticmethod
-    def get_handicap(sgf):
-        go_board = Board(19, 19)
+    def get_handicap(self, sgf):
+        go_board = self.goboard.Board(19, 19)
         first_move_done = False
         move = None
-        game_state = GameState.new_game(19)
+        game_state = self.goboard.GameState.new_game(19)
         if sgf.get_handicap() is not None and sgf.get_handicap() != 0:
             for setup in sgf.get_root().get_setup_stones():
                 for move in setup:
                     row, col = move
                     go_board.place_stone(Player.black, Point(row + 1, col + 1))
             first_move_done = True
-            game_state = GameState(go_board, Player.white, None, move)
+            game_state = self.goboard.GameState(go_board, Player.white, None, move)
         return game_state, first_move_done
 
     def map_to_workers(self, data_type, samples):
@@ -198,7 +207,7 @@ class GoDataProcessor:
             base_name = zip_name.replace('.tar.gz', '')
             data_file_name = base_name + data_type
             if not os.path.isfile(self.data_dir + '/' + data_file_name):
-                zips_to_process.append((self.__class__, self.encoder_string, zip_name,
+                zips_to_process.append((self.__class__, self.encoder_string, self.board_string, zip_name,
                                         data_file_name, indices_by_zip_name[zip_name]))
 
         cores = multiprocessing.cpu_count()
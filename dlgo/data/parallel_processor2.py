@@ -4,40 +4,49 @@ import os
 import glob
 import os.path
 import tarfile
-import gzip
-import shutil
 import numpy as np
 import multiprocessing
+from collections import Counter
 from os import sys
 from keras.utils import to_categorical
 
 from dlgo.gosgf import SgfGame
-from dlgo.goboard_fast import Board, GameState, Move
+from dlgo.goboard_fast import Move
 from dlgo.gotypes import Player, Point
 from dlgo.data.index_processor import KGSIndex
 from dlgo.data.sampling import Sampler
 from dlgo.data.generator import DataGenerator
+from dlgo.data.packed import pack_games
 from dlgo.encoders.base import get_encoder_by_name
-
-import math
+from dlgo.encoders.incremental import IncrementalEncoder
+from dlgo.utils import get_goboard_by_name
 
 
 def worker(jobinfo):
     try:
-        clazz, encoder, zip_file, data_file_name, game_list = jobinfo
-        clazz(encoder=encoder).process_zip(zip_file, data_file_name, game_list)
+        clazz, encoder, board, chunk_size, feature_dtype, zip_file, data_file_name, game_list = jobinfo
+        processor = clazz(encoder=encoder, board=board, chunk_size=chunk_size, feature_dtype=feature_dtype)
+        processor.process_zip(zip_file, data_file_name, game_list)
     except (KeyboardInterrupt, SystemExit):
         raise Exception('>>> Exiting child process.')
 
 
 class GoDataProcessor:
-    def __init__(self, encoder='oneplane', data_directory='data'):
+    def __init__(self, encoder='oneplane', data_directory='data', board='goboard_fast',
+                 chunk_size=1024, feature_dtype='float32'):
         self.encoder_string = encoder
         self.encoder = get_encoder_by_name(encoder, 19)
         self.data_dir = data_directory
+        self.board_string = board
+        self.goboard = get_goboard_by_name(board)
+        # positions per feature/label file, the only buffer process_zip holds besides the current game
+        self.chunk_size = chunk_size
+        # a one-byte type keeps the chunk files a quarter of the size: int8 for encoders with negative
+        # entries (oneplane writes -1 for opponent stones), uint8 only for encoders without them
+        self.feature_dtype = np.dtype(feature_dtype)
 
     def load_go_data(self, data_type='train', num_samples=1000,
-                     use_generator=False):
+                     use_generator=False, packed=False):
         index = KGSIndex(data_directory=self.data_dir)
         index.download_files()
 
@@ -45,6 +54,9 @@ class GoDataProcessor:
         data = sampler.draw_data(data_type, num_samples)
 
         self.map_to_workers(data_type, data)
+        if packed:
+            # one memory-mapped dataset instead of loading the chunks into memory
+            return pack_games(self.data_dir, data_type, data)
         if use_generator:
             generator = DataGenerator(self.data_dir, data)
             return generator
@@ -52,16 +64,6 @@ class GoDataProcessor:
             features_and_labels = self.consolidate_games(data_type, data)
             return features_and_labels
 
-    def unzip_data(self, zip_file_name):
-        this_gz = gzip.open(self.data_dir + '/' + zip_file_name)
-
-        tar_file = zip_file_name[0:-3]
-        this_tar = open(self.data_dir + '/' + tar_file, 'wb')
-
-        shutil.copyfileobj(this_gz, this_tar)
-        this_tar.close()
-        return tar_file
-
     """
     def process_zip(self, zip_file_name, data_file_name, game_list):
         feature_file_base = self.data_dir + '/' + data_file_name + '_features_%d'
@@ -142,77 +144,73 @@ class GoDataProcessor:
     """
 
     def process_zip(self, zip_file_name, data_file_name, game_list):
-        # total number of moves in all games in zip file
-        tar_file = self.unzip_data(zip_file_name)
-        zip_file = tarfile.open(self.data_dir + '/' + tar_file)
-        name_list = zip_file.getnames()
-        total_examples = self.num_total_examples(zip_file, game_list, name_list)
-        new_game_list = game_list.copy()
-        # shape = self.encoder.shape()
-        # Changed code to prevent too big features in memory
-        # Finish implementation of process_zip
+        # Reads the games straight out of the compressed archive and parses each one once,
+        # encoding the positions into a fixed-size chunk buffer that is written out whenever it fills up.
+        # Memory use depends on chunk_size, not on the size of the archive.
         feature_file_base = self.data_dir + '/' + data_file_name + '_features_%d'
         label_file_base = self.data_dir + '/' + data_file_name + '_labels_%d'
+
+        # game_list indexes the archive members after the leading directory entry,
+        # a game drawn more than once is encoded as often as it was drawn
+        wanted = Counter(index + 1 for index in game_list)
+
+        features = np.zeros((self.chunk_size,) + tuple(self.encoder.shape()), dtype=self.feature_dtype)
+        labels = np.zeros((self.chunk_size,), dtype=np.int16)
         chunk = 0
-        examples_used = 1024
-        iters = math.ceil(total_examples / examples_used)
-        for z in range(iters):
-            # feature_shape = np.insert(shape, 0, np.asarray([examples_used]))
-            # features = np.zeros(feature_shape)
-            # labels = np.zeros((examples_used,))
-            # counter = 0
-            for index in new_game_list[:examples_used]:
-                features = []
-                labels = []
-                # reads the SGF contents as a string
-                name = name_list[index + 1]
-                if not name.endswith('.sgf'):
-                    raise ValueError(name + ' is not a valid sgf')
-                sgf_content = zip_file.extractfile(name).read()
-                sgf = SgfGame.from_string(sgf_content)
-                # apply handicap stones
-                game_state, first_move_done = self.get_handicap(sgf)
-                # iterates through all moves
+        counter = 0
 
-                for item in sgf.main_sequence_iter():
-                    color, move_tuple = item.get_move()
-                    point = None
-                    if color is not None:
-                        # read the coordinate of the stone to be played
-                        if move_tuple is not None:
-                            row, col = move_tuple
-                            point = Point(row + 1, col + 1)
-                            move = Move.play(point)
-                        else:
-                            # or do nothing
-                            move = Move.pass_turn()
-                        if first_move_done and point is not None:
-                            # Encode the current games state as features
-                            # features[counter] = self.encoder.encode(game_state)
-                            z = self.encoder.encode(game_state)
-                            features.append(z)
-                            # Encode the next move as label
-                            # labels[counter] = self.encoder.encode_point(point)
-                            labels.append(self.encoder.encode_point(point))
-                            # counter += 1
-                        # Apply the move and move on to the next one.
-                        game_state = game_state.apply_move(move)
-                        first_move_done = True
-                new_game_list = new_game_list[examples_used:]
-                feature_file = feature_file_base % chunk
-                label_file = label_file_base % chunk
-                chunk += 1
-
-                # current_features, features = features[:examples_used], features[examples_used:]
-                # current_labels, labels = labels[:examples_used], labels[examples_used:]
-
-                # np.save(feature_file, current_features)
-                # np.save(label_file, current_labels)
-                features = np.array(features)
-                labels = np.array(labels)
-                np.save(feature_file, features)
-                np.save(label_file, labels)
-        #
+        # the positions of a game follow each other, so only the changes of each move get encoded
+        encoder = IncrementalEncoder(self.encoder) if IncrementalEncoder.supports(self.encoder) else self.encoder
+
+        with tarfile.open(self.data_dir + '/' + zip_file_name, 'r|gz') as archive:
+            for member_index, member in enumerate(archive):
+                if member_index not in wanted:
+                    continue
+                if not member.name.endswith('.sgf'):
+                    raise ValueError(member.name + ' is not a valid sgf')
+                sgf = SgfGame.from_string(archive.extractfile(member).read())
+
+                for _ in range(wanted.pop(member_index)):
+                    for game_state, point in self.game_positions(sgf):
+                        encoder.encode_into(game_state, features[counter])
+                        labels[counter] = self.encoder.encode_point(point)
+                        counter += 1
+
+                        if counter == self.chunk_size:
+                            self.save_chunk(feature_file_base % chunk, label_file_base % chunk, features, labels)
+                            chunk += 1
+                            counter = 0
+                            features.fill(0)
+
+                if not wanted:
+                    break  # no need to decompress the rest of the archive
+
+        if counter > 0:
+            self.save_chunk(feature_file_base % chunk, label_file_base % chunk, features[:counter], labels[:counter])
+
+    def game_positions(self, sgf):
+        # yields every position of the game that has a move to learn, with the point played there
+        game_state, first_move_done = self.get_handicap(sgf)
+
+        for item in sgf.main_sequence_iter():
+            color, move_tuple = item.get_move()
+            point = None
+            if color is not None:
+                if move_tuple is not None:
+                    row, col = move_tuple
+                    point = Point(row + 1, col + 1)
+                    move = Move.play(point)
+                else:
+                    move = Move.pass_turn()
+                if first_move_done and point is not None:
+                    yield game_state, point
+                game_state = game_state.apply_move(move)
+                first_move_done = True
+
+    @staticmethod
+    def save_chunk(feature_file, label_file, features, labels):
+        np.save(feature_file, features)
+        np.save(label_file, labels)
 
     def consolidate_games(self, name, samples):
         files_needed = set(file_name for file_name, index in samples)
@@ -246,19 +244,18 @@ class GoDataProcessor:
 
         return features, labels
 
-    @staticmethod
-    def get_handicap(sgf):
-        go_board = Board(19, 19)
+    def get_handicap(self, sgf):
+        go_board = self.goboard.Board(19, 19)
         first_move_done = False
         move = None
-        game_state = GameState.new_game(19)
+        game_state = self.goboard.GameState.new_game(19)
         if sgf.get_handicap() is not None and sgf.get_handicap() != 0:
             for setup in sgf.get_root().get_setup_stones():
                 for move in setup:
                     row, col = move
                     go_board.place_stone(Player.black, Point(row + 1, col + 1))
             first_move_done = True
-            game_state = GameState(go_board, Player.white, None, move)
+            game_state = self.goboard.GameState(go_board, Player.white, None, move)
         return game_state, first_move_done
 
     def map_to_workers(self, data_type, samples):
@@ -275,7 +272,8 @@ class GoDataProcessor:
             base_name = zip_name.replace('.tar.gz', '')
             data_file_name = base_name + data_type
             if not os.path.isfile(self.data_dir + '/' + data_file_name):
-                zips_to_process.append((self.__class__, self.encoder_string, zip_name,
+                zips_to_process.append((self.__class__, self.encoder_string, self.board_string,
+                                        self.chunk_size, self.feature_dtype.name, zip_name,
                                         data_file_name, indices_by_zip_name[zip_name]))
 
         cores = multiprocessing.cpu_count()
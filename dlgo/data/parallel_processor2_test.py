@@ -0,0 +1,81 @@
+import glob
+import io
+import os
+import shutil
+import tarfile
+import tempfile
+import unittest
+
+import numpy as np
+
+from dlgo.data.parallel_processor2 import GoDataProcessor
+from dlgo.goboard_fast import GameState, Move
+from dlgo.gotypes import Point
+
+GAMES = [
+    [Point(16, 4), Point(4, 16), Point(4, 4), Point(16, 16)],
+    [Point(10, 10), Point(10, 11), Point(11, 10)],
+]
+
+
+def sgf_game(points):
+    moves = ''.join(';%s[%s%s]' % ('BW'[i % 2], chr(ord('a') + point.col - 1), chr(ord('a') + 19 - point.row))
+                    for i, point in enumerate(points))
+    return '(;GM[1]FF[4]SZ[19]%s)' % moves
+
+
+class ProcessZipTest(unittest.TestCase):
+    def setUp(self):
+        self.data_dir = tempfile.mkdtemp()
+
+        # like the KGS archives: a directory entry first, then the games
+        with tarfile.open(os.path.join(self.data_dir, 'KGS-test.tar.gz'), 'w:gz') as archive:
+            directory = tarfile.TarInfo('kgs')
+            directory.type = tarfile.DIRTYPE
+            archive.addfile(directory)
+
+            members = [('kgs/a.sgf', sgf_game(GAMES[0])), ('kgs/b.sgf', sgf_game(GAMES[1])),
+                       ('kgs/readme.txt', 'not a game')]
+            for name, content in members:
+                data = content.encode('ascii')
+                info = tarfile.TarInfo(name)
+                info.size = len(data)
+                archive.addfile(info, io.BytesIO(data))
+
+    def tearDown(self):
+        shutil.rmtree(self.data_dir)
+
+    def load_chunks(self, kind):
+        files = glob.glob(os.path.join(self.data_dir, 'KGS-testtrain_%s_*.npy' % kind))
+        return [np.load(f) for f in sorted(files, key=lambda f: int(f[:-4].rsplit('_', 1)[1]))]
+
+    def test_chunks(self):
+        processor = GoDataProcessor(data_directory=self.data_dir, chunk_size=3)
+        # game a is drawn twice and comes before game b in the archive
+        processor.process_zip('KGS-test.tar.gz', 'KGS-testtrain', [1, 0, 0])
+
+        features = self.load_chunks('features')
+        labels = self.load_chunks('labels')
+
+        # the first move of a game has no position to learn from: 3 + 3 + 2 positions
+        self.assertEqual([3, 3, 2], [len(chunk) for chunk in features])
+        self.assertEqual([3, 3, 2], [len(chunk) for chunk in labels])
+
+        encoder = processor.encoder
+        expected = [encoder.encode_point(point) for point in GAMES[0][1:] * 2 + GAMES[1][1:]]
+        self.assertEqual(expected, np.concatenate(labels).tolist())
+
+        # both copies of game a are encoded the same, starting with the position after its first move
+        np.testing.assert_array_equal(features[0], features[1])
+        after_first_move = GameState.new_game(19).apply_move(Move.play(GAMES[0][0]))
+        np.testing.assert_array_equal(encoder.encode(after_first_move), features[0][0])
+
+    def test_not_a_game(self):
+        processor = GoDataProcessor(data_directory=self.data_dir)
+
+        with self.assertRaises(ValueError):
+            processor.process_zip('KGS-test.tar.gz', 'KGS-testtrain', [2])
+
+
+if __name__ == '__main__':
+    unittest.main()
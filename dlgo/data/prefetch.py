@@ -0,0 +1,138 @@
+"""Background batch loading for training.
+
+DataGenerator and PackedDataset produce their batches on the thread that
+runs the training steps, so every step waits for file reads, dtype casts and
+the one-hot expansion of the labels. A BatchPrefetcher hands that work to a
+few worker threads that keep a bounded queue of finished float32 batches
+ahead of the training loop. The reads and copies run in numpy and release the
+GIL, so threads are enough and the memory maps are shared.
+
+Every epoch the prefetcher draws a permutation of all positions from
+(seed, epoch), so the batches mix positions of every file and archive and the
+same seed always gives the same batches in the same order, however many
+workers there are.
+"""
+
+import queue
+import threading
+
+import numpy as np
+
+__all__ = [
+    'BatchPrefetcher',
+]
+
+
+class BatchPrefetcher:
+    """Prefetches batches of a dataset with len() and take(indices, num_classes).
+
+    Both DataGenerator and PackedDataset qualify. generate and
+    get_num_samples work like DataGenerator's, so a prefetcher can be passed
+    to fit_generator in place of the dataset.
+    """
+    def __init__(self, dataset, batch_size=128, num_classes=19 * 19, num_workers=2,
+                 max_queued_batches=8, shuffle=True, seed=0):
+        self.dataset = dataset
+        self.batch_size = batch_size
+        self.num_classes = num_classes
+        self.num_workers = num_workers
+        self.max_queued_batches = max_queued_batches
+        self.shuffle = shuffle
+        self.seed = seed
+
+        self._stop = threading.Event()
+        self._threads = []
+        self._queues = []
+
+    def __len__(self):
+        # number of batches per epoch
+        return len(self.dataset) // self.batch_size
+
+    def get_num_samples(self, batch_size=None, num_classes=None):
+        return len(self) * self.batch_size
+
+    def epoch_batches(self, epoch):
+        """The sorted indices of every batch of an epoch."""
+        num_samples = len(self) * self.batch_size
+        if self.shuffle:
+            order = np.random.RandomState([self.seed, epoch]).permutation(len(self.dataset))[:num_samples]
+        else:
+            order = np.arange(num_samples)
+
+        # sorted indices read each file front to back, which leaves the batch contents the same
+        return [np.sort(batch) for batch in order.reshape(-1, self.batch_size)]
+
+    def generate(self, batch_size=None, num_classes=None):
+        """Yields (features, one-hot labels) batches forever, epoch after epoch."""
+        if len(self) == 0:
+            raise ValueError('the dataset has fewer positions than one batch')
+
+        self.start()
+        batch = 0
+        while True:
+            item = self._next(batch % self.num_workers)
+            if isinstance(item, BaseException):
+                self.close()
+                raise item
+            batch += 1
+            yield item
+
+    def _next(self, worker):
+        # batches are spread over the workers in turn, so taking them in turn keeps them in order
+        while True:
+            try:
+                return self._queues[worker].get(timeout=0.1)
+            except queue.Empty:
+                if not self._threads[worker].is_alive():
+                    raise RuntimeError('prefetch worker {} stopped'.format(worker))
+
+    def start(self):
+        if self._threads:
+            return
+
+        self._stop.clear()
+        per_worker = max(1, self.max_queued_batches // self.num_workers)
+        self._queues = [queue.Queue(maxsize=per_worker) for _ in range(self.num_workers)]
+        self._threads = [threading.Thread(target=self._work, args=(worker,), daemon=True)
+                         for worker in range(self.num_workers)]
+        for thread in self._threads:
+            thread.start()
+
+    def close(self):
+        self._stop.set()
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+        self._queues = []
+
+    def _work(self, worker):
+        out = self._queues[worker]
+        position = 0
+        epoch = 0
+        try:
+            while not self._stop.is_set():
+                batches = self.epoch_batches(epoch)
+                # worker w loads batches w, w + num_workers, ... of the endless sequence of batches
+                for index in range(len(batches)):
+                    if (position + index) % self.num_workers == worker:
+                        if not self._put(out, self.dataset.take(batches[index], self.num_classes)):
+                            return
+                position += len(batches)
+                epoch += 1
+        except Exception as e:
+            self._put(out, e)
+
+    def _put(self, out, item):
+        while not self._stop.is_set():
+            try:
+                out.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
@@ -0,0 +1,69 @@
+import itertools
+import unittest
+
+import numpy as np
+
+from dlgo.data.packed import one_hot
+from dlgo.data.prefetch import BatchPrefetcher
+
+
+class ArrayDataset:
+    def __init__(self, num_samples):
+        self.features = np.arange(num_samples, dtype=np.float32).reshape(-1, 1, 1, 1)
+        self.labels = np.arange(num_samples) % 9
+
+    def __len__(self):
+        return len(self.labels)
+
+    def take(self, indices, num_classes):
+        return self.features[indices], one_hot(self.labels[indices], num_classes)
+
+
+def first_batches(prefetcher, num_batches):
+    with prefetcher:
+        return [x.ravel().tolist() for x, _ in itertools.islice(prefetcher.generate(), num_batches)]
+
+
+class BatchPrefetcherTest(unittest.TestCase):
+    def test_epochs(self):
+        prefetcher = BatchPrefetcher(ArrayDataset(50), batch_size=8, num_classes=9, num_workers=3, seed=1)
+
+        self.assertEqual(48, prefetcher.get_num_samples())
+        batches = first_batches(prefetcher, 12)
+
+        # every epoch has 6 batches of distinct positions, shuffled differently
+        first_epoch = sum(batches[:6], [])
+        second_epoch = sum(batches[6:], [])
+        self.assertEqual(48, len(set(first_epoch)))
+        self.assertEqual(48, len(set(second_epoch)))
+        self.assertNotEqual(first_epoch, second_epoch)
+
+    def test_deterministic(self):
+        def batches(num_workers, seed):
+            prefetcher = BatchPrefetcher(ArrayDataset(50), batch_size=8, num_classes=9,
+                                         num_workers=num_workers, max_queued_batches=2, seed=seed)
+            return first_batches(prefetcher, 10)
+
+        self.assertEqual(batches(1, 3), batches(4, 3))
+        self.assertNotEqual(batches(2, 3), batches(2, 4))
+
+    def test_labels(self):
+        prefetcher = BatchPrefetcher(ArrayDataset(20), batch_size=5, num_classes=9, shuffle=False)
+        with prefetcher:
+            x, y = next(prefetcher.generate())
+
+        np.testing.assert_array_equal([0, 1, 2, 3, 4], x.ravel())
+        np.testing.assert_array_equal(one_hot(np.arange(5), 9), y)
+
+    def test_worker_error(self):
+        dataset = ArrayDataset(20)
+        dataset.features = dataset.features[:4]  # take() fails from the third batch on
+
+        prefetcher = BatchPrefetcher(dataset, batch_size=2, num_classes=9, num_workers=2, shuffle=False)
+        with self.assertRaises(IndexError):
+            for _ in itertools.islice(prefetcher.generate(), 5):
+                pass
+
+
+if __name__ == '__main__':
+    unittest.main()
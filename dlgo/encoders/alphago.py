@@ -1,8 +1,8 @@
 from dlgo.encoders.base import Encoder
-from dlgo.encoders.encoder_utils import is_ladder_escape, is_ladder_capture
-from dlgo.gotypes import Point, Player
+from dlgo.encoders.encoder_utils import LadderReader
+from dlgo.gotypes import Point
 from dlgo.goboard_fast import Move
-from dlgo.agent.helpers_fast import is_point_an_eye
+from dlgo import goboard_array
 import numpy as np
 
 """
@@ -42,9 +42,10 @@ def offset(feature):
 
 # 13.1.2
 class AlphaGoEncoder(Encoder):
-    def __init__(self, board_size=(19, 19), use_player_plane=True):
+    def __init__(self, board_size=(19, 19), use_player_plane=True, ladder_nodes=2000):
         self.board_width, self.board_height = board_size
         self.use_player_plane = use_player_plane
+        self.ladder_nodes = ladder_nodes
         self.num_planes = 48 + use_player_plane
 
     def name(self):
@@ -52,68 +53,86 @@ class AlphaGoEncoder(Encoder):
 
     def encode(self, game_state):
         board_tensor = np.zeros((self.num_planes, self.board_height, self.board_width))
-        for r in range(self.board_height):
-            for c in range(self.board_width):
-                point = Point(row=r + 1, col=c + 1)
+        self.encode_into(game_state, board_tensor)
+        return board_tensor
 
-                go_string = game_state.board.get_go_string(point)
-                if go_string and go_string.color == game_state.next_player:
-                    board_tensor[offset("stone_color")][r][c] = 1
-                elif go_string and go_string.color == game_state.next_player.other:
-                    board_tensor[offset("stone_color") + 1][r][c] = 1
-                else:
-                    board_tensor[offset("stone_color") + 2][r][c] = 1
-
-                board_tensor[offset("ones")] = self.ones()
-                board_tensor[offset("zeros")] = self.zeros()
-
-                if not is_point_an_eye(game_state.board, point, game_state.next_player):
-                    board_tensor[offset("sensibleness")][r][c] = 1
-
-                ages = int(min(game_state.board.move_ages.get(r, c), 8))
-                if ages > 0:
-                    # print(ages)
-                    board_tensor[offset("turns_since") + ages][r][c] = 1
-
-                if game_state.board.get_go_string(point):
-                    liberties = int(min(game_state.board.get_go_string(point).num_liberties, 8))
-                    board_tensor[offset("liberties") + liberties][r][c] = 1
-
-                move = Move(point)
-                if game_state.is_valid_move(move):
-                    new_state = game_state.apply_move(move)
-                    liberties = int(min(new_state.board.get_go_string(point).num_liberties, 8))
-                    board_tensor[offset("liberties_after") + liberties][r][c] = 1
-
-                    adjacent_strings = [game_state.board.get_go_string(nb)
-                                        for nb in point.neighbors()]
-                    capture_count = 0
-                    for go_string in adjacent_strings:
-                        other_player = game_state.next_player.other
-                        if go_string and go_string.num_liberties == 1 and go_string.color == other_player:
-                            capture_count += len(go_string.stones)
-                    capture_count = int(min(capture_count, 8))
-                    board_tensor[offset("capture_size") + capture_count][r][c] = 1
-
-                if go_string and go_string.num_liberties == 1:
-                    go_string = game_state.board.get_go_string(point)
-                    if go_string:
-                        num_atari_stones = int(min(len(go_string.stones), 8))
-                        board_tensor[offset("self_atari_size") + num_atari_stones][r][c] = 1
-
-                if is_ladder_capture(game_state, point):
-                    board_tensor[offset("ladder_capture")][r][c] = 1
-
-                if is_ladder_escape(game_state, point):
-                    board_tensor[offset("ladder_escape")][r][c] = 1
-
-                if self.use_player_plane:
-                    if game_state.next_player == Player.black:
-                        board_tensor[offset("ones")] = self.ones()
-                    else:
-                        board_tensor[offset("zeros")] = self.zeros()
+    def encode_into(self, game_state, board_tensor):
+        player = game_state.next_player
 
-        return board_tensor
+        # the array board hashes positions like goboard_fast, so ko checks on it agree with game_state
+        array_state = goboard_array.GameState.from_game_state(game_state)
+        board = array_state.board
+        colors, liberties, sizes = board.point_arrays()
+        empty = colors == goboard_array.EMPTY
+        stones = ~empty
+
+        board_tensor[offset("stone_color")][colors == player.value] = 1
+        board_tensor[offset("stone_color") + 1][colors == player.other.value] = 1
+        board_tensor[offset("stone_color") + 2][empty] = 1
+
+        board_tensor[offset("ones")] = self.ones()
+        board_tensor[offset("sensibleness")][~self.eyes(colors, player.value)] = 1
+
+        # planes are picked by value below, values past a feature's 8 planes spill into the next feature's
+        ages = np.minimum(game_state.board.move_ages.ages(), 8)
+        rows, cols = np.nonzero(ages > 0)
+        board_tensor[offset("turns_since") + ages[rows, cols], rows, cols] = 1
+
+        rows, cols = np.nonzero(stones)
+        board_tensor[offset("liberties") + np.minimum(liberties[rows, cols], 8), rows, cols] = 1
+
+        rows, cols = np.nonzero(stones & (liberties == 1))
+        board_tensor[offset("self_atari_size") + np.minimum(sizes[rows, cols], 8), rows, cols] = 1
+
+        if not game_state.is_over():
+            # stones an opponent string in atari adds to a capture, once for every side it touches the point
+            atari_sizes = np.where((colors == player.other.value) & (liberties == 1), sizes, 0)
+            capture_counts = np.minimum(self.neighbor_sums(atari_sizes), 8)
+
+            for r, c in zip(*np.nonzero(empty)):
+                point = Point(row=r + 1, col=c + 1)
+                move = Move.play(point)
+                if board.is_self_capture(player, point) or array_state.does_move_violate_ko(player, move):
+                    continue
+
+                liberties_after = min(board.liberties_after(player, point), 8)
+                board_tensor[offset("liberties_after") + liberties_after][r][c] = 1
+                board_tensor[offset("capture_size") + capture_counts[r, c]][r][c] = 1
+
+            # ladders are read once for the whole board, starting from the strings with one or two liberties
+            capture, escape = LadderReader(array_state, self.ladder_nodes).planes()
+            board_tensor[offset("ladder_capture")][capture] = 1
+            board_tensor[offset("ladder_escape")][escape] = 1
+
+        # the current player plane, when there is one, has always been left at zero
+
+    @staticmethod
+    def eyes(colors, color):
+        """Marks the points that is_point_an_eye would call an eye of color."""
+        padded = np.pad(colors, 1, constant_values=goboard_array.BORDER)
+        height, width = colors.shape
+
+        def shifted(dr, dc):
+            return padded[1 + dr:1 + dr + height, 1 + dc:1 + dc + width]
+
+        friendly_neighbors = np.ones(colors.shape, dtype=bool)
+        for dr, dc in ((-1, 0), (1, 0), (0, -1), (0, 1)):
+            neighbor = shifted(dr, dc)
+            friendly_neighbors &= (neighbor == color) | (neighbor == goboard_array.BORDER)
+
+        corners = [shifted(dr, dc) for dr, dc in ((-1, -1), (-1, 1), (1, -1), (1, 1))]
+        friendly_corners = sum((corner == color).astype(int) for corner in corners)
+        off_board_corners = sum((corner == goboard_array.BORDER).astype(int) for corner in corners)
+        controls_corners = np.where(off_board_corners > 0,
+                                    off_board_corners + friendly_corners == 4,
+                                    friendly_corners >= 3)
+
+        return (colors == goboard_array.EMPTY) & friendly_neighbors & controls_corners
+
+    @staticmethod
+    def neighbor_sums(values):
+        padded = np.pad(values, 1)
+        return padded[:-2, 1:-1] + padded[2:, 1:-1] + padded[1:-1, :-2] + padded[1:-1, 2:]
 
     def ones(self):
         return np.ones((1, self.board_height, self.board_width))
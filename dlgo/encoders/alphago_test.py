@@ -1,8 +1,11 @@
+import random
 import unittest
 
+import numpy as np
+
 from dlgo.goboard_fast import Board, GameState, Move
 from dlgo.gotypes import Player, Point
-from dlgo.encoders.alphago import AlphaGoEncoder
+from dlgo.encoders.alphago import AlphaGoEncoder, offset
 
 
 class AlphaGoEncoderTest(unittest.TestCase):
@@ -19,6 +22,49 @@ class AlphaGoEncoderTest(unittest.TestCase):
         self.assertEquals(alphago.num_planes, 49)
         self.assertEquals(alphago.shape(), (49, 19, 19))
 
+    def test_encode_batch(self):
+        encoder = AlphaGoEncoder((9, 9))
+        start = GameState.new_game(9)
+        states = [start, start.apply_move(Move.play(Point(3, 3)))]
+
+        batch = encoder.encode_batch(states)
+
+        self.assertEqual((2, 49, 9, 9), batch.shape)
+        self.assertEqual(np.float32, batch.dtype)
+        for board_tensor, game_state in zip(batch, states):
+            np.testing.assert_array_equal(encoder.encode(game_state), board_tensor)
+
+        out = np.ones((3, 49, 9, 9), dtype=np.float32)
+        self.assertEqual(2, len(encoder.encode_batch(states, out)))
+        np.testing.assert_array_equal(batch, out[:2])
+
+    def test_move_planes_match_playing_the_move(self):
+        random.seed(7)
+        encoder = AlphaGoEncoder((9, 9))
+        game_state = GameState.new_game(9)
+
+        for _ in range(60):
+            board_tensor = encoder.encode(game_state)
+
+            for row in range(1, 10):
+                for col in range(1, 10):
+                    move = Move.play(Point(row, col))
+                    planes = board_tensor[:, row - 1, col - 1]
+                    if not game_state.is_valid_move(move):
+                        continue
+
+                    next_state = game_state.apply_move(move)
+                    liberties = min(next_state.board.get_go_string(move.point).num_liberties, 8)
+                    captured = min(sum(len(game_state.board.get_go_string(nb).stones)
+                                       for nb in move.point.neighbors()
+                                       if game_state.board.get(nb) == game_state.next_player.other and
+                                       game_state.board.get_go_string(nb).num_liberties == 1), 8)
+                    self.assertEqual(1, planes[offset("liberties_after") + liberties])
+                    self.assertEqual(1, planes[offset("capture_size") + captured])
+
+            plays = [move for move in game_state.legal_moves() if move.is_play]
+            game_state = game_state.apply_move(random.choice(plays))
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -1,6 +1,8 @@
 # 6.1 and 6.2
 import importlib
 
+import numpy as np
+
 
 class Encoder:
 
@@ -12,6 +14,24 @@ class Encoder:
     def encode(self, game_state):
         raise NotImplementedError
 
+    # Writes the encoding of a GO board into board_tensor, which has to be all zeros
+    def encode_into(self, game_state, board_tensor):
+        board_tensor[...] = self.encode(game_state)
+
+    # Encodes several GO boards into one float32 array of shape (N, planes, height, width),
+    # or into the first N entries of out, which can be reused between calls
+    def encode_batch(self, game_states, out=None):
+        if out is None:
+            out = np.zeros((len(game_states),) + tuple(self.shape()), dtype=np.float32)
+        else:
+            out = out[:len(game_states)]
+            out.fill(0)
+
+        for board_tensor, game_state in zip(out, game_states):
+            self.encode_into(game_state, board_tensor)
+
+        return out
+
     # Turns a GO board into an integer index (-1, 0, 1)
     def encode_point(self, point):
         raise NotImplementedError
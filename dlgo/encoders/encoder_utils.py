@@ -1,110 +1,192 @@
-from dlgo.goboard import Move
-
-
-def is_ladder_capture(game_state,
-                      candidate,
-                      recursion_depth=50):
-
-    return is_ladder(True,
-                     game_state,
-                     candidate,
-                     None,
-                     recursion_depth)
-
-
-def is_ladder_escape(game_state,
-                     candidate,
-                     recursion_depth=50):
-
-    return is_ladder(False,
-                     game_state,
-                     candidate,
-                     None,
-                     recursion_depth)
-
-
-def is_ladder(try_capture,
-              game_state,
-              candidate,
-              ladder_stones=None,
-              recursion_depth=50):
-
-    if not game_state.is_valid_move(Move(candidate)) or not recursion_depth:
-        return False
-
-    next_player = game_state.next_player
-    capture_player = next_player if try_capture else next_player.other
-    escape_player = capture_player.other
-
-    if ladder_stones is None:
-        ladder_stones = guess_ladder_stones(game_state, candidate, escape_player)
-
-    for ladder_stone in ladder_stones:
-        current_state = game_state.apply_move(candidate)
-
-        if try_capture:
-            candidates = determine_escape_candidates(
-                game_state, ladder_stone, capture_player)
-            attempted_escapes = [  # now try to escape
-                is_ladder(False, current_state, escape_candidate,
-                          ladder_stone, recursion_depth - 1)
-                for escape_candidate in candidates]
-
-            if not any(attempted_escapes):
-                return True  # if at least one escape fails, we capture
-        else:
-            if count_liberties(current_state, ladder_stone) >= 3:
-                return True  # successful escape
-            if count_liberties(current_state, ladder_stone) == 1:
-                continue  # failed escape, others might still do
-            candidates = liberties(current_state, ladder_stone)
-            attempted_captures = [  # now try to capture
-                is_ladder(True, current_state, capture_candidate,
-                          ladder_stone, recursion_depth - 1)
-                for capture_candidate in candidates]
-            if any(attempted_captures):
-                continue  # failed escape, try others
-            return True  # candidate can't be caught in a ladder, escape.
-    return False  # no captures / no escapes
-
-
-def is_candidate(game_state, move, player):
-    return game_state.next_player == player and \
-        count_liberties(game_state, move) == 2
-
-
-def guess_ladder_stones(game_state, move, escape_player):
-    adjacent_strings = [game_state.board.get_go_string(nb)
-                        for nb in move.neighbors()
-                        if game_state.board.get_go_string(nb)]
-    if adjacent_strings:
-        neighbors = []
-        for string in adjacent_strings:
-            stones = string.stones
-            for stone in stones:
-                neighbors.append(stone)
-        return [Move(nb) for nb in neighbors if is_candidate(game_state, Move(nb), escape_player)]
-    else:
-        return []
-
-
-def determine_escape_candidates(game_state, move, capture_player):
-    escape_candidates = move.neighbors()
-    for other_ladder_stone in game_state.board.get_go_string(move).stones:
-        for neighbor in other_ladder_stone.neighbors():
-            right_color = game_state.color(neighbor) == capture_player
-            one_liberty = count_liberties(game_state, neighbor) == 1
-            if right_color and one_liberty:
-                escape_candidates.append(liberties(game_state, neighbor))
-    return escape_candidates
-
-
-def count_liberties(game_state, move):
-    if game_state.board.get_go_string(move):
-        return game_state.board.get_go_string(move).num_liberties
-    else:
-        return 0
-
-
-def liberties(game_state, move):
-    return list(game_state.board.get_go_string(move).liberties)
+import numpy as np
+
+from dlgo.goboard_fast import Move
+from dlgo.gotypes import Point
+from dlgo import goboard_array
+
+
+def is_ladder_capture(game_state, point, max_nodes=2000):
+    # whether the player to move catches an opponent string in a ladder by playing point
+    capture, _ = ladder_planes(game_state, max_nodes)
+    return bool(capture[point.row - 1, point.col - 1])
+
+
+def is_ladder_escape(game_state, point, max_nodes=2000):
+    # whether the player to move gets a string in atari out of a ladder by playing point
+    _, escape = ladder_planes(game_state, max_nodes)
+    return bool(escape[point.row - 1, point.col - 1])
+
+
+class LadderBudgetExceeded(Exception):
+    pass
+
+
+class LadderReader:
+    """Reads ladders on an array game state, playing and taking back moves in place.
+
+    planes() returns two boolean (num_rows, num_cols) arrays for the player to
+    move: the points that catch an opponent string with two liberties in a
+    ladder, and the points that get one of the player's strings in atari out of
+    one. Each string's ladder may play at most max_nodes moves, strings that
+    need more count as neither caught nor escaping.
+
+    Results are memoised per string and position, so a reader can be reused
+    for several positions of the same game. The memo ignores the history of
+    the game, which only matters when a ko comes up in the middle of a ladder.
+    """
+    def __init__(self, game_state, max_nodes=2000):
+        self.game_state = game_state
+        self.max_nodes = max_nodes
+        self.nodes = 0
+        self.exhausted = 0
+        self._budget = 0
+        self._cache = {}
+
+    def planes(self, game_state=None):
+        if game_state is not None:
+            self.game_state = game_state
+        state = self.game_state
+        board = state.board
+        player = state.next_player
+
+        colors, liberties, _ = board.point_arrays()
+        capture = np.zeros(colors.shape, dtype=bool)
+        escape = np.zeros(colors.shape, dtype=bool)
+
+        for stone, string in self._strings(colors, liberties, player.other.value, 2):
+            for liberty in sorted(string.liberties):
+                if self._read(self._atari_works, stone, liberty):
+                    capture[liberty.row - 1, liberty.col - 1] = True
+
+        for stone, string in self._strings(colors, liberties, player.value, 1):
+            for candidate in self._escape_candidates(stone, string):
+                if self._read(self._extension_escapes, stone, candidate):
+                    escape[candidate.row - 1, candidate.col - 1] = True
+
+        return capture, escape
+
+    def _strings(self, colors, liberties, color, num_liberties):
+        # one stone and the string view for every string of color with num_liberties liberties
+        board = self.game_state.board
+        seen = set()
+        for r, c in zip(*np.nonzero((colors == color) & (liberties == num_liberties))):
+            stone = Point(row=r + 1, col=c + 1)
+            if stone in seen:
+                continue
+            string = board.get_go_string(stone)
+            seen.update(string.stones)
+            yield stone, string
+
+    def _read(self, reader, stone, point):
+        self._budget = self.max_nodes
+        try:
+            return reader(stone, point)
+        except LadderBudgetExceeded:
+            self.exhausted += 1
+            return False
+
+    def _play(self, point):
+        move = Move.play(point)
+        if not self.game_state.is_valid_move(move):
+            return False
+
+        if self._budget <= 0:
+            raise LadderBudgetExceeded()
+        self._budget -= 1
+        self.nodes += 1
+
+        self.game_state.play(move)
+        return True
+
+    def _memoised(self, kind, stone, read):
+        state = self.game_state
+        string = state.board.get_go_string(stone)
+        key = kind, state.board.zobrist_hash(), state.next_player, min(string.stones)
+
+        result = self._cache.get(key)
+        if result is None:
+            result = self._cache[key] = read(string)
+
+        return result
+
+    def _atari_works(self, stone, point):
+        # the attacker plays point, leaving the string at stone with one liberty
+        if not self._play(point):
+            return False
+        try:
+            return self._escape_fails(stone)
+        finally:
+            self.game_state.undo()
+
+    def _extension_escapes(self, stone, point):
+        # the defender plays point to get the string at stone out of atari
+        if not self._play(point):
+            return False
+        try:
+            num_liberties = self.game_state.board.num_liberties(stone)
+            if num_liberties >= 3:
+                return True
+            return num_liberties == 2 and not self._capture_works(stone)
+        finally:
+            self.game_state.undo()
+
+    def _escape_fails(self, stone):
+        # defender to move, the string at stone is in atari
+        return self._memoised('escape', stone, lambda string: not any(
+            self._extension_escapes(stone, candidate)
+            for candidate in self._escape_candidates(stone, string)))
+
+    def _capture_works(self, stone):
+        # attacker to move, the string at stone has two liberties
+        return self._memoised('capture', stone, lambda string: any(
+            self._atari_works(stone, liberty) for liberty in sorted(string.liberties)))
+
+    def _escape_candidates(self, stone, string):
+        # extending from the last liberty, or capturing an attacker string in atari next to the string
+        board = self.game_state.board
+        candidates = sorted(string.liberties)
+        stones = string.stones
+        for ladder_stone in stones:
+            for neighbor in board.neighbors(ladder_stone):
+                # empty points have no liberties, so this only finds attacker strings in atari
+                if neighbor not in stones and board.num_liberties(neighbor) == 1:
+                    for liberty in board.get_go_string(neighbor).liberties:
+                        if liberty not in candidates:
+                            candidates.append(liberty)
+
+        return candidates
+
+
+def ladder_planes(game_state, max_nodes=2000):
+    # ladder capture and ladder escape points of the player to move, see LadderReader
+    if not isinstance(game_state, goboard_array.GameState):
+        game_state = goboard_array.GameState.from_game_state(game_state)
+
+    return LadderReader(game_state, max_nodes).planes()
+
+
+def stone_colors(board):
+    # colour value of every point as a (num_rows, num_cols) array, 0 on empty points
+    if isinstance(board, goboard_array.Board):
+        return board.point_arrays()[0]
+
+    colors = np.zeros((board.num_rows, board.num_cols), dtype=np.int8)
+    for row in range(board.num_rows):
+        for col in range(board.num_cols):
+            player = board.get(Point(row=row + 1, col=col + 1))
+            if player is not None:
+                colors[row, col] = player.value
+
+    return colors
+
+
+def ko_points(array_state):
+    # marks the empty points where a stone of the player to move would repeat an earlier position,
+    # array_state is a goboard_array.GameState, which checks this without playing the stone
+    board = array_state.board
+    ko = np.zeros((board.num_rows, board.num_cols), dtype=bool)
+
+    for point in array_state.ko_points():
+        ko[point.row - 1, point.col - 1] = True
+
+    return ko
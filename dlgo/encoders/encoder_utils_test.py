@@ -0,0 +1,60 @@
+import unittest
+
+from dlgo import goboard_array
+from dlgo.goboard_fast import Board, GameState, Move
+from dlgo.gotypes import Player, Point
+from dlgo.encoders.encoder_utils import LadderReader, is_ladder_capture, is_ladder_escape, ladder_planes
+
+
+def ladder_position(next_player, breaker=None, atari=False):
+    # a white stone that black can chase up and to the right across the board
+    board = Board(9, 9)
+    board.place_stone(Player.white, Point(3, 3))
+    for point in (Point(2, 3), Point(2, 4), Point(3, 2)):
+        board.place_stone(Player.black, point)
+    if breaker is not None:
+        board.place_stone(Player.white, breaker)
+    if atari:
+        board.place_stone(Player.black, Point(4, 3))
+    return GameState(board, next_player, None, Move.play(Point(3, 2)))
+
+
+class LadderReaderTest(unittest.TestCase):
+    def test_ladder_capture(self):
+        game_state = ladder_position(Player.black)
+
+        self.assertTrue(is_ladder_capture(game_state, Point(4, 3)))
+        # an atari from the other side lets white out towards the middle
+        self.assertFalse(is_ladder_capture(game_state, Point(3, 4)))
+
+    def test_ladder_breaker(self):
+        game_state = ladder_position(Player.black, breaker=Point(8, 8))
+
+        self.assertFalse(is_ladder_capture(game_state, Point(4, 3)))
+
+    def test_ladder_escape(self):
+        self.assertFalse(is_ladder_escape(ladder_position(Player.white, atari=True), Point(3, 4)))
+
+        game_state = ladder_position(Player.white, breaker=Point(8, 8), atari=True)
+        self.assertTrue(is_ladder_escape(game_state, Point(3, 4)))
+
+    def test_planes(self):
+        capture, escape = ladder_planes(ladder_position(Player.black))
+
+        self.assertEqual((9, 9), capture.shape)
+        self.assertEqual([(3, 2)], list(zip(*capture.nonzero())))
+        self.assertFalse(escape.any())
+
+    def test_node_budget(self):
+        array_state = goboard_array.GameState.from_game_state(ladder_position(Player.black))
+        reader = LadderReader(array_state, max_nodes=5)
+
+        capture, _ = reader.planes()
+
+        self.assertFalse(capture.any())
+        self.assertGreater(reader.exhausted, 0)
+        self.assertEqual(array_state.board, goboard_array.GameState.from_game_state(ladder_position(Player.black)).board)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,134 @@
+"""Incremental encoding of a game trajectory.
+
+Encoding a position from scratch walks every string on the board, even though
+a move only changes the string it joins, the strings next to it and whatever
+it captures. An IncrementalEncoder keeps the stone and liberty arrays of the
+last position it encoded and, when it is handed the next position of the same
+game, plays the move on an array board and only refreshes the points of the
+strings the move touched. The ko plane depends on the whole history and is
+recomputed every move, which the array board does without playing any stones.
+
+It wraps any encoder that implements encode_arrays (oneplane, sevenplane and
+the zero encoder) and gives exactly the same planes as encoder.encode. Positions
+that don't follow the last encoded one within a few moves start a new trajectory.
+"""
+
+import numpy as np
+
+from dlgo import goboard_array
+
+__all__ = [
+    'IncrementalEncoder',
+]
+
+
+class IncrementalEncoder:
+    # passes and skipped positions in SGF files are replayed rather than rebuilding the board
+    max_catch_up = 16
+
+    def __init__(self, encoder):
+        self.encoder = encoder
+        self.rebuilds = 0
+
+        self._last_state = None
+        self._array_state = None
+        self._colors = None
+        self._liberties = None
+
+    @staticmethod
+    def supports(encoder):
+        return hasattr(encoder, 'encode_arrays')
+
+    def name(self):
+        return self.encoder.name()
+
+    def shape(self):
+        return self.encoder.shape()
+
+    def encode(self, game_state):
+        board_tensor = np.zeros(self.encoder.shape())
+        self.encode_into(game_state, board_tensor)
+        return board_tensor
+
+    def encode_into(self, game_state, board_tensor):
+        if game_state is not self._last_state:
+            self._move_to(game_state)
+
+        ko = self._array_state.ko_points()
+        ko_plane = np.zeros(self._colors.shape, dtype=bool)
+        for point in ko:
+            ko_plane[point.row - 1, point.col - 1] = True
+
+        self.encoder.encode_arrays(board_tensor, game_state.next_player, self._colors, self._liberties, ko_plane)
+
+    def reset(self):
+        self._last_state = None
+        self._array_state = None
+
+    def _move_to(self, game_state):
+        moves = []
+        state = game_state
+        while state is not None and state is not self._last_state and len(moves) < self.max_catch_up:
+            moves.append(state.last_move)
+            state = state.previous_state
+
+        if self._last_state is not None and state is self._last_state:
+            for move in reversed(moves):
+                self._play(move)
+        else:
+            self._rebuild(game_state)
+
+        self._last_state = game_state
+
+    def _rebuild(self, game_state):
+        self.rebuilds += 1
+        self._array_state = goboard_array.GameState.from_game_state(game_state)
+        self._colors, self._liberties, _ = self._array_state.board.point_arrays()
+
+    def _play(self, move):
+        array_state = self._array_state
+        board = array_state.board
+
+        if not move.is_play:
+            array_state.play(move)
+            return
+
+        point = move.point
+        opponent = array_state.next_player.other
+        captured = []
+        for neighbor in board.neighbors(point):
+            if board.get(neighbor) == opponent and board.num_liberties(neighbor) == 1:
+                captured.extend(board.get_go_string(neighbor).stones)
+
+        array_state.play(move)
+
+        # the new stone's string and its neighbours change their liberties,
+        # as do the strings that touched the captured stones
+        touched = [point]
+        touched.extend(board.neighbors(point))
+        for stone in captured:
+            touched.extend(board.neighbors(stone))
+
+        self._refresh(captured)
+        done = set(captured)
+        for pt in touched:
+            if pt in done or board.get(pt) is None:
+                continue
+            stones = board.get_go_string(pt).stones
+            done.update(stones)
+            self._refresh(stones)
+
+    def _refresh(self, points):
+        board = self._array_state.board
+        colors = self._colors
+        liberties = self._liberties
+
+        for point in points:
+            player = board.get(point)
+            r, c = point.row - 1, point.col - 1
+            if player is None:
+                colors[r, c] = 0
+                liberties[r, c] = 0
+            else:
+                colors[r, c] = player.value
+                liberties[r, c] = board.num_liberties(point)
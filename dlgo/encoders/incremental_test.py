@@ -0,0 +1,53 @@
+import random
+import unittest
+
+import numpy as np
+
+from dlgo.goboard_fast import GameState, Move
+from dlgo.gotypes import Point
+from dlgo.encoders.incremental import IncrementalEncoder
+from dlgo.encoders.oneplane import OnePlaneEncoder
+from dlgo.encoders.sevenplane import SevenPlaneEncoder
+
+
+def random_game(board_size, num_moves, seed):
+    rng = random.Random(seed)
+    game_state = GameState.new_game(board_size)
+    states = [game_state]
+    for _ in range(num_moves):
+        if game_state.is_over():
+            break
+        plays = [move for move in game_state.legal_moves() if move.is_play]
+        move = rng.choice(plays) if plays and rng.random() < 0.95 else Move.pass_turn()
+        game_state = game_state.apply_move(move)
+        states.append(game_state)
+    return states
+
+
+class IncrementalEncoderTest(unittest.TestCase):
+    def test_matches_full_encoding(self):
+        # long random games on a small board have plenty of captures and kos
+        states = random_game(5, 200, seed=3)
+
+        for encoder in (OnePlaneEncoder((5, 5)), SevenPlaneEncoder((5, 5))):
+            incremental = IncrementalEncoder(encoder)
+            for game_state in states:
+                np.testing.assert_array_equal(encoder.encode(game_state), incremental.encode(game_state))
+            self.assertEqual(1, incremental.rebuilds)
+
+    def test_skipped_and_unrelated_positions(self):
+        encoder = SevenPlaneEncoder((9, 9))
+        incremental = IncrementalEncoder(encoder)
+        states = random_game(9, 60, seed=5)
+
+        for game_state in states[::3]:
+            np.testing.assert_array_equal(encoder.encode(game_state), incremental.encode(game_state))
+        self.assertEqual(1, incremental.rebuilds)
+
+        other = GameState.new_game(9).apply_move(Move.play(Point(5, 5)))
+        np.testing.assert_array_equal(encoder.encode(other), incremental.encode(other))
+        self.assertEqual(2, incremental.rebuilds)
+
+
+if __name__ == '__main__':
+    unittest.main()
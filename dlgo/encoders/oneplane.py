@@ -3,6 +3,7 @@
 import numpy as np
 
 from dlgo.encoders.base import Encoder
+from dlgo.encoders.encoder_utils import stone_colors
 from dlgo.gotypes import Point
 
 
@@ -16,19 +17,16 @@ class OnePlaneEncoder(Encoder):
 
     def encode(self, game_state):
         board_matrix = np.zeros(self.shape())
-        next_player = game_state.next_player
-        for r in range(self.board_height):
-            for c in range(self.board_width):
-                p = Point(row=r+1, col=c+1)
-                go_string = game_state.board.get_go_string(p)
-                if go_string is None:
-                    continue
-                if go_string.color == next_player:
-                    board_matrix[0, r, c] = 1
-                else:
-                    board_matrix[0, r, c] = -1
+        self.encode_into(game_state, board_matrix)
         return board_matrix
 
+    def encode_into(self, game_state, board_matrix):
+        self.encode_arrays(board_matrix, game_state.next_player, stone_colors(game_state.board))
+
+    def encode_arrays(self, board_matrix, next_player, colors, liberties=None, ko=None):
+        board_matrix[0][colors == next_player.value] = 1
+        board_matrix[0][colors == next_player.other.value] = -1
+
     def encode_point(self, point):
         return self.board_width * (point.row - 1) + (point.col - 1)
 
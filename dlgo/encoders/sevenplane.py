@@ -3,8 +3,9 @@
 import numpy as np
 
 from dlgo.encoders.base import Encoder
-from dlgo.goboard import Move
+from dlgo.encoders.encoder_utils import ko_points
 from dlgo.gotypes import Point
+from dlgo import goboard_array
 
 
 class SevenPlaneEncoder(Encoder):
@@ -17,21 +18,24 @@ class SevenPlaneEncoder(Encoder):
 
     def encode(self, game_state):
         board_tensor = np.zeros(self.shape())
-        base_plane = {game_state.next_player: 0,
-                      game_state.next_player.other: 3}
-        for row in range(self.board_height):
-            for col in range(self.board_width):
-                p = Point(row=row+1, col=col+1)
-                go_string = game_state.board.get_go_string(p)
-                if go_string is None:
-                    if game_state.does_move_violate_ko(game_state.next_player, Move.play(p)):
-                        board_tensor[6][row][col] = 1
-                else:
-                    liberty_plane = min(3, go_string.num_liberties) - 1
-                    liberty_plane += base_plane[go_string.color]
-                    board_tensor[liberty_plane][row][col] = 1
+        self.encode_into(game_state, board_tensor)
         return board_tensor
 
+    def encode_into(self, game_state, board_tensor):
+        # the array board checks ko without playing every empty point
+        array_state = goboard_array.GameState.from_game_state(game_state)
+        colors, liberties, _ = array_state.board.point_arrays()
+        self.encode_arrays(board_tensor, game_state.next_player, colors, liberties, ko_points(array_state))
+
+    def encode_arrays(self, board_tensor, next_player, colors, liberties, ko):
+        base_plane = {next_player: 0,
+                      next_player.other: 3}
+        for player, base in base_plane.items():
+            rows, cols = np.nonzero(colors == player.value)
+            board_tensor[base + np.minimum(liberties[rows, cols], 3) - 1, rows, cols] = 1
+
+        board_tensor[6][ko] = 1
+
     def encode_point(self, point):
         return self.board_width * (point.row-1) + (point.col-1)
 
@@ -0,0 +1,189 @@
+"""Appending experience to HDF5 files.
+
+ExperienceBuffer.serialize writes one buffer into fresh datasets, so a
+self-play worker has to keep every game in memory until the end, and merging
+worker files means loading and concatenating all of them. An
+ExperienceWriter appends buffers, typically one game each, to resizable
+datasets in the layout load_experience reads (rl and zero alike). The
+datasets are chunked along the positions, about chunk_bytes per chunk, and
+can be compressed with 'gzip' or 'lzf'. The resizes and writes run on a
+background thread so self-play continues while a game is written.
+
+merge_experience combines the files of several workers either by streaming
+them block by block into one file or as a virtual dataset that refers to
+the worker files without copying them.
+"""
+
+import os
+import queue
+import threading
+
+import h5py
+import numpy as np
+
+__all__ = [
+    'ExperienceWriter',
+    'merge_experience',
+]
+
+FIELDS = ('states', 'actions', 'visit_counts', 'rewards', 'advantages')
+
+
+class ExperienceWriter:
+    """Appends experience buffers to the 'experience' group of an open HDF5 file.
+
+    While the writer is open it owns the file: use it again only after flush
+    or close. Appended arrays are written later and must not be modified.
+    """
+    def __init__(self, h5file, compression=None, compression_opts=None, chunk_bytes=1 << 20,
+                 background=True, max_pending=8):
+        self.group = h5file.require_group('experience')
+        self.compression = compression
+        self.compression_opts = compression_opts
+        self.chunk_bytes = chunk_bytes
+        self.num_rows = 0
+
+        self._error = None
+        self._thread = None
+        if background:
+            self._queue = queue.Queue(maxsize=max_pending)
+            self._thread = threading.Thread(target=self._work, daemon=True)
+            self._thread.start()
+
+    def append(self, buffer):
+        """Appends an ExperienceBuffer or ZeroExperienceBuffer."""
+        arrays = {name: getattr(buffer, name) for name in FIELDS if hasattr(buffer, name)}
+        constants = {}
+        if hasattr(buffer, 'board_size'):
+            constants['board_size'] = buffer.board_size
+        self.append_arrays(arrays, constants)
+
+    def append_arrays(self, arrays, constants=None):
+        """Appends the rows of arrays, a dict of equally long arrays by dataset name.
+
+        constants are scalars stored once, like the board size of zero experience.
+        """
+        self._check()
+        arrays = {name: np.asarray(array) for name, array in arrays.items()}
+        lengths = {len(array) for array in arrays.values()}
+        if len(lengths) > 1:
+            raise ValueError('experience arrays differ in length: {}'.format(sorted(lengths)))
+        self.num_rows += lengths.pop() if lengths else 0
+
+        if self._thread is None:
+            self._write(arrays, constants or {})
+        else:
+            self._queue.put((arrays, constants or {}))
+
+    def flush(self):
+        """Waits until every appended buffer is written."""
+        if self._thread is not None:
+            self._queue.join()
+        self._check()
+        self.group.file.flush()
+
+    def close(self):
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+        self._check()
+        self.group.file.flush()
+
+    def _check(self):
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+    def _work(self):
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    return
+                # after an error the rest is dropped, the next append or flush raises it
+                if self._error is None:
+                    self._write(*item)
+            except Exception as e:
+                self._error = e
+            finally:
+                self._queue.task_done()
+
+    def _write(self, arrays, constants):
+        for name, value in constants.items():
+            if name not in self.group:
+                self.group[name] = value
+
+        for name, array in arrays.items():
+            if len(array) == 0:
+                continue
+            if name not in self.group:
+                self._create(name, array)
+            dataset = self.group[name]
+            start = dataset.shape[0]
+            dataset.resize(start + len(array), axis=0)
+            dataset[start:] = array
+
+    def _create(self, name, array):
+        row_shape = array.shape[1:]
+        row_bytes = max(1, array.dtype.itemsize * int(np.prod(row_shape)))
+        chunk_rows = max(1, self.chunk_bytes // row_bytes)
+        self.group.create_dataset(name, shape=(0,) + row_shape, maxshape=(None,) + row_shape,
+                                  dtype=array.dtype, chunks=(chunk_rows,) + row_shape,
+                                  compression=self.compression, compression_opts=self.compression_opts)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def merge_experience(output_filename, filenames, virtual=False, compression=None, block_rows=4096):
+    """Combines the experience of several HDF5 files into output_filename.
+
+    By default the rows are copied block_rows at a time, so no file is ever
+    loaded whole. With virtual=True the output holds virtual datasets that
+    read from the input files, which then have to be kept.
+    """
+    with h5py.File(output_filename, 'w') as outf:
+        if virtual:
+            _merge_virtual(outf, filenames)
+            return
+
+        with ExperienceWriter(outf, compression=compression, background=False) as writer:
+            for filename in filenames:
+                with h5py.File(filename, 'r') as inf:
+                    experience = inf['experience']
+                    names = [name for name in FIELDS if name in experience]
+                    constants = {name: experience[name][()] for name in experience
+                                 if experience[name].shape == ()}
+                    num_rows = experience[names[0]].shape[0] if names else 0
+                    writer.append_arrays({}, constants)
+                    for start in range(0, num_rows, block_rows):
+                        writer.append_arrays({name: experience[name][start:start + block_rows] for name in names})
+
+
+def _merge_virtual(outf, filenames):
+    group = outf.create_group('experience')
+    sources = {}
+    for filename in filenames:
+        # absolute paths keep the output readable from any working directory
+        with h5py.File(os.path.abspath(filename), 'r') as inf:
+            experience = inf['experience']
+            for name in experience:
+                dataset = experience[name]
+                if dataset.shape == ():
+                    if name not in group:
+                        group[name] = dataset[()]
+                else:
+                    sources.setdefault(name, []).append(h5py.VirtualSource(dataset))
+
+    for name, parts in sources.items():
+        num_rows = sum(part.shape[0] for part in parts)
+        layout = h5py.VirtualLayout(shape=(num_rows,) + parts[0].shape[1:], dtype=parts[0].dtype)
+        start = 0
+        for part in parts:
+            layout[start:start + part.shape[0]] = part
+            start += part.shape[0]
+        group.create_virtual_dataset(name, layout)
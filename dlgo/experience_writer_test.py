@@ -0,0 +1,92 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import h5py
+import numpy as np
+
+from dlgo import rl
+from dlgo import zero
+from dlgo.experience_writer import ExperienceWriter, merge_experience
+
+
+def rl_game(num_states, first=0):
+    # rewards count the positions so they can be told apart
+    return rl.ExperienceBuffer(
+        states=np.random.rand(num_states, 1, 5, 5),
+        actions=np.arange(num_states) % 25,
+        rewards=np.arange(first, first + num_states),
+        advantages=np.ones(num_states))
+
+
+class ExperienceWriterTest(unittest.TestCase):
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def filename(self, name):
+        return os.path.join(self.path, name)
+
+    def write_games(self, filename, games, **kwargs):
+        with h5py.File(filename, 'w') as h5file:
+            with ExperienceWriter(h5file, **kwargs) as writer:
+                for game in games:
+                    writer.append(game)
+
+    def test_append(self):
+        games = [rl_game(7), rl_game(0), rl_game(5, first=7)]
+        self.write_games(self.filename('exp.h5'), games, compression='gzip', chunk_bytes=1000)
+
+        with h5py.File(self.filename('exp.h5'), 'r') as h5file:
+            self.assertEqual((5, 1, 5, 5), h5file['experience']['states'].chunks)
+            self.assertEqual('gzip', h5file['experience']['states'].compression)
+            experience = rl.load_experience(h5file)
+
+        np.testing.assert_array_equal(np.arange(12), experience.rewards)
+        np.testing.assert_array_equal(np.concatenate([games[0].states, games[2].states]), experience.states)
+
+    def test_zero_serialize_appends(self):
+        def game(num_states):
+            return zero.ZeroExperienceBuffer(np.zeros((num_states, 11, 5, 5)), np.ones((num_states, 26)),
+                                             np.full(num_states, num_states), 5)
+
+        with h5py.File(self.filename('zero.h5'), 'w') as h5file:
+            game(3).serialize(h5file)
+            game(2).serialize(h5file)
+        with h5py.File(self.filename('zero.h5'), 'r') as h5file:
+            experience = zero.load_experience(h5file)
+            self.assertEqual(5, experience.board_size[()])
+
+        np.testing.assert_array_equal([3, 3, 3, 2, 2], experience.rewards)
+        self.assertEqual((5, 26), experience.visit_counts.shape)
+
+    def test_merge(self):
+        filenames = [self.filename('worker%d.h5' % i) for i in range(3)]
+        for i, filename in enumerate(filenames):
+            self.write_games(filename, [rl_game(4, first=10 * i), rl_game(3, first=10 * i + 4)])
+
+        for virtual in (False, True):
+            merge_experience(self.filename('merged.h5'), filenames, virtual=virtual, block_rows=2)
+            with h5py.File(self.filename('merged.h5'), 'r') as h5file:
+                self.assertEqual(virtual, h5file['experience']['rewards'].is_virtual)
+                experience = rl.load_experience(h5file)
+
+            np.testing.assert_array_equal([10 * i + j for i in range(3) for j in range(7)], experience.rewards)
+            self.assertEqual((21, 1, 5, 5), experience.states.shape)
+
+    def test_error(self):
+        with h5py.File(self.filename('exp.h5'), 'w') as h5file:
+            writer = ExperienceWriter(h5file)
+            writer.append(rl_game(3))
+            # a game on a different board size cannot go into the same datasets
+            writer.append(rl.ExperienceBuffer(np.zeros((2, 1, 9, 9)), np.zeros(2), np.zeros(2), np.zeros(2)))
+            with self.assertRaises(Exception):
+                writer.flush()
+            writer.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,1051 @@
+"""Array-backed board engine.
+
+Points are stored as flat integer indices into a 1-D colour array padded
+with a one point border, so point (row, col) lives at row * stride + col
+where stride is num_cols + 1. Strings are circular linked lists threaded
+through _next, every stone records the index of its string's head in
+_head, and liberty counts and stone counts are kept per head and updated
+incrementally as stones are played and captured.
+
+make_move() and unmake_move() play and take back a stone in place. The
+delta returned by make_move only holds the captured strings, the previous
+hash and ko point and the ages of the captured stones; undoing rebuilds
+the handful of strings around the move from the colour array.
+"""
+
+import copy
+from array import array
+
+import numpy as np
+
+from dlgo.gotypes import Player, Point
+from dlgo.scoring import compute_game_result
+from dlgo import zobrist
+from dlgo import goboard_fast
+from dlgo.goboard_fast import Move, IllegalMoveError
+from .utils import MoveAge
+
+__all__ = ['Board', 'GameState', 'GoString', 'Move', 'IllegalMoveError']
+
+EMPTY = 0
+BLACK = 1
+WHITE = 2
+BORDER = 3
+
+COLOR_TO_PLAYER = (None, Player.black, Player.white, None)
+
+board_tables = {}
+
+
+class BoardTable:
+    """Lookup tables shared by every board of the same dimensions."""
+    def __init__(self, dim):
+        rows, cols = dim
+
+        self.num_rows = rows
+        self.num_cols = cols
+        self.stride = cols + 1
+        self.size = (rows + 2) * self.stride + 1
+
+        self.index = {}
+        self.points = [None] * self.size
+        self.on_board = []
+        self.neighbors = [()] * self.size
+        self.neighbor_points = {}
+        self.corner_points = {}
+        self.hash_codes = [(0, 0, 0)] * self.size
+        self.moves = [None] * self.size
+
+        colors = [BORDER] * self.size
+
+        for row in range(1, rows + 1):
+            for col in range(1, cols + 1):
+                idx = row * self.stride + col
+                pt = Point(row=row, col=col)
+
+                self.index[pt] = idx
+                self.points[idx] = pt
+                self.moves[idx] = Move.play(pt)
+                self.on_board.append(idx)
+                colors[idx] = EMPTY
+
+        for idx in self.on_board:
+            pt = self.points[idx]
+            candidates = (idx - self.stride, idx + self.stride, idx - 1, idx + 1)
+
+            self.neighbors[idx] = tuple(n for n in candidates if colors[n] == EMPTY)
+            self.neighbor_points[pt] = [self.points[n] for n in self.neighbors[idx]]
+
+            corners = (idx - self.stride - 1, idx - self.stride + 1, idx + self.stride - 1, idx + self.stride + 1)
+            self.corner_points[pt] = [self.points[n] for n in corners if 0 <= n < self.size and colors[n] == EMPTY]
+
+            # the same codes as the dict boards, so hashes agree between implementations
+            self.hash_codes[idx] = zobrist.POINT_CODES[pt]
+
+        self.empty_colors = array('b', colors)
+        self.all_empty = array('h', self.on_board)
+        self.all_empty_pos = array('h', bytes(2 * self.size))
+
+        for pos, idx in enumerate(self.on_board):
+            self.all_empty_pos[idx] = pos
+
+
+def get_board_table(dim):
+    table = board_tables.get(dim)
+
+    if table is None:
+        table = board_tables[dim] = BoardTable(dim)
+
+    return table
+
+
+class GoString:
+    """Read-only view of a string on an array board.
+
+    Color and liberty count are captured when the view is created, stones and
+    liberties are collected from the board on first access.
+    """
+    def __init__(self, board, head):
+        self._board = board
+        self._head = head
+        self.color = COLOR_TO_PLAYER[board._color[head]]
+        self.num_liberties = board._libs[head]
+        self._stones = None
+        self._liberties = None
+
+    @property
+    def stones(self):
+        if self._stones is None:
+            points = self._board._table.points
+            self._stones = frozenset(points[idx] for idx in self._board._string_indices(self._head))
+
+        return self._stones
+
+    @property
+    def liberties(self):
+        if self._liberties is None:
+            points = self._board._table.points
+            self._liberties = frozenset(points[idx] for idx in self._board._liberty_indices(self._head))
+
+        return self._liberties
+
+    def __eq__(self, other):
+        return isinstance(other, GoString) and \
+            self.color == other.color and \
+            self.stones == other.stones and \
+            self.liberties == other.liberties
+
+
+class Board:
+    def __init__(self, num_rows, num_cols):
+        self.num_rows = num_rows
+        self.num_cols = num_cols
+        self._table = get_board_table((num_rows, num_cols))
+
+        size = self._table.size
+        self._color = array('b', self._table.empty_colors)
+        self._head = array('h', bytes(2 * size))
+        self._next = array('h', bytes(2 * size))
+        self._libs = array('h', bytes(2 * size))
+        self._size = array('h', bytes(2 * size))
+        self._hash = zobrist.EMPTY_BOARD
+        self._ko = 0
+
+        # empty points, kept in _empties[:_num_empty] with each point's slot in _empty_pos
+        self._empties = array('h', self._table.all_empty)
+        self._empty_pos = array('h', self._table.all_empty_pos)
+        self._num_empty = len(self._empties)
+
+        # scratch marks used when liberties have to be recounted, created on demand
+        self._marks = None
+        self._mark_gen = 0
+
+        self.neighbor_table = self._table.neighbor_points
+        self.corner_table = self._table.corner_points
+        self.move_ages = MoveAge(self)
+
+    def neighbors(self, point):
+        return self.neighbor_table[point]
+
+    def corners(self, point):
+        return self.corner_table[point]
+
+    def point_to_index(self, point):
+        return self._table.index[point]
+
+    def index_to_point(self, idx):
+        return self._table.points[idx]
+
+    def place_stone(self, player, point):
+        assert self.is_on_grid(point)
+
+        idx = self._table.index[point]
+
+        if self._color[idx] != EMPTY:
+            print("Illegal play on %s by %s" % (str(point), str(player)))
+        assert self._color[idx] == EMPTY
+
+        self.move_ages.add(point)
+
+        captures = self._place(player.value, idx)
+
+        if captures:
+            points = self._table.points
+
+            for stones in captures:
+                for stone in stones:
+                    self.move_ages.reset_age(points[stone])
+
+    def make_move(self, player, point):
+        """Places a stone like place_stone and returns the delta needed to undo it."""
+        idx = self._table.index[point]
+        assert self._color[idx] == EMPTY
+
+        prev_hash = self._hash
+        prev_ko = self._ko
+
+        self.move_ages.add(point)
+
+        captures = self._place(player.value, idx)
+        captured_ages = None
+
+        if captures:
+            points = self._table.points
+            captured_ages = []
+
+            for stones in captures:
+                for stone in stones:
+                    pt = points[stone]
+                    captured_ages.append(self.move_ages.get(pt.row - 1, pt.col - 1))
+                    self.move_ages.reset_age(pt)
+
+        return idx, captures, captured_ages, prev_hash, prev_ko
+
+    def unmake_move(self, delta):
+        """Takes back the stone placed by the make_move call that returned delta."""
+        idx, captures, captured_ages, prev_hash, prev_ko = delta
+
+        table = self._table
+        colors = self._color
+        heads = self._head
+        neighbors = table.neighbors
+        color = colors[idx]
+        other = 3 - color
+
+        colors[idx] = EMPTY
+        heads[idx] = 0
+        self._next[idx] = 0
+        self._add_empty(idx)
+
+        if captures:
+            for stones in captures:
+                for stone in stones:
+                    colors[stone] = other
+                    self._remove_empty(stone)
+
+        # the stone may have joined several strings together, split them back
+        # apart and rebuild any captured strings
+        marks, gen = self._new_marks()
+        affected = []
+
+        for n in neighbors[idx]:
+            if colors[n] == color and marks[n] != gen:
+                affected.append(self._rebuild_string(n, marks, gen))
+
+        if captures:
+            for stones in captures:
+                affected.append(self._rebuild_string(stones[0], marks, gen))
+
+                # strings that touched the captured stones lose those liberties again
+                for stone in stones:
+                    for n in neighbors[stone]:
+                        if colors[n] == color and heads[n] not in affected:
+                            affected.append(heads[n])
+
+        for n in neighbors[idx]:
+            if colors[n] == other and heads[n] not in affected:
+                affected.append(heads[n])
+
+        for head in affected:
+            self._libs[head] = self._count_liberties(head)
+
+        if captures:
+            points = table.points
+            ages = iter(captured_ages)
+
+            for stones in captures:
+                for stone in stones:
+                    self.move_ages.set_age(points[stone], next(ages))
+
+        self.move_ages.take_back(table.points[idx])
+
+        self._hash = prev_hash
+        self._ko = prev_ko
+
+    def _place(self, color, idx):
+        table = self._table
+        colors = self._color
+        heads = self._head
+        libs = self._libs
+        neighbors = table.neighbors[idx]
+
+        colors[idx] = color
+        heads[idx] = idx
+        self._next[idx] = idx
+        self._size[idx] = 1
+        self._remove_empty(idx)
+        self._hash ^= table.hash_codes[idx][color]
+
+        num_empty = 0
+        friendly = 0
+
+        for n in neighbors:
+            neighbor_color = colors[n]
+
+            if neighbor_color == EMPTY:
+                num_empty += 1
+            elif neighbor_color == color:
+                friendly += 1
+
+        if not friendly:
+            libs[idx] = num_empty
+        else:
+            merged_strings = 0
+
+            for n in neighbors:
+                if colors[n] == color and heads[n] != heads[idx]:
+                    self._merge(heads[n], heads[idx])
+                    merged_strings += 1
+
+            head = heads[idx]
+
+            if merged_strings == 1:
+                # idx used to be a liberty of the string it joined; any empty
+                # neighbor not already touching that string is a new one
+                count = libs[head] - 1
+
+                for n in neighbors:
+                    if colors[n] == EMPTY and not self._touches(n, head, idx):
+                        count += 1
+
+                libs[head] = count
+            else:
+                libs[head] = self._count_liberties(head)
+
+        # reduce liberties of adjacent strings of opposite color
+        # (if opposite color strings now have zero liberties, remove them)
+        other = 3 - color
+        seen = []
+        captures = None
+
+        for n in neighbors:
+            if colors[n] != other:
+                continue
+
+            head = heads[n]
+
+            if head in seen:
+                continue
+
+            seen.append(head)
+            libs[head] -= 1
+
+            if not libs[head]:
+                if captures is None:
+                    captures = []
+                captures.append(self._remove_string(head))
+
+        # a lone stone that captured a lone stone and sits in atari is a ko
+        self._ko = 0
+        if captures is not None and len(captures) == 1 and len(captures[0]) == 1:
+            head = heads[idx]
+            if self._size[head] == 1 and libs[head] == 1:
+                self._ko = captures[0][0]
+
+        return captures
+
+    def _add_empty(self, idx):
+        pos = self._num_empty
+        self._empties[pos] = idx
+        self._empty_pos[idx] = pos
+        self._num_empty = pos + 1
+
+    def _remove_empty(self, idx):
+        # move the last empty point into the slot being freed
+        pos = self._empty_pos[idx]
+        last = self._empties[self._num_empty - 1]
+        self._empties[pos] = last
+        self._empty_pos[last] = pos
+        self._num_empty -= 1
+
+    def empty_indices(self):
+        return self._empties[:self._num_empty]
+
+    def hash_after(self, player, point):
+        """Zobrist hash of the board if player placed a stone at point, without placing it."""
+        return self._hash_after(player.value, self._table.index[point])
+
+    def _hash_after(self, color, idx):
+        hash_codes = self._table.hash_codes
+        other = 3 - color
+        heads = self._head
+        new_hash = self._hash ^ hash_codes[idx][color]
+
+        seen = []
+        for n in self._table.neighbors[idx]:
+            if self._color[n] == other and self._libs[heads[n]] == 1 and heads[n] not in seen:
+                seen.append(heads[n])
+
+                for stone in self._string_indices(heads[n]):
+                    new_hash ^= hash_codes[stone][other]
+
+        return new_hash
+
+    def _touches(self, idx, head, skip):
+        heads = self._head
+
+        for n in self._table.neighbors[idx]:
+            if n != skip and heads[n] == head:
+                return True
+
+        return False
+
+    def _merge(self, head_a, head_b):
+        sizes = self._size
+        heads = self._head
+        nxt = self._next
+
+        if sizes[head_a] < sizes[head_b]:
+            head_a, head_b = head_b, head_a
+
+        # relabel the smaller string, then splice the two circular lists
+        stone = head_b
+        while True:
+            heads[stone] = head_a
+            stone = nxt[stone]
+
+            if stone == head_b:
+                break
+
+        nxt[head_a], nxt[head_b] = nxt[head_b], nxt[head_a]
+        sizes[head_a] += sizes[head_b]
+
+        return head_a
+
+    def _new_marks(self):
+        if self._marks is None:
+            self._marks = array('i', bytes(4 * self._table.size))
+
+        self._mark_gen += 1
+
+        return self._marks, self._mark_gen
+
+    def _rebuild_string(self, start, marks, gen):
+        # flood fill the string through start, relinking it with start as head
+        colors = self._color
+        heads = self._head
+        nxt = self._next
+        neighbors = self._table.neighbors
+        color = colors[start]
+
+        marks[start] = gen
+        stones = [start]
+        i = 0
+
+        while i < len(stones):
+            for n in neighbors[stones[i]]:
+                if colors[n] == color and marks[n] != gen:
+                    marks[n] = gen
+                    stones.append(n)
+            i += 1
+
+        prev = stones[-1]
+        for stone in stones:
+            heads[stone] = start
+            nxt[prev] = stone
+            prev = stone
+
+        self._size[start] = len(stones)
+
+        return start
+
+    def _count_liberties(self, head):
+        marks, gen = self._new_marks()
+        colors = self._color
+        neighbors = self._table.neighbors
+        nxt = self._next
+
+        count = 0
+        stone = head
+        while True:
+            for n in neighbors[stone]:
+                if colors[n] == EMPTY and marks[n] != gen:
+                    marks[n] = gen
+                    count += 1
+
+            stone = nxt[stone]
+
+            if stone == head:
+                break
+
+        return count
+
+    def _string_indices(self, head):
+        nxt = self._next
+        stones = [head]
+        stone = nxt[head]
+
+        while stone != head:
+            stones.append(stone)
+            stone = nxt[stone]
+
+        return stones
+
+    def _liberty_indices(self, head):
+        colors = self._color
+        neighbors = self._table.neighbors
+        liberties = []
+
+        for stone in self._string_indices(head):
+            for n in neighbors[stone]:
+                if colors[n] == EMPTY and n not in liberties:
+                    liberties.append(n)
+
+        return liberties
+
+    def _remove_string(self, head):
+        table = self._table
+        colors = self._color
+        heads = self._head
+        libs = self._libs
+        nxt = self._next
+        neighbors = table.neighbors
+        color = colors[head]
+        other = 3 - color
+        stones = []
+
+        stone = head
+        while True:
+            following = nxt[stone]
+
+            stones.append(stone)
+            colors[stone] = EMPTY
+            self._add_empty(stone)
+            heads[stone] = 0
+            nxt[stone] = 0
+            self._hash ^= table.hash_codes[stone][color]
+
+            # the emptied point is a new liberty for every distinct adjacent string
+            seen = []
+            for n in neighbors[stone]:
+                if colors[n] == other:
+                    neighbor_head = heads[n]
+
+                    if neighbor_head not in seen:
+                        seen.append(neighbor_head)
+                        libs[neighbor_head] += 1
+
+            stone = following
+
+            if stone == head:
+                break
+
+        libs[head] = 0
+        self._size[head] = 0
+
+        return stones
+
+    def is_self_capture(self, player, point):
+        return self._is_self_capture(player.value, self._table.index[point])
+
+    def _is_self_capture(self, color, idx):
+        colors = self._color
+        heads = self._head
+        libs = self._libs
+        friendly_in_atari = True
+
+        for n in self._table.neighbors[idx]:
+            neighbor_color = colors[n]
+
+            if neighbor_color == EMPTY:
+                return False  # not a capture since this point has a liberty
+            elif neighbor_color == color:
+                if libs[heads[n]] != 1:
+                    friendly_in_atari = False
+            elif libs[heads[n]] == 1:
+                return False  # this move would capture
+
+        return friendly_in_atari
+
+    def will_capture(self, player, point):
+        idx = self._table.index[point]
+        other = 3 - player.value
+
+        for n in self._table.neighbors[idx]:
+            if self._color[n] == other and self._libs[self._head[n]] == 1:
+                return True  # this move would capture
+
+        return False
+
+    def liberties_after(self, player, point):
+        """Liberties of the string a stone of player at point would be part of, captures included, without placing it."""
+        return self._liberties_after(player.value, self._table.index[point])
+
+    def _liberties_after(self, color, idx):
+        colors = self._color
+        heads = self._head
+        neighbors = self._table.neighbors
+        other = 3 - color
+
+        stones = {idx}
+        liberties = set()
+        joined = []
+        captured = []
+        for n in neighbors[idx]:
+            neighbor_color = colors[n]
+
+            if neighbor_color == EMPTY:
+                liberties.add(n)
+            elif neighbor_color == color:
+                if heads[n] not in joined:
+                    joined.append(heads[n])
+                    stones.update(self._string_indices(heads[n]))
+                    liberties.update(self._liberty_indices(heads[n]))
+            elif self._libs[heads[n]] == 1 and heads[n] not in captured:
+                captured.append(heads[n])
+
+        liberties.discard(idx)
+
+        # captured stones become liberties wherever they touch the new string
+        for head in captured:
+            for stone in self._string_indices(head):
+                if any(n in stones for n in neighbors[stone]):
+                    liberties.add(stone)
+
+        return len(liberties)
+
+    def point_arrays(self):
+        """Colour value, string liberties and string size of every point as (num_rows, num_cols) arrays.
+
+        Liberties and size are 0 on empty points.
+        """
+        on_board = self._table.on_board
+        shape = (self.num_rows, self.num_cols)
+
+        colors = np.array([self._color[idx] for idx in on_board], dtype=np.int8).reshape(shape)
+        heads = [self._head[idx] for idx in on_board]
+        liberties = np.array([self._libs[head] for head in heads], dtype=np.int32).reshape(shape)
+        sizes = np.array([self._size[head] for head in heads], dtype=np.int32).reshape(shape)
+
+        liberties[colors == EMPTY] = 0
+        sizes[colors == EMPTY] = 0
+
+        return colors, liberties, sizes
+
+    def is_on_grid(self, point):
+        return 1 <= point.row <= self.num_rows and 1 <= point.col <= self.num_cols
+
+    def get(self, point):
+        # returns content of a point on the board
+        # could be None or a Player
+        idx = self._table.index.get(point)
+
+        return COLOR_TO_PLAYER[self._color[idx]] if idx is not None else None
+
+    def get_go_string(self, point):
+        # returns entire string of stones at a point (if any)
+        idx = self._table.index.get(point)
+
+        if idx is None or self._color[idx] == EMPTY:
+            return None
+
+        return GoString(self, self._head[idx])
+
+    def num_liberties(self, point):
+        idx = self._table.index[point]
+
+        return self._libs[self._head[idx]] if self._color[idx] != EMPTY else 0
+
+    def __eq__(self, other):
+        return isinstance(other, Board) \
+               and self.num_rows == other.num_rows and \
+               self.num_cols == other.num_cols \
+               and self.zobrist_hash() == other.zobrist_hash()
+
+    def __deepcopy__(self, memodict=None):
+        copied = Board.__new__(Board)
+        copied.num_rows = self.num_rows
+        copied.num_cols = self.num_cols
+        copied._table = self._table
+        copied._color = self._color[:]
+        copied._head = self._head[:]
+        copied._next = self._next[:]
+        copied._libs = self._libs[:]
+        copied._size = self._size[:]
+        copied._hash = self._hash
+        copied._ko = self._ko
+        copied._empties = self._empties[:]
+        copied._empty_pos = self._empty_pos[:]
+        copied._num_empty = self._num_empty
+        copied._marks = None
+        copied._mark_gen = 0
+        copied.neighbor_table = self.neighbor_table
+        copied.corner_table = self.corner_table
+        copied.move_ages = copy.deepcopy(self.move_ages)
+
+        return copied
+
+    def zobrist_hash(self):
+        return self._hash
+
+    @property
+    def ko_point(self):
+        # point a simple ko currently forbids retaking, if any
+        return self._table.points[self._ko] if self._ko else None
+
+    @classmethod
+    def from_board(cls, board):
+        """Builds an array board holding the same stones as a board of any implementation."""
+        copied = cls(board.num_rows, board.num_cols)
+        table = copied._table
+        colors = copied._color
+
+        for idx in table.on_board:
+            player = board.get(table.points[idx])
+
+            if player is not None:
+                colors[idx] = player.value
+                copied._hash ^= table.hash_codes[idx][player.value]
+                copied._remove_empty(idx)
+
+        marks, gen = copied._new_marks()
+        heads = []
+
+        for idx in table.on_board:
+            if colors[idx] != EMPTY and marks[idx] != gen:
+                heads.append(copied._rebuild_string(idx, marks, gen))
+
+        for head in heads:
+            copied._libs[head] = copied._count_liberties(head)
+
+        if getattr(board, 'move_ages', None) is not None:
+            copied.move_ages = copy.deepcopy(board.move_ages)
+
+        return copied
+
+    @classmethod
+    def from_colors(cls, colors):
+        """Builds an array board from a (num_rows, num_cols) array of colour values, like point_arrays returns."""
+        num_rows, num_cols = colors.shape
+        board = cls(num_rows, num_cols)
+        table = board._table
+        board_colors = board._color
+
+        rows, cols = np.nonzero(colors)
+        for idx, color in zip(((rows + 1) * table.stride + cols + 1).tolist(), colors[rows, cols].tolist()):
+            board_colors[idx] = color
+            board._hash ^= table.hash_codes[idx][color]
+            board._remove_empty(idx)
+
+        marks, gen = board._new_marks()
+        heads = []
+
+        for idx in table.on_board:
+            if board_colors[idx] != EMPTY and marks[idx] != gen:
+                heads.append(board._rebuild_string(idx, marks, gen))
+
+        for head in heads:
+            board._libs[head] = board._count_liberties(head)
+
+        return board
+
+
+class SituationHistory:
+    """Situations (next player, board hash) seen on the way to a game state.
+
+    States along one line of play share a single dict mapping each situation
+    to the move number it first occurred at, and a state only looks at entries
+    older than itself. Extending a state that is not at the end of its line
+    starts a child history that defers to its parent for earlier moves, so a
+    new state costs O(1) instead of copying the whole history.
+    """
+    __slots__ = ('_seen', '_parent', '_base', '_length')
+
+    def __init__(self, parent=None, base=0):
+        self._seen = {}
+        self._parent = parent
+        self._base = base
+        self._length = base
+
+    @classmethod
+    def from_situations(cls, situations):
+        # every situation counts as seen before move number 1
+        history = cls()
+        for situation in situations:
+            history._seen[situation] = 0
+        history._length = 1
+
+        return history
+
+    def contains(self, situation, depth):
+        history = self
+
+        while history is not None:
+            first = history._seen.get(situation)
+            if first is not None and first < depth:
+                return True
+
+            depth = min(depth, history._base)
+            history = history._parent
+
+        return False
+
+    def extended(self, situation, depth):
+        """Records situation at move number depth.
+
+        Returns the history to use from move depth + 1 on, and whether the
+        situation was new to it.
+        """
+        history = self if self._length == depth else SituationHistory(self, depth)
+
+        added = situation not in history._seen
+        if added:
+            history._seen[situation] = depth
+        history._length = depth + 1
+
+        return history, added
+
+    def retract(self, situation, depth, added):
+        # only the end of the line can be taken back, anything else is
+        # already invisible to states before it
+        if self._length == depth + 1:
+            if added:
+                del self._seen[situation]
+            self._length = depth
+
+    def situations(self, depth):
+        found = set()
+        history = self
+
+        while history is not None:
+            found.update(situation for situation, first in history._seen.items() if first < depth)
+            depth = min(depth, history._base)
+            history = history._parent
+
+        return frozenset(found)
+
+
+class GameState:
+    def __init__(self, board, next_player, previous, move):
+        self.board = board
+        self.next_player = next_player
+        self.previous_state = previous
+        if self.previous_state is None:
+            self._history = SituationHistory()
+            self._depth = 0
+        else:
+            self._history, _ = previous._history.extended(
+                (previous.next_player, previous.board.zobrist_hash()), previous._depth)
+            self._depth = previous._depth + 1
+        if type(move) == tuple:
+            self.last_move = Move(move)
+        else:
+            self.last_move = move
+        self._prev_move = previous.last_move if previous is not None else None
+        self._undo_stack = []
+
+    @property
+    def previous_states(self):
+        return self._history.situations(self._depth)
+
+    def apply_move(self, move):
+        # passes get their own board too, so that play() on either state can't affect the other
+        next_board = copy.deepcopy(self.board)
+
+        if move.is_play:
+            next_board.place_stone(self.next_player, move.point)
+
+        return GameState(next_board, self.next_player.other, self, move)
+
+    def play(self, move):
+        """Applies move to this state in place; undo() takes it back.
+
+        Search code can walk long move sequences this way without allocating a
+        new board per move. previous_state is left alone while playing in place.
+        """
+        situation = (self.next_player, self.board.zobrist_hash())
+        history, added = self._history.extended(situation, self._depth)
+
+        delta = self.board.make_move(self.next_player, move.point) if move.is_play else None
+
+        self._undo_stack.append((move, delta, self._history, added, situation, self.last_move, self._prev_move))
+        self._history = history
+        self._depth += 1
+        self._prev_move = self.last_move
+        self.last_move = move
+        self.next_player = self.next_player.other
+
+    def undo(self):
+        """Takes back the last move applied with play() and returns it."""
+        move, delta, history, added, situation, last_move, prev_move = self._undo_stack.pop()
+
+        if delta is not None:
+            self.board.unmake_move(delta)
+
+        self._depth -= 1
+        self._history.retract(situation, self._depth, added)
+        self._history = history
+        self.last_move = last_move
+        self._prev_move = prev_move
+        self.next_player = self.next_player.other
+
+        return move
+
+    def search_copy(self):
+        """Returns an independent copy of this state to play() and undo() on."""
+        return GameState.from_game_state(self)
+
+    @classmethod
+    def from_game_state(cls, game_state):
+        """Builds an array-backed copy of a game state from any board implementation."""
+        board = game_state.board
+
+        if isinstance(board, Board):
+            copied = cls(copy.deepcopy(board), game_state.next_player, None, game_state.last_move)
+            copied._history = game_state._history
+            copied._depth = game_state._depth
+            copied._prev_move = game_state._prev_move
+
+            return copied
+
+        # only goboard_fast hashes positions the same way as this board,
+        # otherwise recompute the hash of every earlier position
+        if isinstance(board, goboard_fast.Board):
+            previous_states = game_state.previous_states
+        else:
+            previous_states = set()
+            state = game_state.previous_state
+            while state is not None:
+                previous_states.add((state.next_player, Board.from_board(state.board).zobrist_hash()))
+                state = state.previous_state
+
+        copied = cls(Board.from_board(board), game_state.next_player, None, game_state.last_move)
+        copied._history = SituationHistory.from_situations(previous_states)
+        copied._depth = 1
+        if game_state.previous_state is not None:
+            copied._prev_move = game_state.previous_state.last_move
+
+        return copied
+
+    @classmethod
+    def new_game(cls, board_size):
+        if isinstance(board_size, int):
+            board_size = (board_size, board_size)
+
+        board = Board(*board_size)
+        return GameState(board, Player.black, None, None)
+
+    def is_over(self):
+        if self.last_move is None:
+            return False
+
+        if self.last_move.is_resign:
+            return True
+
+        second_last_move = self._prev_move
+
+        return (self.last_move.is_pass and second_last_move.is_pass) if second_last_move is not None else False
+
+    def is_move_self_capture(self, player, move):
+        if not move.is_play:
+            return False
+
+        return self.board.is_self_capture(player, move.point)
+
+    @property
+    def situation(self):
+        return self.next_player, self.board
+
+    def does_move_violate_ko(self, player, move):
+        if not move.is_play:
+            return False
+
+        idx = self.board.point_to_index(move.point)
+
+        return self._violates_ko(player, idx)
+
+    def _violates_ko(self, player, idx):
+        board = self.board
+
+        # retaking a simple ko straight away is the common case and needs no hashing
+        if idx == board._ko and player == self.next_player and \
+                self.last_move is not None and self.last_move.is_play:
+            return True
+
+        next_situation = (player.other, board._hash_after(player.value, idx))
+
+        return self._history.contains(next_situation, self._depth)
+
+    def ko_points(self):
+        """Empty points where a stone of the player to move would repeat an earlier position."""
+        board = self.board
+        table = board._table
+        colors = board._color
+        heads = board._head
+        libs = board._libs
+        color = self.next_player.value
+        other = 3 - color
+        situation_player = self.next_player.other
+
+        found = []
+        for idx in board.empty_indices():
+            # a stone that captures nothing only changes the hash code of its own point
+            if any(colors[n] == other and libs[heads[n]] == 1 for n in table.neighbors[idx]):
+                new_hash = board._hash_after(color, idx)
+            else:
+                new_hash = board._hash ^ table.hash_codes[idx][color]
+
+            if self._history.contains((situation_player, new_hash), self._depth):
+                found.append(table.points[idx])
+
+        return found
+
+    def _is_legal_play(self, player, idx):
+        board = self.board
+
+        return board._color[idx] == EMPTY and \
+            not board._is_self_capture(player.value, idx) and \
+            not self._violates_ko(player, idx)
+
+    def is_valid_move(self, move):
+        if self.is_over():
+            return False
+        if move.is_pass or move.is_resign:
+            return True
+
+        idx = self.board._table.index.get(move.point)
+
+        return idx is not None and self._is_legal_play(self.next_player, idx)
+
+    def winner(self):
+        if not self.is_over():
+            return None
+        if self.last_move.is_resign:
+            return self.next_player
+        game_result = compute_game_result(self)
+        return game_result.winner
+
+    def legal_moves(self):
+        if self.is_over():
+            return []
+
+        # only empty points can be played, so there is no need to scan the whole board
+        player = self.next_player
+        table_moves = self.board._table.moves
+        moves = [table_moves[idx] for idx in self.board.empty_indices() if self._is_legal_play(player, idx)]
+
+        # always legal
+        moves.append(Move.pass_turn())
+        moves.append(Move.resign())
+
+        return moves
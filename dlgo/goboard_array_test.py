@@ -0,0 +1,174 @@
+import random
+import unittest
+
+from dlgo import goboard_fast
+from dlgo.goboard_array import Board, GameState, Move
+from dlgo.gotypes import Player, Point
+
+
+class BoardTest(unittest.TestCase):
+    def test_capture(self):
+        board = Board(19, 19)
+        board.place_stone(Player.black, Point(2, 2))
+        board.place_stone(Player.white, Point(1, 2))
+        self.assertEqual(Player.black, board.get(Point(2, 2)))
+        board.place_stone(Player.white, Point(2, 1))
+        self.assertEqual(Player.black, board.get(Point(2, 2)))
+        board.place_stone(Player.white, Point(2, 3))
+        self.assertEqual(Player.black, board.get(Point(2, 2)))
+        board.place_stone(Player.white, Point(3, 2))
+        self.assertIsNone(board.get(Point(2, 2)))
+        self.assertEqual(3, board.get_go_string(Point(1, 2)).num_liberties)
+
+    def test_capture_two_stones(self):
+        board = Board(19, 19)
+        board.place_stone(Player.black, Point(2, 2))
+        board.place_stone(Player.black, Point(2, 3))
+        board.place_stone(Player.white, Point(1, 2))
+        board.place_stone(Player.white, Point(1, 3))
+        self.assertEqual(Player.black, board.get(Point(2, 2)))
+        self.assertEqual(Player.black, board.get(Point(2, 3)))
+        board.place_stone(Player.white, Point(3, 2))
+        board.place_stone(Player.white, Point(3, 3))
+        board.place_stone(Player.white, Point(2, 1))
+        board.place_stone(Player.white, Point(2, 4))
+        self.assertIsNone(board.get(Point(2, 2)))
+        self.assertIsNone(board.get(Point(2, 3)))
+
+    def test_merge_liberties(self):
+        board = Board(19, 19)
+        board.place_stone(Player.black, Point(3, 3))
+        board.place_stone(Player.black, Point(3, 5))
+        board.place_stone(Player.black, Point(3, 4))
+        go_string = board.get_go_string(Point(3, 4))
+        self.assertEqual(8, go_string.num_liberties)
+        self.assertEqual(3, len(go_string.stones))
+        self.assertEqual(8, len(go_string.liberties))
+
+    def test_self_capture(self):
+        board = Board(19, 19)
+        board.place_stone(Player.black, Point(1, 1))
+        board.place_stone(Player.black, Point(1, 3))
+        board.place_stone(Player.white, Point(2, 1))
+        board.place_stone(Player.white, Point(2, 2))
+        board.place_stone(Player.white, Point(2, 3))
+        board.place_stone(Player.white, Point(1, 4))
+        self.assertTrue(board.is_self_capture(Player.black, Point(1, 2)))
+        self.assertFalse(board.is_self_capture(Player.white, Point(1, 2)))
+
+    def test_hash_matches_goboard_fast(self):
+        board = Board(19, 19)
+        fast_board = goboard_fast.Board(19, 19)
+        for player, point in [(Player.black, Point(2, 2)), (Player.white, Point(1, 2)),
+                              (Player.white, Point(2, 1)), (Player.white, Point(2, 3)),
+                              (Player.white, Point(3, 2))]:
+            board.place_stone(player, point)
+            fast_board.place_stone(player, point)
+            self.assertEqual(fast_board.zobrist_hash(), board.zobrist_hash())
+
+
+class GameStateTest(unittest.TestCase):
+    def test_matches_goboard_fast(self):
+        random.seed(0)
+        game = GameState.new_game(9)
+        fast_game = goboard_fast.GameState.new_game(9)
+
+        for _ in range(150):
+            moves = [m for m in game.legal_moves() if m.is_play]
+            self.assertEqual(set(moves), set(m for m in fast_game.legal_moves() if m.is_play))
+            if not moves:
+                break
+
+            move = random.choice(moves)
+            game = game.apply_move(move)
+            fast_game = fast_game.apply_move(move)
+
+            for row in range(1, 10):
+                for col in range(1, 10):
+                    point = Point(row, col)
+                    go_string = game.board.get_go_string(point)
+                    fast_string = fast_game.board.get_go_string(point)
+                    if fast_string is None:
+                        self.assertIsNone(go_string)
+                    else:
+                        self.assertEqual(fast_string.stones, go_string.stones)
+                        self.assertEqual(fast_string.liberties, go_string.liberties)
+                        self.assertEqual(fast_string.num_liberties, go_string.num_liberties)
+
+    def test_game_over(self):
+        game = GameState.new_game(9)
+        game = game.apply_move(Move.play(Point(5, 5)))
+        game = game.apply_move(Move.pass_turn())
+        self.assertFalse(game.is_over())
+        game = game.apply_move(Move.pass_turn())
+        self.assertTrue(game.is_over())
+
+    def test_ko(self):
+        game = GameState.new_game(9)
+        for point in [Point(1, 2), Point(1, 3), Point(2, 1), Point(2, 4),
+                      Point(3, 2), Point(3, 3), Point(9, 9), Point(2, 2)]:
+            game = game.apply_move(Move.play(point))
+        game = game.apply_move(Move.play(Point(2, 3)))
+        self.assertIsNone(game.board.get(Point(2, 2)))
+
+        retake = Move.play(Point(2, 2))
+        self.assertFalse(game.is_valid_move(retake))
+        self.assertNotIn(retake, game.legal_moves())
+
+        game.play(Move.play(Point(9, 1)))
+        game.play(Move.play(Point(8, 1)))
+        self.assertTrue(game.is_valid_move(retake))
+        game.undo()
+        game.undo()
+        self.assertFalse(game.is_valid_move(retake))
+
+
+class PlayUndoTest(unittest.TestCase):
+    def test_undo_restores_position(self):
+        random.seed(1)
+        game = GameState.new_game(7)
+        history = []
+
+        for _ in range(120):
+            if game.is_over():
+                break
+            moves = [m for m in game.legal_moves() if not m.is_resign]
+            history.append((game.board.zobrist_hash(), game.board._color[:], game.next_player, game.last_move))
+            game.play(random.choice(moves))
+
+        while history:
+            game.undo()
+            zobrist_hash, colors, next_player, last_move = history.pop()
+            self.assertEqual(zobrist_hash, game.board.zobrist_hash())
+            self.assertEqual(colors, game.board._color)
+            self.assertEqual(next_player, game.next_player)
+            self.assertEqual(last_move, game.last_move)
+
+    def test_undo_capture(self):
+        game = GameState.new_game(9)
+        for point in [Point(2, 2), Point(1, 2), Point(9, 9), Point(2, 1), Point(9, 8), Point(2, 3)]:
+            game.play(Move.play(point))
+        game.play(Move.pass_turn())
+        game.play(Move.play(Point(3, 2)))
+        self.assertIsNone(game.board.get(Point(2, 2)))
+
+        game.undo()
+        self.assertEqual(Player.black, game.board.get(Point(2, 2)))
+        self.assertEqual(1, game.board.get_go_string(Point(2, 2)).num_liberties)
+        self.assertEqual(2, game.board.get_go_string(Point(1, 2)).num_liberties)
+
+    def test_from_game_state(self):
+        fast_game = goboard_fast.GameState.new_game(9)
+        for point in [Point(3, 3), Point(4, 4), Point(3, 4)]:
+            fast_game = fast_game.apply_move(Move.play(point))
+
+        game = GameState.from_game_state(fast_game)
+        self.assertEqual(fast_game.board.zobrist_hash(), game.board.zobrist_hash())
+        self.assertEqual(fast_game.previous_states, game.previous_states)
+        self.assertEqual(Player.white, game.next_player)
+        self.assertEqual(5, game.board.get_go_string(Point(3, 3)).num_liberties)
+        self.assertEqual(3, game.board.get_go_string(Point(4, 4)).num_liberties)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -125,7 +125,6 @@ class Board:
         adjacent_opposite_color = []
         liberties = []
 
-        self.move_ages.increment_all()
         self.move_ages.add(point)
 
         for neighbor in self.neighbor_table[point]:
@@ -148,8 +147,7 @@ class Board:
         for new_string_point in new_string.stones:
             self._grid[new_string_point] = new_string
 
-        self._hash ^= zobrist.HASH_CODE[point, None]
-        self._hash ^= zobrist.HASH_CODE[point, player]
+        self._hash ^= zobrist.POINT_CODES[point][player.value]
 
         # reduce liberties of adjacent strings of opposite color
         # (if opposite color strings now have zero liberties, remove them)
@@ -181,8 +179,7 @@ class Board:
 
             # remove this point (stone) from board
             self._grid[point] = None
-            self._hash ^= zobrist.HASH_CODE[point, string.color]
-            self._hash ^= zobrist.HASH_CODE[point, None]
+            self._hash ^= zobrist.POINT_CODES[point][string.color.value]
 
     def is_self_capture(self, player, point):
         friendly_strings = []
@@ -235,6 +232,7 @@ class Board:
         copied = Board(self.num_rows, self.num_cols)
         copied._grid = copy.copy(self._grid)
         copied._hash = self._hash
+        copied.move_ages = copy.deepcopy(self.move_ages)
 
         return copied
 
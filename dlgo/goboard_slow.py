@@ -31,10 +31,17 @@ class Move:
 
 
 class GoString:
+    # strings are updated in place, Board.place_stone and _remove_string share them between their points
     def __init__(self, color, stones, liberties):
         self.color = color
-        self.stones = frozenset(stones)
-        self.liberties = frozenset(liberties)
+        self.stones = set(stones)
+        self.liberties = set(liberties)
+
+    def remove_liberty(self, point):
+        self.liberties.remove(point)
+
+    def add_liberty(self, point):
+        self.liberties.add(point)
 
     def without_liberty(self, point):
         new_liberties = self.liberties - {point}
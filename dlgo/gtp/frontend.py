@@ -1,4 +1,5 @@
 from __future__ import absolute_import
+import json
 import sys
 from dlgo.gtp import command, response
 from dlgo.gtp.board import coords_to_gtp_position, gtp_position_to_coords
@@ -30,6 +31,7 @@ class GTPFrontend:
         self.handlers = {
             'boardsize': GTPFrontend.handle_boardsize,
             'clear_board': self.handle_clear_board,
+            'diagnostics': self.handle_diagnostics,
             'fixed_handicap': self.handle_fixed_handicap,
             'genmove': self.handle_genmove,
             'known_command': self.handle_known_command,
@@ -97,6 +99,10 @@ class GTPFrontend:
             return response.error('Only 19x19 currently supported, requested {}'.format(size))
         return response.success()
 
+    def handle_diagnostics(self):
+        # not a GTP command, reports the agent's search statistics as one line of JSON
+        return response.success(json.dumps(self.agent.diagnostics()))
+
     def handle_showboard(self):
         print_board(self.game_state.board)
         return response.success()
@@ -9,7 +9,7 @@ from dlgo.goboard_fast import GameState, Move
 from dlgo.gotypes import Player
 from dlgo.gtp.board import gtp_position_to_coords, coords_to_gtp_position
 from dlgo.gtp.gtp_utils import SGFWriter
-from dlgo.scoring import compute_game_result
+from dlgo.scoring import ScoreEstimate
 from dlgo.utils import print_board
 
 
@@ -83,6 +83,7 @@ class LocalGtpBot:
             self.sgf.append(sgf_handicap + '\n')
 
     def play(self):
+        score = ScoreEstimate(self.game_state.board)
         while not self._stopped:
             if self.game_state.next_player == self.our_color:
                 self.play_our_move()
@@ -92,7 +93,8 @@ class LocalGtpBot:
             print(chr(27) + '[2J')  # clears board
             print_board(self.game_state.board)
             print('Estimated result: ')
-            print(compute_game_result(self.game_state))
+            score.update(self.game_state.board)
+            print(score.result())
 
     def play_our_move(self):
         move = self.bot.select_move(self.game_state)
@@ -0,0 +1,153 @@
+"""Local inference service for self-play.
+
+One process loads the model and serves predictions for any number of worker
+processes. Workers hold an InferenceClient, which has the same predict() as a
+Keras model and can be handed to an agent in place of one. The server waits
+for the first request, then keeps collecting requests until either
+max_batch_size states are queued or max_wait seconds have passed, and answers
+all of them with a single predict call.
+
+If loading the model or a predict call fails, the clients waiting for it
+get the error back and raise it from predict(), in place of waiting forever.
+"""
+
+import multiprocessing
+import queue
+import time
+import traceback
+
+import numpy as np
+
+__all__ = [
+    'InferenceServer',
+    'InferenceClient',
+]
+
+
+class InferenceClient:
+    def __init__(self, client_id, requests, responses):
+        self.client_id = client_id
+        self.requests = requests
+        self.responses = responses
+
+    def predict(self, x):
+        self.requests.put((self.client_id, np.asarray(x)))
+        response = self.responses.get()
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+
+def server_error(what):
+    # the traceback goes along as text, the exception itself may not be picklable
+    return RuntimeError('inference server failed to {}:\n{}'.format(what, traceback.format_exc()))
+
+
+def serve(model_loader, requests, responses, max_batch_size, max_wait):
+    # without a model every request is answered with the error that prevented loading it
+    model = None
+    error = None
+    try:
+        model = model_loader()
+    except Exception:
+        error = server_error('load the model')
+
+    running = True
+
+    while running:
+        first = requests.get()
+        if first is None:
+            break
+
+        batch = [first]
+        num_states = len(first[1])
+        deadline = time.monotonic() + max_wait
+
+        while num_states < max_batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                request = requests.get(timeout=timeout)
+            except queue.Empty:
+                break
+            if request is None:
+                running = False
+                break
+            batch.append(request)
+            num_states += len(request[1])
+
+        if model is not None:
+            try:
+                outputs = model.predict(np.concatenate([states for _, states in batch]))
+            except Exception:
+                outputs = None
+                error = server_error('predict')
+
+        if model is None or outputs is None:
+            for client_id, _ in batch:
+                responses[client_id].put(error)
+            continue
+
+        multiple_outputs = isinstance(outputs, (list, tuple))
+
+        start = 0
+        for client_id, states in batch:
+            end = start + len(states)
+            if multiple_outputs:
+                responses[client_id].put([output[start:end] for output in outputs])
+            else:
+                responses[client_id].put(outputs[start:end])
+            start = end
+
+
+class InferenceServer:
+    """Runs a model in a process of its own and batches predictions across clients.
+
+    model_loader is called in the server process to create the model, so it has
+    to be picklable, e.g. a module level function or a functools.partial of one.
+    Each of the num_clients clients must only be used by one process at a time.
+    """
+    def __init__(self, model_loader, num_clients, max_batch_size=256, max_wait=0.005):
+        self.model_loader = model_loader
+        self.num_clients = num_clients
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+
+        self.clients = []
+        self._manager = None
+        self._requests = None
+        self._process = None
+
+    def start(self):
+        # manager queues can be passed to pool workers, plain multiprocessing queues can't
+        self._manager = multiprocessing.Manager()
+        self._requests = self._manager.Queue()
+        self.clients = [InferenceClient(i, self._requests, self._manager.Queue()) for i in range(self.num_clients)]
+
+        self._process = multiprocessing.Process(
+            target=serve,
+            args=(self.model_loader, self._requests, [client.responses for client in self.clients],
+                  self.max_batch_size, self.max_wait),
+            daemon=True)
+        self._process.start()
+
+        return self
+
+    def stop(self):
+        if self._process is None:
+            return
+
+        self._requests.put(None)
+        self._process.join()
+        self._manager.shutdown()
+
+        self._process = None
+        self._manager = None
+        self.clients = []
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
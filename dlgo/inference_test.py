@@ -0,0 +1,53 @@
+import multiprocessing
+import unittest
+
+import numpy as np
+
+from dlgo.inference import InferenceServer
+
+
+class SumModel:
+    def __init__(self):
+        self.num_calls = 0
+
+    def predict(self, x):
+        self.num_calls += 1
+        sums = x.reshape(len(x), -1).sum(axis=1)
+        return [sums, np.full(len(x), self.num_calls)]
+
+
+class FailingModel:
+    def predict(self, x):
+        raise ValueError('bad input shape')
+
+
+def failing_loader():
+    raise IOError('no such model')
+
+
+def worker(client, value):
+    priors, calls = client.predict(np.full((2, 3), value))
+    return priors.tolist(), len(calls)
+
+
+class InferenceServerTest(unittest.TestCase):
+    def test_predictions_go_back_to_their_client(self):
+        with InferenceServer(SumModel, num_clients=4, max_wait=0.05) as server:
+            with multiprocessing.Pool(4) as pool:
+                results = pool.starmap(worker, [(client, i) for i, client in enumerate(server.clients)])
+
+        for i, (sums, num_outputs) in enumerate(results):
+            self.assertEqual([3 * i, 3 * i], sums)
+            self.assertEqual(2, num_outputs)
+
+    def test_errors_are_raised_in_the_client(self):
+        for model_loader, message in [(FailingModel, 'bad input shape'), (failing_loader, 'no such model')]:
+            with InferenceServer(model_loader, num_clients=2) as server:
+                for client in server.clients:
+                    with self.assertRaises(RuntimeError) as context:
+                        client.predict(np.zeros((1, 3)))
+                    self.assertIn(message, str(context.exception))
+
+
+if __name__ == '__main__':
+    unittest.main()
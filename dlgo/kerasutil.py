@@ -35,6 +35,12 @@ def load_model_from_hdf5_group(f, custom_objects=None):
         os.unlink(tempfname)
 
 
+def load_agent_model(filename):
+    """Loads just the model of an agent saved to filename, e.g. to serve it from an InferenceServer."""
+    with h5py.File(filename, 'r') as h5file:
+        return load_model_from_hdf5_group(h5file['model'])
+
+
 def set_gpu_memory_target(frac):
     """Configure Tensorflow to use a fraction of available GPU memory.
 
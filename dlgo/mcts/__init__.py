@@ -1,3 +1,4 @@
 from .mcts import MCTSAgent
+from .rollout import BatchRollout
 
-__all__ = ["MCTSAgent"]
+__all__ = ["MCTSAgent", "BatchRollout"]
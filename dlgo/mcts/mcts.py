@@ -3,30 +3,39 @@ import math
 from dlgo.gotypes import Player
 from dlgo.agent import Agent
 from dlgo.agent.naive import FastRandomBot
+from dlgo.goboard_array import GameState
+from dlgo.mcts.rollout import BatchRollout
+from dlgo.search_stats import NO_STATS, SearchStats
 
 
 class MCTSNode(object):
-    def __init__(self, game_state, parent=None, move=None):
+    def __init__(self, game_state, parent=None, move=None, stats=NO_STATS):
         self.game_state = game_state
         self.parent = parent
         self.move = move
         self.win_counts = {Player.black: 0, Player.white: 0}
         self.num_rollouts = 0
         self.children = []
+        # a SearchStats, shared by the whole tree
+        self.stats = stats
+
+        stats.enter('legality')
         self.unvisited_moves = game_state.legal_moves()
+        stats.leave()
+        stats.count('nodes')
 
     def add_random_child(self):
         index = random.randint(0, len(self.unvisited_moves) - 1)
         new_move = self.unvisited_moves.pop(index)
         new_game_state = self.game_state.apply_move(new_move)
-        new_node = MCTSNode(new_game_state, self, new_move)
+        new_node = MCTSNode(new_game_state, self, new_move, self.stats)
         self.children.append(new_node)
 
         return new_node
 
-    def record_win(self, winner):
-        self.win_counts[winner] += 1
-        self.num_rollouts += 1
+    def record_win(self, winner, count=1):
+        self.win_counts[winner] += count
+        self.num_rollouts += count
 
     def can_add_child(self):
         return len(self.unvisited_moves) > 0
@@ -39,29 +48,49 @@ class MCTSNode(object):
 
 
 class MCTSAgent(Agent):
-    def __init__(self, num_rounds, temperature):
+    def __init__(self, num_rounds, temperature, rollouts_per_leaf=None):
         super().__init__()
 
         self.num_rounds = num_rounds
         self.temperature = temperature
+        # when set, every leaf is scored with this many batched rollouts instead of a single game
+        self.rollouts_per_leaf = rollouts_per_leaf
+        self.rollout = None
+        self.search_stats = SearchStats()
 
     def select_move(self, game_state):
-        root = MCTSNode(game_state)
+        stats = self.search_stats
+        stats.begin_move()
+
+        root = MCTSNode(game_state, stats=stats)
 
         for i in range(self.num_rounds):
             node = root
 
+            stats.enter('select')
             while (not node.can_add_child()) and (not node.is_terminal()):
                 node = self.select_child(node)
+            stats.leave()
 
             if node.can_add_child():
+                stats.enter('expand')
                 node = node.add_random_child()
+                stats.leave()
 
-            winner = self.simulate_random_game(node.game_state)
+            stats.enter('rollout')
+            if self.rollouts_per_leaf is None:
+                wins = {self.simulate_random_game(node.game_state): 1}
+            else:
+                wins = self.simulate_random_games(node.game_state, self.rollouts_per_leaf)
+            stats.leave()
 
+            stats.enter('backup')
             while node is not None:
-                node.record_win(winner)
+                for winner, count in wins.items():
+                    node.record_win(winner, count)
                 node = node.parent
+            stats.leave()
+        stats.count('rounds', self.num_rounds)
 
         scored_moves = [(child.winning_frac(game_state.next_player), child.move, child.num_rollouts)
                         for child in root.children]
@@ -84,8 +113,12 @@ class MCTSAgent(Agent):
                 best_move = child.move
 
         print("Select move %s with win pct %.3f" % (best_move, best_pct))
+        stats.end_move()
         return best_move
 
+    def diagnostics(self):
+        return self.search_stats.diagnostics()
+
     def select_child(self, node):
         total_rollouts = sum(child.num_rollouts for child in node.children)
         log_rollouts = math.log(total_rollouts)
@@ -104,6 +137,18 @@ class MCTSAgent(Agent):
 
         return best_child
 
+    def simulate_random_games(self, game_state, num_games):
+        """Plays num_games random games from game_state at once and returns the win count per player."""
+        dim = (game_state.board.num_rows, game_state.board.num_cols)
+
+        if self.rollout is None or (self.rollout.num_rows, self.rollout.num_cols) != dim:
+            self.rollout = BatchRollout(*dim)
+
+        winners = self.rollout.play(game_state, num_games)
+        black_wins = int((winners == Player.black.value).sum())
+
+        return {Player.black: black_wins, Player.white: num_games - black_wins}
+
     @staticmethod
     def simulate_random_game(game_state):
         bots = {
@@ -111,8 +156,11 @@ class MCTSAgent(Agent):
             Player.white: FastRandomBot()
         }
 
+        # play the rollout in place on a private array-backed copy
+        game_state = GameState.from_game_state(game_state)
+
         while not game_state.is_over():
             bot_move = bots[game_state.next_player].select_move(game_state)
-            game_state = game_state.apply_move(bot_move)
+            game_state.play(bot_move)
 
         return game_state.winner()
@@ -0,0 +1,207 @@
+"""Batched random playouts.
+
+Every game in a batch is one row of an (N, size) int8 colour array laid out
+like goboard_array: a 1-D board padded with a border, point (row, col) at
+row * stride + col. Stones also carry the index of their string's head in a
+label array, so captures and merges are a comparison against at most four
+labels per board.
+
+Liberties are never listed. Every string keeps the count, sum and sum of
+squares of the indices of its pseudo-liberties (empty neighbours, counted
+once per adjacent stone), recomputed for all boards with a few array ops per
+move. A string is in atari exactly when count * sum_of_squares == sum ** 2,
+i.e. when all of its pseudo-liberties are the same point.
+"""
+
+import numpy as np
+
+from dlgo import goboard_array
+from dlgo.goboard_array import EMPTY, BLACK, WHITE, BORDER
+
+__all__ = ['BatchRollout']
+
+
+class BatchRollout:
+    """Plays many random games from one position in lockstep.
+
+    Moves are chosen like FastRandomBot: uniformly among legal plays that
+    don't fill one of the player's own eyes, passing when there are none.
+    Only simple ko is enforced during rollouts, positional superko is not.
+    Finished games are scored like dlgo.scoring.compute_game_result.
+    """
+    def __init__(self, num_rows, num_cols, komi=7.5, max_moves=None):
+        table = goboard_array.get_board_table((num_rows, num_cols))
+        stride = table.stride
+
+        self.num_rows = num_rows
+        self.num_cols = num_cols
+        self.size = table.size
+        self.komi = komi
+        # a cap on game length, random games almost never get close to it
+        self.max_moves = max_moves if max_moves is not None else 4 * num_rows * num_cols
+
+        self.on_board = np.array(table.on_board, dtype=np.int64)
+        self.neighbors = self.on_board[:, None] + np.array([-stride, stride, -1, 1])
+        self.corners = self.on_board[:, None] + np.array([-stride - 1, -stride + 1, stride - 1, stride + 1])
+        self.neighbors_squared = self.neighbors ** 2
+
+        empty_colors = np.array(table.empty_colors, dtype=np.int8)
+        self.off_board_corners = (empty_colors[self.corners] == BORDER).sum(axis=1)
+
+        # position of every on-board point in the on_board list
+        self.position = np.full(self.size, -1, dtype=np.int64)
+        self.position[self.on_board] = np.arange(len(self.on_board))
+
+    def play(self, game_state, num_games):
+        """Plays num_games random games from game_state.
+
+        Returns an int8 array with the winner of every game as a Player value.
+        """
+        if not isinstance(game_state.board, goboard_array.Board):
+            game_state = goboard_array.GameState.from_game_state(game_state)
+        board = game_state.board
+
+        colors = np.tile(np.frombuffer(board._color, dtype=np.int8), (num_games, 1))
+        heads = np.frombuffer(board._head, dtype=np.int16).astype(np.int64)
+        is_stone = (colors[0] == BLACK) | (colors[0] == WHITE)
+        labels = np.tile(np.where(is_stone, heads, 0), (num_games, 1))
+
+        last_move = game_state.last_move
+        ko = np.full(num_games, -1, dtype=np.int64)
+        if last_move is not None and last_move.is_play and board._ko:
+            ko[:] = self.position[board._ko]
+
+        passes = np.zeros(num_games, dtype=np.int64)
+        if game_state.is_over():
+            passes[:] = 2
+        elif last_move is not None and last_move.is_pass:
+            passes[:] = 1
+
+        color = game_state.next_player.value
+
+        for _ in range(self.max_moves):
+            active = passes < 2
+            if not active.any():
+                break
+
+            moved = self._step(colors, labels, ko, color, active)
+
+            passes[moved] = 0
+            passes[active & ~moved] += 1
+            color = 3 - color
+
+        return self._winners(colors)
+
+    def _step(self, colors, labels, ko, color, active):
+        num_games = colors.shape[0]
+        other = 3 - color
+        rows = np.arange(num_games)
+        on_board = self.on_board
+        neighbors = self.neighbors
+
+        empty = colors[:, on_board] == EMPTY
+        stones = ~empty
+
+        # pseudo-liberty statistics of every stone, summed per string head
+        neighbor_colors = colors[:, neighbors]
+        neighbor_empty = neighbor_colors == EMPTY
+        keys = (rows[:, None] * self.size + labels[:, on_board]).ravel()
+        length = num_games * self.size
+
+        def per_string(values):
+            return np.bincount(keys, weights=(values * stones).ravel(), minlength=length).reshape(num_games, -1)
+
+        count = per_string(neighbor_empty.sum(axis=2))
+        total = per_string((neighbor_empty * neighbors).sum(axis=2))
+        squares = per_string((neighbor_empty * self.neighbors_squared).sum(axis=2))
+        in_atari = (count > 0) & (count * squares == total * total)
+
+        neighbor_labels = labels[:, neighbors]
+        neighbor_atari = np.take_along_axis(in_atari, neighbor_labels.reshape(num_games, -1), axis=1) \
+            .reshape(neighbor_labels.shape)
+
+        own = neighbor_colors == color
+        captures = (neighbor_colors == other) & neighbor_atari
+
+        legal = empty & (neighbor_empty.any(axis=2) | (own & ~neighbor_atari).any(axis=2) | captures.any(axis=2))
+        has_ko = ko >= 0
+        legal[rows[has_ko], ko[has_ko]] = False
+
+        # same rule as dlgo.agent.helpers.is_point_an_eye
+        friendly_corners = (colors[:, self.corners] == color).sum(axis=2)
+        off_board = self.off_board_corners
+        eye_corners = np.where(off_board > 0, off_board + friendly_corners == 4, friendly_corners >= 3)
+        eye = (own | (neighbor_colors == BORDER)).all(axis=2) & eye_corners
+
+        candidates = legal & ~eye & active[:, None]
+        moved = candidates.any(axis=1)
+        ko[active] = -1
+
+        keys = np.random.random_sample(candidates.shape)
+        keys[~candidates] = -1.0
+        choice = keys.argmax(axis=1)
+
+        play = np.nonzero(moved)[0]
+        if len(play) == 0:
+            return moved
+
+        pos = choice[play]
+        idx = on_board[pos]
+        play_labels = neighbor_labels[play, pos]
+        captured_labels = np.where(captures[play, pos], play_labels, -1)
+        merged_labels = np.where(own[play, pos], play_labels, -1)
+
+        sub_colors = colors[play]
+        sub_labels = labels[play]
+        sub_rows = np.arange(len(play))
+
+        # flag the captured and merged strings by head, then look every stone's head up
+        flags = np.zeros(sub_labels.shape, dtype=np.int8)
+        flags[sub_rows[:, None], np.maximum(captured_labels, 0)] = 1
+        flags[sub_rows[:, None], np.maximum(merged_labels, 0)] = 2
+        flags[:, 0] = 0
+        stone_flags = np.take_along_axis(flags, sub_labels, axis=1)
+
+        captured = stone_flags == 1
+        sub_colors[captured] = EMPTY
+        sub_labels[captured] = 0
+
+        merged = stone_flags == 2
+        sub_labels[merged] = np.broadcast_to(idx[:, None], sub_labels.shape)[merged]
+        sub_colors[sub_rows, idx] = color
+        sub_labels[sub_rows, idx] = idx
+
+        # a lone stone that took a single stone and has no other liberty sets up a ko
+        num_captured = captured.sum(axis=1)
+        liberties = (sub_colors[sub_rows[:, None], neighbors[pos]] == EMPTY).sum(axis=1)
+        is_ko = (num_captured == 1) & (merged_labels < 0).all(axis=1) & (liberties == 1)
+        ko[play[is_ko]] = self.position[captured[is_ko].argmax(axis=1)]
+
+        colors[play] = sub_colors
+        labels[play] = sub_labels
+
+        return moved
+
+    def _winners(self, colors):
+        on_board = self.on_board
+        neighbors = self.neighbors
+        empty = colors[:, on_board] == EMPTY
+
+        # flood every empty region from the stones around it
+        reach = {}
+        for color in (BLACK, WHITE):
+            reached = np.zeros(colors.shape, dtype=bool)
+            reached[:, on_board] = empty & (colors[:, neighbors] == color).any(axis=2)
+
+            while True:
+                grown = reached[:, on_board] | (empty & reached[:, neighbors].any(axis=2))
+                if (grown == reached[:, on_board]).all():
+                    break
+                reached[:, on_board] = grown
+
+            reach[color] = reached[:, on_board]
+
+        black = (colors == BLACK).sum(axis=1) + (reach[BLACK] & ~reach[WHITE]).sum(axis=1)
+        white = (colors == WHITE).sum(axis=1) + (reach[WHITE] & ~reach[BLACK]).sum(axis=1)
+
+        return np.where(black > white + self.komi, BLACK, WHITE).astype(np.int8)
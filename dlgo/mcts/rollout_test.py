@@ -0,0 +1,33 @@
+import unittest
+
+from dlgo.goboard_array import GameState, Move
+from dlgo.gotypes import Player, Point
+from dlgo.mcts.rollout import BatchRollout
+from dlgo.scoring import compute_game_result
+
+
+class BatchRolloutTest(unittest.TestCase):
+    def test_finished_game(self):
+        game = GameState.new_game(5)
+        for move in [Move.play(Point(3, 3)), Move.pass_turn(), Move.pass_turn()]:
+            game = game.apply_move(move)
+
+        winners = BatchRollout(5, 5).play(game, 8)
+        self.assertEqual(8, len(winners))
+        self.assertTrue((winners == compute_game_result(game).winner.value).all())
+
+    def test_two_eyes(self):
+        game = GameState.new_game(5)
+        for row in range(1, 6):
+            for col in range(1, 6):
+                if (row, col) not in [(1, 1), (5, 5)]:
+                    game.board.place_stone(Player.black, Point(row, col))
+        game.next_player = Player.white
+
+        # white can't play into either eye and black won't fill its own
+        winners = BatchRollout(5, 5).play(game, 16)
+        self.assertTrue((winners == Player.black.value).all())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,7 @@
 import random
 from dlgo.agent import Agent
 from dlgo.gotypes import Player
+from dlgo import goboard_array
 
 MIN_SCORE, MAX_SCORE = -999999, 999999
 
@@ -15,9 +16,9 @@ def alpha_beta_result(game_state, max_depth, best_black, best_white, eval_fn):
     best_so_far = MIN_SCORE
 
     for candidate_move in game_state.legal_moves():
-        next_state = game_state.apply_move(candidate_move)
-
-        opponent_best_result = alpha_beta_result(next_state, max_depth - 1, best_black, best_white, eval_fn)
+        game_state.play(candidate_move)
+        opponent_best_result = alpha_beta_result(game_state, max_depth - 1, best_black, best_white, eval_fn)
+        game_state.undo()
         best_so_far = max(best_so_far, -1 * opponent_best_result)
 
         if game_state.next_player == Player.white:
@@ -54,12 +55,17 @@ class AlphaBetaAgent(Agent):
         best_score = None
         best_black, best_white = MIN_SCORE, MIN_SCORE
 
+        # the search plays moves in place and takes them back again
+        search_state = goboard_array.GameState.from_game_state(game_state)
+
         # all possible moves
-        for possible_move in game_state.legal_moves():
+        for possible_move in search_state.legal_moves():
             # game state if this move were selected
-            next_state = game_state.apply_move(possible_move)
+            search_state.play(possible_move)
 
-            opponent_best_outcome = alpha_beta_result(next_state, self.max_depth, best_black, best_white, self.eval_fn)
+            opponent_best_outcome = alpha_beta_result(search_state, self.max_depth, best_black, best_white,
+                                                      self.eval_fn)
+            search_state.undo()
             our_best_outcome = -opponent_best_outcome
 
             if (not best_moves) or our_best_outcome > best_score:
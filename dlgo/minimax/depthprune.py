@@ -1,5 +1,6 @@
 import random
 from dlgo.agent import Agent
+from dlgo import goboard_array
 
 MIN_SCORE, MAX_SCORE = -999999, 999999
 
@@ -14,8 +15,9 @@ def best_result(game_state, max_depth, eval_fn):
     best_so_far = MIN_SCORE
 
     for candidate in game_state.legal_moves():
-        next_state = game_state.apply_move(candidate)
-        opponent_best_result = best_result(next_state, max_depth - 1, eval_fn)
+        game_state.play(candidate)
+        opponent_best_result = best_result(game_state, max_depth - 1, eval_fn)
+        game_state.undo()
         best_so_far = max(best_so_far, -1 * opponent_best_result)
 
     return best_so_far
@@ -32,12 +34,16 @@ class DepthPrunedAgent(Agent):
         best_moves = []
         best_score = None
 
+        # the search plays moves in place and takes them back again
+        search_state = goboard_array.GameState.from_game_state(game_state)
+
         # loop over all possible moves given this state
-        for possible_move in game_state.legal_moves():
-            next_state = game_state.apply_move(possible_move)
+        for possible_move in search_state.legal_moves():
+            search_state.play(possible_move)
 
             # given this new game state, figure out opponent's best outcome
-            opponent_best_outcome = best_result(next_state, self.max_depth, self.eval_fn)
+            opponent_best_outcome = best_result(search_state, self.max_depth, self.eval_fn)
+            search_state.undo()
 
             our_best_outcome = -1 * opponent_best_outcome
 
@@ -2,6 +2,7 @@ import enum
 import random
 from dlgo.agent import Agent
 from dlgo.goboard_fast import GameState
+from dlgo import goboard_array
 
 
 class GameResult(enum.Enum):
@@ -31,8 +32,9 @@ def best_result(game_state: GameState):
     best_result_so_far = GameResult.loss
 
     for candidate_move in game_state.legal_moves():
-        next_state = game_state.apply_move(candidate_move)
-        opponent_best_result = best_result(next_state)
+        game_state.play(candidate_move)
+        opponent_best_result = best_result(game_state)
+        game_state.undo()
         our_result = reverse_game_result(opponent_best_result)
 
         best_result_so_far = max(our_result, best_result_so_far)
@@ -46,13 +48,17 @@ class MinimaxAgent(Agent):
         draw_moves = []
         losing_moves = []
 
+        # the search plays moves in place and takes them back again
+        search_state = goboard_array.GameState.from_game_state(game_state)
+
         # loop through all legal moves:
-        for move in game_state.legal_moves():
+        for move in search_state.legal_moves():
             # state of the game after this move is applied
-            next_state = game_state.apply_move(move)
+            search_state.play(move)
 
             # determine opponent's best outcome given that state
-            opponent_best_outcome = best_result(next_state)
+            opponent_best_outcome = best_result(search_state)
+            search_state.undo()
 
             our_best_outcome = reverse_game_result(opponent_best_outcome)
 
@@ -0,0 +1,153 @@
+"""Prediction cache for agent models.
+
+Self-play games and evaluation matches keep reaching the same positions,
+especially in the opening. A PredictionCache wraps a model and remembers its
+output per position, keyed by the encoder name, the board size, the Zobrist
+hash and the player to move, so every position is only run through the model
+once per process. It holds at most max_entries positions, and at most
+max_bytes of outputs if that is set, and evicts the least recently used ones
+first.
+
+Agents call predict_states(model, encoder, game_states) in place of encoding
+the states and calling model.predict. With a plain model that is all it does,
+with a PredictionCache only the positions it hasn't seen are predicted.
+Agents that encode the states anyway, to record them as experience, pass
+the encoding as model_input so it isn't done twice.
+
+The key doesn't cover the history of the game, so the cache is only exact for
+encoders that encode nothing but the board and the player to move.
+"""
+
+from collections import OrderedDict
+
+import numpy as np
+
+from dlgo.search_stats import NO_STATS
+
+__all__ = [
+    'PredictionCache',
+    'predict_states',
+]
+
+
+def predict_states(model, encoder, game_states, stats=NO_STATS, model_input=None):
+    """Returns model.predict on the encoded game_states, using the cache if model is a PredictionCache.
+
+    model_input, if given, is the encoding of game_states and is used in place of encoding them again.
+    Encoding and prediction are timed as the encode and predict phases of stats, a SearchStats.
+    """
+    if isinstance(model, PredictionCache):
+        return model.predict_states(encoder, game_states, stats, model_input)
+
+    if model_input is None:
+        stats.enter('encode')
+        model_input = encoder.encode_batch(game_states)
+        stats.leave()
+    stats.enter('predict')
+    outputs = model.predict(model_input)
+    stats.leave()
+    return outputs
+
+
+class PredictionCache:
+    """Wraps a model and caches its predictions per position.
+
+    predict, fit and anything else are passed on to the wrapped model, so the
+    cache can be used wherever the model was. Fitting the model clears the cache.
+    """
+    def __init__(self, model, max_entries=100000, max_bytes=None):
+        self.model = model
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+
+        self.hits = 0
+        self.misses = 0
+        self.num_bytes = 0
+        self._entries = OrderedDict()
+
+    def __getattr__(self, name):
+        # only called for attributes not found on the cache itself, or for all of them while unpickling
+        if 'model' not in self.__dict__:
+            raise AttributeError(name)
+        return getattr(self.model, name)
+
+    def predict(self, x, *args, **kwargs):
+        return self.model.predict(x, *args, **kwargs)
+
+    def fit(self, *args, **kwargs):
+        self.clear()
+        return self.model.fit(*args, **kwargs)
+
+    @staticmethod
+    def key(encoder, game_state):
+        board = game_state.board
+        return encoder.name(), board.num_rows, board.num_cols, board.zobrist_hash(), game_state.next_player
+
+    def predict_states(self, encoder, game_states, stats=NO_STATS, model_input=None):
+        keys = [self.key(encoder, game_state) for game_state in game_states]
+
+        rows = []
+        missing = []
+        for i, key in enumerate(keys):
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                missing.append(i)
+            else:
+                self.hits += 1
+                self._entries.move_to_end(key)
+            rows.append(entry)
+
+        stats.count('cache_hits', len(game_states) - len(missing))
+        stats.count('cache_misses', len(missing))
+
+        if missing:
+            if model_input is None:
+                stats.enter('encode')
+                model_input = encoder.encode_batch([game_states[i] for i in missing])
+                stats.leave()
+            else:
+                model_input = np.asarray(model_input)[missing]
+            stats.enter('predict')
+            outputs = self.model.predict(model_input)
+            stats.leave()
+            multiple_outputs = isinstance(outputs, (list, tuple))
+
+            for j, i in enumerate(missing):
+                row = tuple(output[j] for output in outputs) if multiple_outputs else outputs[j]
+                rows[i] = row
+                self.put(keys[i], row)
+        else:
+            multiple_outputs = isinstance(rows[0], tuple)
+
+        # reassemble the rows in the shape model.predict would have returned
+        if multiple_outputs:
+            return [np.array(output) for output in zip(*rows)]
+
+        return np.array(rows)
+
+    def put(self, key, row):
+        if key in self._entries:
+            self.num_bytes -= self.row_bytes(self._entries.pop(key))
+
+        self._entries[key] = row
+        self.num_bytes += self.row_bytes(row)
+
+        while self._entries and (len(self._entries) > self.max_entries or
+                                 (self.max_bytes is not None and self.num_bytes > self.max_bytes)):
+            _, evicted = self._entries.popitem(last=False)
+            self.num_bytes -= self.row_bytes(evicted)
+
+    @staticmethod
+    def row_bytes(row):
+        if isinstance(row, tuple):
+            return sum(np.asarray(output).nbytes for output in row)
+
+        return np.asarray(row).nbytes
+
+    def clear(self):
+        self._entries.clear()
+        self.num_bytes = 0
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,57 @@
+import unittest
+
+import numpy as np
+
+from dlgo.goboard_fast import GameState, Move
+from dlgo.gotypes import Point
+from dlgo.prediction_cache import PredictionCache, predict_states
+from dlgo.zero.encoder import ZeroEncoder
+
+
+class TwoHeadModel:
+    def __init__(self):
+        self.num_states = 0
+
+    def predict(self, x):
+        self.num_states += len(x)
+        sums = x.reshape(len(x), -1).sum(axis=1)
+        return [np.stack([sums, -sums], axis=1), sums.reshape(-1, 1)]
+
+
+class PredictionCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.encoder = ZeroEncoder(5)
+        self.empty = GameState.new_game(5)
+        self.one_stone = self.empty.apply_move(Move.play(Point(3, 3)))
+
+    def test_cached_predictions_match_the_model(self):
+        cache = PredictionCache(TwoHeadModel())
+        expected = predict_states(TwoHeadModel(), self.encoder, [self.empty, self.one_stone])
+
+        predict_states(cache, self.encoder, [self.one_stone])
+        priors, values = predict_states(cache, self.encoder, [self.empty, self.one_stone])
+
+        np.testing.assert_array_equal(expected[0], priors)
+        np.testing.assert_array_equal(expected[1], values)
+        self.assertEqual(2, cache.model.num_states)
+        self.assertEqual((1, 2), (cache.hits, cache.misses))
+
+    def test_least_recently_used_position_is_evicted(self):
+        cache = PredictionCache(TwoHeadModel(), max_entries=1)
+        predict_states(cache, self.encoder, [self.empty])
+        predict_states(cache, self.encoder, [self.one_stone])
+        predict_states(cache, self.encoder, [self.empty])
+
+        self.assertEqual(1, len(cache))
+        self.assertEqual(3, cache.model.num_states)
+
+    def test_byte_limit(self):
+        cache = PredictionCache(TwoHeadModel(), max_bytes=1)
+        predict_states(cache, self.encoder, [self.empty])
+
+        self.assertEqual(0, len(cache))
+        self.assertEqual(0, cache.num_bytes)
+
+
+if __name__ == '__main__':
+    unittest.main()
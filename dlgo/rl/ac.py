@@ -7,6 +7,7 @@ from dlgo import goboard
 from dlgo import kerasutil
 from dlgo.agent import Agent
 from dlgo.agent.helpers import is_point_an_eye
+from dlgo.prediction_cache import predict_states
 
 __all__ = [
     'ACAgent',
@@ -32,11 +33,15 @@ class ACAgent(Agent):   # 12.6
     def select_move(self, game_state):
         num_moves = self.encoder.board_width * self.encoder.board_height
 
-        board_tensor = self.encoder.encode(game_state)
-        x = np.array([board_tensor])
+        # only a collector that stores full board tensors needs the encoding, the prediction reuses it
+        board_tensor = None
+        model_input = None
+        if self.collector is not None and not self.collector.compact:
+            board_tensor = self.encoder.encode(game_state)
+            model_input = np.array([board_tensor])
 
         # Because this is a two-output model, predict returns a tuple containing two NumPy arrays
-        actions, values = self.model.predict(x)
+        actions, values = predict_states(self.model, self.encoder, [game_state], model_input=model_input)
 
         # predict is a batch call that can process several boards at once,
         # so you must select the first element of the array to get the probability
@@ -64,7 +69,7 @@ class ACAgent(Agent):   # 12.6
                 if self.collector is not None:
                     # Include the estimated value in the experience buffer
                     self.collector.record_decision(
-                        state=board_tensor,
+                        state=game_state if self.collector.compact else board_tensor,
                         action=point_idx,
                         estimated_value=estimated_value)
                 return goboard.Move.play(point)
@@ -92,7 +97,7 @@ class ACAgent(Agent):   # 12.6
             value_target[i] = reward
 
         self.model.fit(
-            experience.states,
+            experience.encoded_states(self.encoder),
             [policy_target, value_target],
             batch_size=batch_size,
             epochs=1)
@@ -109,8 +114,10 @@ class ACAgent(Agent):   # 12.6
         return {'value': self.last_state_value}
 
 
-def load_ac_agent(h5file):
-    model = kerasutil.load_model_from_hdf5_group(h5file['model'])
+def load_ac_agent(h5file, model=None):
+    # model can be given to use something else in place of the saved network, e.g. an InferenceClient
+    if model is None:
+        model = kerasutil.load_model_from_hdf5_group(h5file['model'])
     encoder_name = h5file['encoder'].attrs['name']
     if not isinstance(encoder_name, str):
         encoder_name = encoder_name.decode('ascii')
@@ -1,8 +1,12 @@
 import numpy as np
 
+from dlgo.compact import encode_positions, is_packed, pack_position
+
 
 class ExperienceCollector:
-    def __init__(self):     # 9.16 and 12.1
+    def __init__(self, compact=False):     # 9.16 and 12.1
+        # With compact=True agents record game states, which are kept as packed positions instead of tensors
+        self.compact = compact
         # These can span many episodes
         self.states = []
         self.actions = []
@@ -21,6 +25,8 @@ class ExperienceCollector:
     # Saves a single decision in the current episode and
     # the agent is responsive for encoding the state and action.
     def record_decision(self, state, action, estimated_value=0):    # 12.2
+        if self.compact:
+            state = pack_position(state)
         self._current_episode_states.append(state)
         self._current_episode_actions.append(action)
         self._current_episode_estimated_values.append(estimated_value)      # Added in 12.2
@@ -56,6 +62,12 @@ class ExperienceBuffer:
         self.rewards = rewards
         self.advantages = advantages    # Added in 12.4
 
+    # The states as model input, packed positions (see dlgo.compact) are encoded here
+    def encoded_states(self, encoder):
+        if is_packed(self.states):
+            return encode_positions(encoder, self.states)
+        return self.states
+
     def serialize(self, h5file):        # 9.14
         h5file.create_group('experience')
         h5file['experience'].create_dataset('states', data=self.states)
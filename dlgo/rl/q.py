@@ -85,7 +85,7 @@ class QAgent(Agent):    # 11.5
                 # Records the decision in an experience buffers; see chapter 9
                 if self.collector is not None:
                     self.collector.record_decision(
-                        state=board_tensor,
+                        state=game_state if self.collector.compact else board_tensor,
                         action=moves[move_idx],
                     )
                 return goboard.Move.play(point)
@@ -132,7 +132,7 @@ class QAgent(Agent):    # 11.5
 
         # Passes the two different inputs as a list
         self.model.fit(
-            [experience.states, actions], y,
+            [experience.encoded_states(self.encoder), actions], y,
             batch_size=batch_size,
             epochs=1)
 
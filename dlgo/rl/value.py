@@ -7,6 +7,7 @@ from dlgo import goboard
 from dlgo import kerasutil
 from dlgo.agent import Agent
 from dlgo.agent.helpers import is_point_an_eye
+from dlgo.prediction_cache import predict_states
 
 __all__ = [
     'ValueAgent',
@@ -26,9 +27,7 @@ class ValueAgent(Agent):
         self.last_move_value = 0
 
     def predict(self, game_state):
-        encoded_state = self.encoder.encode(game_state)
-        input_tensor = np.array([encoded_state])
-        return self.model.predict(input_tensor)[0]
+        return predict_states(self.model, self.encoder, [game_state])[0]
 
     def set_temperature(self, temperature):
         self.temperature = temperature
@@ -45,23 +44,17 @@ class ValueAgent(Agent):
 
         # Loop over all legal moves.
         moves = []
-        board_tensors = []
-        board_tensor = None
+        next_states = []
         for move in game_state.legal_moves():
             if not move.is_play:
                 continue
-            next_state = game_state.apply_move(move)
-            board_tensor = self.encoder.encode(next_state)
             moves.append(move)
-            board_tensors.append(board_tensor)
+            next_states.append(game_state.apply_move(move))
         if not moves:
             return goboard.Move.pass_turn()
 
-        # num_moves = len(moves)
-        board_tensors = np.array(board_tensors)
-
         # Values of the next state from opponent's view.
-        opp_values = self.model.predict(board_tensors)
+        opp_values = predict_states(self.model, self.encoder, next_states)
         opp_values = opp_values.reshape(len(moves))
 
         # Values from our point of view.
@@ -81,7 +74,7 @@ class ValueAgent(Agent):
                                    game_state.next_player):
                 if self.collector is not None:
                     self.collector.record_decision(
-                        state=board_tensor,
+                        state=next_states[-1] if self.collector.compact else self.encoder.encode(next_states[-1]),
                         action=self.encoder.encode_point(move.point),
                     )
                 self.last_move_value = float(values[move_idx])
@@ -119,7 +112,7 @@ class ValueAgent(Agent):
             y[i] = 1 if reward > 0 else 0
 
         self.model.fit(
-            experience.states, y,
+            experience.encoded_states(self.encoder), y,
             batch_size=batch_size,
             epochs=1)
 
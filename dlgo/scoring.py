@@ -1,5 +1,8 @@
 from __future__ import absolute_import
 from collections import namedtuple
+
+import numpy as np
+
 from dlgo.gotypes import Player
 from dlgo.gotypes import Point
 
@@ -25,6 +28,21 @@ class Territory:
                 self.num_dame += 1
                 self.dame_points.append(point)
 
+    @classmethod
+    def from_arrays(cls, colors, owners):
+        """Builds a Territory from a colour array and the owners territory_arrays returns for it."""
+        territory = cls({})
+        stones = colors != EMPTY
+        territory.num_black_stones = int(np.count_nonzero(colors == BLACK))
+        territory.num_white_stones = int(np.count_nonzero(colors == WHITE))
+        territory.num_black_territory = int(np.count_nonzero(~stones & (owners == BLACK)))
+        territory.num_white_territory = int(np.count_nonzero(~stones & (owners == WHITE)))
+        dame = ~stones & (owners == EMPTY)
+        territory.num_dame = int(np.count_nonzero(dame))
+        rows, cols = np.nonzero(dame)
+        territory.dame_points = [Point(row=r + 1, col=c + 1) for r, c in zip(rows.tolist(), cols.tolist())]
+        return territory
+
 
 class GameResult(namedtuple('GameResult', 'b w komi')):
     @property
@@ -45,69 +63,165 @@ class GameResult(namedtuple('GameResult', 'b w komi')):
         return 'W+%.1f' % (w - self.b,)
 
 
-""" evaluate_territory:
-Map a board into territory and dame.
+""" Area scoring on arrays:
 
-Any points that are completely surrounded by a single color are
-counted as territory; it makes no attempt to identify even
-trivially dead groups.
+A board is a flat array of colour values (EMPTY, BLACK or WHITE), one per
+point, followed by an OFF_BOARD sentinel that off-board neighbours point
+to. Empty regions are labelled as connected components by propagating the
+smallest point index through each region, with pointer jumping, so a whole
+board takes a handful of array passes. An empty region belongs to black or
+white when it only touches that colour's stones and is dame otherwise, the
+same rule evaluate_territory has always used; it makes no attempt to
+identify even trivially dead groups.
 """
 
+EMPTY, BLACK, WHITE, OFF_BOARD = 0, Player.black.value, Player.white.value, 3
 
-def evaluate_territory(board):
+_grids = {}
 
-    status = {}
-    for r in range(1, board.num_rows + 1):
-        for c in range(1, board.num_cols + 1):
-            p = Point(row=r, col=c)
-            if p in status:
-                continue
-            stone = board.get(p)
-            if stone is not None:
-                status[p] = board.get(p)
-            else:
-                group, neighbors = _collect_region(p, board)
-                if len(neighbors) == 1:
-                    neighbor_stone = neighbors.pop()
-                    stone_str = 'b' if neighbor_stone == Player.black else 'w'
-                    fill_with = 'territory_' + stone_str
-                else:
-                    fill_with = 'dame'
-                for pos in group:
-                    status[pos] = fill_with
-    return Territory(status)
-
-
-""" _collect_region:
-
-Find the contiguous section of a board containing a point. Also
-identify all the boundary points.
-"""
+
+class _Grid:
+    def __init__(self, num_rows, num_cols):
+        self.shape = (num_rows, num_cols)
+        self.num_points = num_rows * num_cols
+
+        rows, cols = np.divmod(np.arange(self.num_points), num_cols)
+        self.neighbors = np.stack([self._index(rows - 1, cols), self._index(rows + 1, cols),
+                                   self._index(rows, cols - 1), self._index(rows, cols + 1)], axis=1)
+        self.points = [Point(row=r + 1, col=c + 1) for r, c in zip(rows.tolist(), cols.tolist())]
+
+    def _index(self, rows, cols):
+        num_rows, num_cols = self.shape
+        on_board = (rows >= 0) & (rows < num_rows) & (cols >= 0) & (cols < num_cols)
+        # off-board neighbours point at the sentinel after the last point
+        return np.where(on_board, rows * num_cols + cols, self.num_points)
+
+
+def _get_grid(num_rows, num_cols):
+    grid = _grids.get((num_rows, num_cols))
+    if grid is None:
+        grid = _grids[num_rows, num_cols] = _Grid(num_rows, num_cols)
+    return grid
+
+
+def board_colors(board):
+    """The colour value of every point of a board of any implementation as a (num_rows, num_cols) int8 array."""
+    if hasattr(board, 'point_arrays'):
+        return board.point_arrays()[0]
+
+    grid = _get_grid(board.num_rows, board.num_cols)
+    colors = np.zeros(grid.num_points, dtype=np.int8)
+    for i, point in enumerate(grid.points):
+        stone = board.get(point)
+        if stone is not None:
+            colors[i] = stone.value
+    return colors.reshape(grid.shape)
 
 
-def _collect_region(start_pos, board, visited=None):
-
-    if visited is None:
-        visited = {}
-    if start_pos in visited:
-        return [], set()
-    all_points = [start_pos]
-    all_borders = set()
-    visited[start_pos] = True
-    here = board.get(start_pos)
-    deltas = [(-1, 0), (1, 0), (0, -1), (0, 1)]
-    for delta_r, delta_c in deltas:
-        next_p = Point(start_pos.row + delta_r, start_pos.col + delta_c)
-        if not board.is_on_grid(next_p):
-            continue
-        neighbor = board.get(next_p)
-        if neighbor == here:
-            points, borders = _collect_region(next_p, board, visited)
-            all_points += points
-            all_borders |= borders
-        else:
-            all_borders.add(neighbor)
-    return all_points, all_borders
+def _label_regions(grid, colors, labels, points):
+    """Labels the empty points at indices points with the smallest index of their region."""
+    neighbors = grid.neighbors[points]
+    same = colors[neighbors] == EMPTY
+    labels[points] = points
+
+    while True:
+        smallest = np.where(same, labels[neighbors], grid.num_points).min(axis=1)
+        # labels[i] is a point of the same region, so following it twice stays in the region
+        relabelled = labels[np.minimum(labels[points], smallest)]
+        if (relabelled == labels[points]).all():
+            return
+        labels[points] = relabelled
+
+
+def _owners(grid, colors, labels, points):
+    """Owners of the empty points at indices points, whole regions at a time: BLACK, WHITE or EMPTY for dame."""
+    neighbor_colors = colors[grid.neighbors[points]]
+    regions = labels[points]
+
+    touches_black = np.zeros(grid.num_points + 1, dtype=bool)
+    touches_white = np.zeros(grid.num_points + 1, dtype=bool)
+    touches_black[regions[(neighbor_colors == BLACK).any(axis=1)]] = True
+    touches_white[regions[(neighbor_colors == WHITE).any(axis=1)]] = True
+
+    black, white = touches_black[regions], touches_white[regions]
+    return np.where(black & ~white, BLACK, np.where(white & ~black, WHITE, EMPTY)).astype(np.int8)
+
+
+def territory_arrays(colors):
+    """Owner of every point of a (num_rows, num_cols) colour array.
+
+    Stones own their point, empty points get the owner of their region.
+    Returns the owners, BLACK, WHITE or EMPTY for dame, and the region labels
+    (the smallest flat index in each empty region, -1 on stones).
+    """
+    grid = _get_grid(*colors.shape)
+    flat = np.append(colors.ravel(), OFF_BOARD).astype(np.int8)
+    labels = np.full(grid.num_points + 1, -1, dtype=np.int64)
+
+    empty = np.flatnonzero(flat[:-1] == EMPTY)
+    owners = flat[:-1].copy()
+    if len(empty):
+        _label_regions(grid, flat, labels, empty)
+        owners[empty] = _owners(grid, flat, labels, empty)
+
+    return owners.reshape(colors.shape), labels[:-1].reshape(colors.shape)
+
+
+def evaluate_territory(board):
+    """Maps a board into territory and dame, see territory_arrays."""
+    colors = board_colors(board)
+    owners, _ = territory_arrays(colors)
+    return Territory.from_arrays(colors, owners)
+
+
+class ScoreEstimate:
+    """Area score of a game that is kept up to date move by move.
+
+    update() compares the new position with the last one and only relabels
+    and rescores the empty regions in or next to the points that changed:
+    the stone just played and anything it captured.
+    """
+    def __init__(self, board, komi=7.5):
+        self.komi = komi
+        self._grid = _get_grid(board.num_rows, board.num_cols)
+        colors = board_colors(board)
+        owners, labels = territory_arrays(colors)
+
+        self._colors = np.append(colors.ravel(), OFF_BOARD).astype(np.int8)
+        self._labels = np.append(labels.ravel(), -1)
+        self._owners = owners.ravel().copy()
+        self.black = int(np.count_nonzero(self._owners == BLACK))
+        self.white = int(np.count_nonzero(self._owners == WHITE))
+
+    def update(self, board):
+        grid = self._grid
+        colors = board_colors(board).ravel()
+        changed = np.flatnonzero(colors != self._colors[:-1])
+        if len(changed) == 0:
+            return
+
+        # empty regions that contain or touch a changed point can split, merge or change owner
+        around = np.append(changed, grid.neighbors[changed].ravel())
+        around = around[self._colors[around] == EMPTY]
+        regions = np.unique(self._labels[around])
+        affected = np.union1d(changed, np.flatnonzero(np.isin(self._labels[:-1], regions)))
+
+        old_owners = self._owners[affected]
+        self._colors[:-1] = colors
+        new_owners = colors[affected]
+
+        self._labels[affected] = -1
+        empty = affected[colors[affected] == EMPTY]
+        if len(empty):
+            _label_regions(grid, self._colors, self._labels, empty)
+            new_owners[colors[affected] == EMPTY] = _owners(grid, self._colors, self._labels, empty)
+        self._owners[affected] = new_owners
+
+        self.black += int(np.count_nonzero(new_owners == BLACK)) - int(np.count_nonzero(old_owners == BLACK))
+        self.white += int(np.count_nonzero(new_owners == WHITE)) - int(np.count_nonzero(old_owners == WHITE))
+
+    def result(self):
+        return GameResult(self.black, self.white, komi=self.komi)
 
 
 def compute_game_result(game_state):
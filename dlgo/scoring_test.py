@@ -0,0 +1,49 @@
+import random
+import unittest
+
+import numpy as np
+
+from dlgo import goboard_fast
+from dlgo.gotypes import Player, Point
+from dlgo.scoring import ScoreEstimate, compute_game_result, evaluate_territory, territory_arrays
+
+
+class ScoringTest(unittest.TestCase):
+    def test_territory(self):
+        # black wall on column 2, white wall on column 4, a dame column in between
+        board = goboard_fast.Board(5, 5)
+        for row in range(1, 6):
+            board.place_stone(Player.black, Point(row, 2))
+            board.place_stone(Player.white, Point(row, 4))
+
+        territory = evaluate_territory(board)
+        self.assertEqual(5, territory.num_black_territory)
+        self.assertEqual(5, territory.num_white_territory)
+        self.assertEqual(5, territory.num_black_stones)
+        self.assertEqual(5, territory.num_dame)
+        self.assertEqual(sorted(Point(row, 3) for row in range(1, 6)), sorted(territory.dame_points))
+
+    def test_empty_board_is_dame(self):
+        # one region covering a large board, too deep for a recursive flood fill
+        owners, labels = territory_arrays(np.zeros((25, 25), dtype=np.int8))
+        self.assertFalse(owners.any())
+        self.assertFalse(labels.any())
+
+    def test_estimate_follows_the_game(self):
+        random.seed(3)
+        game = goboard_fast.GameState.new_game(7)
+        score = ScoreEstimate(game.board)
+
+        for _ in range(120):
+            if game.is_over():
+                break
+            plays = [move for move in game.legal_moves() if move.is_play]
+            game = game.apply_move(random.choice(plays) if plays else goboard_fast.Move.pass_turn())
+            score.update(game.board)
+
+            expected = compute_game_result(game)
+            self.assertEqual((expected.b, expected.w), (score.result().b, score.result().w))
+
+
+if __name__ == '__main__':
+    unittest.main()
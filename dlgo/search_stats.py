@@ -0,0 +1,131 @@
+"""Where a tree search spends its time.
+
+Search agents keep a SearchStats and mark the phases of every round with
+enter(phase) and leave(). Phases nest: entering one pauses the phase it is
+called from, so every moment of a move is charged to exactly one phase and
+the shares add up. Time outside all phases is reported as other. Counters
+like allocated nodes and cache hits are added with count(name).
+
+The phases used by the agents are
+
+    select    walking down the tree
+    expand    applying the move of a new leaf and creating its node
+    encode    turning positions into model input
+    predict   running the model, including encoding where an agent's predict does both
+    backup    passing the leaf value back up the tree
+    rollout   random or fast-policy playouts
+    legality  listing or checking legal moves
+
+diagnostics() returns the figures of the last move and the totals of all moves
+as plain dicts, so they can be logged or sent as JSON.
+"""
+
+import time
+from collections import defaultdict
+
+__all__ = [
+    'NO_STATS',
+    'PHASES',
+    'SearchStats',
+]
+
+PHASES = ('select', 'expand', 'encode', 'predict', 'backup', 'rollout', 'legality')
+
+
+class SearchStats:
+    def __init__(self):
+        self.num_moves = 0
+        self.total_seconds = 0.0
+        self.total_times = defaultdict(float)
+        self.total_calls = defaultdict(int)
+        self.total_counts = defaultdict(int)
+        self.last_move = None
+        self.begin_move()
+
+    def begin_move(self):
+        self.move_times = defaultdict(float)
+        self.move_calls = defaultdict(int)
+        self.move_counts = defaultdict(int)
+        self._phase = None
+        self._paused = []
+        self._move_start = self._since = time.perf_counter()
+
+    def enter(self, phase):
+        now = time.perf_counter()
+        if self._phase is not None:
+            self.move_times[self._phase] += now - self._since
+        self._paused.append(self._phase)
+        self._phase = phase
+        self._since = now
+        self.move_calls[phase] += 1
+
+    def leave(self):
+        now = time.perf_counter()
+        self.move_times[self._phase] += now - self._since
+        self._phase = self._paused.pop()
+        self._since = now
+
+    def count(self, name, n=1):
+        self.move_counts[name] += n
+
+    def end_move(self):
+        seconds = time.perf_counter() - self._move_start
+        self.last_move = self._summary(seconds, self.move_times, self.move_calls, self.move_counts)
+
+        self.num_moves += 1
+        self.total_seconds += seconds
+        for phase, phase_seconds in self.move_times.items():
+            self.total_times[phase] += phase_seconds
+        for phase, calls in self.move_calls.items():
+            self.total_calls[phase] += calls
+        for name, n in self.move_counts.items():
+            self.total_counts[name] += n
+
+    @staticmethod
+    def _summary(seconds, times, calls, counts):
+        phases = {}
+        for phase in list(PHASES) + sorted(phase for phase in times if phase not in PHASES):
+            phases[phase] = {
+                'seconds': times.get(phase, 0.0),
+                'calls': calls.get(phase, 0),
+                'share': times.get(phase, 0.0) / seconds if seconds > 0 else 0.0,
+            }
+
+        return {
+            'seconds': seconds,
+            'other_seconds': max(0.0, seconds - sum(times.values())),
+            'phases': phases,
+            'counts': dict(counts),
+        }
+
+    def diagnostics(self):
+        return {
+            'moves': self.num_moves,
+            'last_move': self.last_move,
+            'total': self._summary(self.total_seconds, self.total_times, self.total_calls, self.total_counts),
+        }
+
+    def summary(self):
+        """One line with the total time, each phase's share and the counters, for logs."""
+        total = self.diagnostics()['total']
+        shares = ' '.join('%s %.1f%%' % (phase, 100 * figures['share'])
+                          for phase, figures in total['phases'].items() if figures['calls'])
+        counts = ', '.join('%d %s' % (n, name.replace('_', ' ')) for name, n in sorted(total['counts'].items()))
+        line = '%d moves in %.2f s: %s' % (self.num_moves, total['seconds'], shares or 'no phases')
+        return line + (', ' + counts if counts else '')
+
+
+class _NoStats:
+    # stands in for a SearchStats where nothing is measured
+
+    def enter(self, phase):
+        pass
+
+    def leave(self):
+        pass
+
+    def count(self, name, n=1):
+        pass
+
+
+NO_STATS = _NoStats()
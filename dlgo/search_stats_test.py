@@ -0,0 +1,59 @@
+import time
+import unittest
+
+from dlgo.goboard_array import GameState
+from dlgo.mcts.mcts import MCTSAgent
+from dlgo.search_stats import PHASES, SearchStats
+
+
+class SearchStatsTest(unittest.TestCase):
+    def test_nested_phases_are_exclusive(self):
+        stats = SearchStats()
+        stats.enter('select')
+        time.sleep(0.01)
+        stats.enter('legality')
+        time.sleep(0.02)
+        stats.leave()
+        stats.leave()
+        stats.end_move()
+
+        move = stats.diagnostics()['last_move']
+        phases = move['phases']
+        self.assertGreaterEqual(phases['legality']['seconds'], 0.02)
+        # the time spent in legality is not charged to select as well
+        self.assertLess(phases['select']['seconds'], 0.02)
+        self.assertAlmostEqual(move['seconds'], sum(p['seconds'] for p in phases.values()) + move['other_seconds'])
+        self.assertEqual(list(PHASES), list(phases))
+
+    def test_moves_add_up_to_the_total(self):
+        stats = SearchStats()
+        for rounds in (3, 5):
+            stats.begin_move()
+            for _ in range(rounds):
+                stats.enter('backup')
+                stats.leave()
+            stats.count('nodes', rounds)
+            stats.end_move()
+
+        diagnostics = stats.diagnostics()
+        self.assertEqual(2, diagnostics['moves'])
+        self.assertEqual(5, diagnostics['last_move']['phases']['backup']['calls'])
+        self.assertEqual({'nodes': 5}, diagnostics['last_move']['counts'])
+        self.assertEqual(8, diagnostics['total']['phases']['backup']['calls'])
+        self.assertEqual({'nodes': 8}, diagnostics['total']['counts'])
+        self.assertIn('8 nodes', stats.summary())
+
+    def test_mcts_agent_reports_its_search(self):
+        agent = MCTSAgent(num_rounds=20, temperature=1.4)
+        agent.select_move(GameState.new_game(5))
+
+        move = agent.diagnostics()['last_move']
+        self.assertEqual(20, move['counts']['rounds'])
+        # the root and one new leaf per round
+        self.assertEqual(21, move['counts']['nodes'])
+        for phase in ('select', 'expand', 'rollout', 'backup', 'legality'):
+            self.assertGreater(move['phases'][phase]['calls'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
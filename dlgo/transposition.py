@@ -0,0 +1,56 @@
+"""Transposition table for tree search.
+
+A position reached through different move orders has the same board and the
+same player to move, and so the same network evaluation. The table maps
+(board.zobrist_hash(), next_player) to whatever a search wants to share
+between those nodes. It holds at most max_size positions and evicts the least
+recently used one when it is full.
+"""
+
+from collections import OrderedDict
+
+__all__ = [
+    'TranspositionTable',
+]
+
+
+class TranspositionTable:
+    def __init__(self, max_size=100000):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    @staticmethod
+    def key(game_state):
+        return game_state.board.zobrist_hash(), game_state.next_player
+
+    def get(self, game_state, default=None):
+        key = self.key(game_state)
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return default
+
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return entry
+
+    def put(self, game_state, entry):
+        key = self.key(game_state)
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def __contains__(self, game_state):
+        return self.key(game_state) in self._entries
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,45 @@
+import unittest
+
+from dlgo.goboard_fast import GameState, Move
+from dlgo.gotypes import Point
+from dlgo.transposition import TranspositionTable
+
+
+def play(*points):
+    game_state = GameState.new_game(9)
+    for point in points:
+        game_state = game_state.apply_move(Move.play(Point(*point)) if point else Move.pass_turn())
+    return game_state
+
+
+class TranspositionTableTest(unittest.TestCase):
+    def test_transposed_positions_share_an_entry(self):
+        table = TranspositionTable()
+        table.put(play((3, 3), (5, 5), (3, 4)), 'entry')
+
+        self.assertEqual('entry', table.get(play((3, 4), (5, 5), (3, 3))))
+        self.assertEqual(1, table.hits)
+
+    def test_player_to_move_is_part_of_the_key(self):
+        table = TranspositionTable()
+        table.put(play((3, 3), None), 'entry')
+
+        self.assertIsNone(table.get(play((3, 3))))
+        self.assertEqual(1, table.misses)
+
+    def test_least_recently_used_entry_is_evicted(self):
+        table = TranspositionTable(max_size=2)
+        first, second, third = play((1, 1)), play((2, 2)), play((3, 3))
+        table.put(first, 1)
+        table.put(second, 2)
+        table.get(first)
+        table.put(third, 3)
+
+        self.assertEqual(2, len(table))
+        self.assertIn(first, table)
+        self.assertNotIn(second, table)
+        self.assertIn(third, table)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,3 +1,5 @@
+import importlib
+
 from dlgo import gotypes
 import numpy as np
 
@@ -45,18 +47,64 @@ def coords_from_point(point):
     )
 
 
+# Board implementations are selected by module name: goboard_slow, goboard,
+# goboard_fast or goboard_array. All of them expose Board, GameState and Move.
+def get_goboard_by_name(name):
+    return importlib.import_module('dlgo.' + name)
+
+
 class MoveAge:
+    """Age of every stone on a board, in stones placed since it was played.
+
+    Each point keeps the turn its stone was placed on, -1 for no stone, and
+    ages are worked out on read as turn - stamp, so placing a stone touches a
+    single point. Copies share the stamps until one of them writes, which
+    keeps copying a board's ages O(1).
+    """
     def __init__(self, board):
-        self.move_ages = -np.ones((board.num_rows, board.num_cols))
+        self.turn = 0
+        self._stamps = np.full((board.num_rows, board.num_cols), -1, dtype=np.int32)
+        self._shared = False
+
+    @property
+    def move_ages(self):
+        return self.ages()
+
+    def ages(self):
+        """The ages of all points as a (num_rows, num_cols) array, -1 on empty points."""
+        return np.where(self._stamps >= 0, self.turn - self._stamps, -1)
 
     def get(self, row, col):
-        return self.move_ages[row, col]
+        stamp = self._stamps[row, col]
+        return self.turn - stamp if stamp >= 0 else -1
 
     def reset_age(self, point):
-        self.move_ages[point.row - 1, point.col - 1] = -1
+        self._own()
+        self._stamps[point.row - 1, point.col - 1] = -1
 
     def add(self, point):
-        self.move_ages[point.row - 1, point.col - 1] = 0
-
-    def increment_all(self):
-        self.move_ages[self.move_ages > -1] += 1
+        """Places a stone on point: it gets age 0 and every other stone gets one older."""
+        self._own()
+        self.turn += 1
+        self._stamps[point.row - 1, point.col - 1] = self.turn
+
+    def set_age(self, point, age):
+        self._own()
+        self._stamps[point.row - 1, point.col - 1] = self.turn - age if age >= 0 else -1
+
+    def take_back(self, point):
+        """Undoes add(point)."""
+        self.reset_age(point)
+        self.turn -= 1
+
+    def _own(self):
+        if self._shared:
+            self._stamps = self._stamps.copy()
+            self._shared = False
+
+    def __deepcopy__(self, memodict=None):
+        copied = MoveAge.__new__(MoveAge)
+        copied.turn = self.turn
+        copied._stamps = self._stamps
+        copied._shared = self._shared = True
+        return copied
@@ -0,0 +1,56 @@
+import copy
+import random
+import unittest
+
+import numpy as np
+
+from dlgo import goboard_array
+from dlgo import goboard_fast
+from dlgo.gotypes import Point
+
+
+class MoveAgeTest(unittest.TestCase):
+    def test_ages_follow_the_game(self):
+        game = goboard_fast.GameState.new_game(5)
+        for point in [Point(1, 1), Point(3, 3), Point(5, 5)]:
+            game = game.apply_move(goboard_fast.Move.play(point))
+
+        ages = game.board.move_ages.ages()
+        self.assertEqual(2, ages[0, 0])
+        self.assertEqual(1, ages[2, 2])
+        self.assertEqual(0, ages[4, 4])
+        self.assertEqual(-1, ages[1, 1])
+
+    def test_copies_are_independent(self):
+        board = goboard_fast.Board(5, 5)
+        board.place_stone(goboard_fast.Player.black, Point(1, 1))
+        copied = copy.deepcopy(board)
+        copied.place_stone(goboard_fast.Player.white, Point(2, 2))
+
+        self.assertEqual(-1, board.move_ages.get(1, 1))
+        self.assertEqual(0, board.move_ages.get(0, 0))
+        self.assertEqual(1, copied.move_ages.get(0, 0))
+        self.assertEqual(0, copied.move_ages.get(1, 1))
+
+    def test_undo_restores_ages(self):
+        random.seed(2)
+        game = goboard_array.GameState.new_game(5)
+        history = []
+
+        # long games on a small board capture plenty of stones
+        for _ in range(150):
+            if game.is_over():
+                break
+            moves = [m for m in game.legal_moves() if m.is_play]
+            if not moves:
+                break
+            history.append(game.board.move_ages.ages())
+            game.play(random.choice(moves))
+
+        while history:
+            game.undo()
+            np.testing.assert_array_equal(history.pop(), game.board.move_ages.ages())
+
+
+if __name__ == '__main__':
+    unittest.main()
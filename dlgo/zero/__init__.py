@@ -2,6 +2,7 @@ from .agent import ZeroAgent, load_zero_agent
 from .encoder import ZeroEncoder
 from .experience import ZeroExperienceBuffer, ZeroExperienceCollector, combine_experience, combine_buffers, \
     load_experience
+from .replay import ZeroReplayBuffer
 
 __all__ = ['ZeroAgent', 'ZeroEncoder', 'ZeroExperienceBuffer', 'ZeroExperienceCollector', 'combine_experience',
-           'combine_buffers', 'load_experience', 'load_zero_agent']
+           'combine_buffers', 'load_experience', 'load_zero_agent', 'ZeroReplayBuffer']
@@ -2,66 +2,128 @@ import numpy as np
 from keras.optimizers import SGD
 from dlgo import kerasutil
 from dlgo.agent import Agent
+from dlgo.compact import is_packed
 from dlgo.encoders import get_encoder_by_name
+from dlgo.prediction_cache import predict_states
+from dlgo.search_stats import SearchStats
 from dlgo.zero.encoder import ZeroEncoder
 
 
-class Branch:
-    def __init__(self, prior):
-        self.prior = prior
-        self.visit_count = 0
-        self.total_value = 0.
+def same_position(state, other):
+    return state.next_player == other.next_player and state.board == other.board
+
+
+class Evaluation:
+    """The network's priors and value for a position, shared by all its nodes through a transposition table."""
+    def __init__(self, priors, value):
+        self.priors = priors
+        self.value = value
+        # the BranchStats of the first non-root node for the position, when statistics are shared too;
+        # not the node itself, which would keep its whole tree alive through its parents
+        self.stats = None
+
+
+class BranchStats:
+    """Visit counts and total values of the branches of a node, and the visits of the node itself.
+
+    Transposed nodes with the same valid moves share one, so their exploration term and the
+    counts it is weighed against always agree.
+    """
+    def __init__(self, move_indices):
+        self.move_indices = move_indices
+        self.visit_counts = np.zeros(len(move_indices), dtype=np.int32)
+        self.total_values = np.zeros(len(move_indices), dtype=np.float32)
+        self.total_visit_count = 1
 
 
 class ZeroTreeNode:
-    def __init__(self, state, value, priors, parent, last_move):
+    """A search tree node that keeps its branches in arrays.
+
+    Branch i is the move with index move_indices[i] in the encoder's move space, move_indices
+    holds the valid moves in ascending order. Children are looked up by branch, and last_branch
+    is the branch of the parent that leads to this node.
+    """
+    def __init__(self, state, value, priors, parent, last_branch, move_indices, shared_stats=None):
         self.state = state
         self.value = value
         self.parent = parent
-        self.last_move = last_move
-        self.total_visit_count = 1
-        self.branches = {}
+        self.last_branch = last_branch
 
-        for move, p in priors.items():
-            if state.is_valid_move(move):
-                self.branches[move] = Branch(p)
+        self.move_indices = move_indices
+        self.priors = priors[move_indices].astype(np.float32)
+        # whether Dirichlet noise has been mixed into the priors, which a root gets once
+        self.noised = False
+
+        # transposed nodes with the same valid moves add their visits to the same statistics
+        if shared_stats is not None and np.array_equal(shared_stats.move_indices, move_indices):
+            self.stats = shared_stats
+        else:
+            self.stats = BranchStats(move_indices)
 
         self.children = {}
 
-    def moves(self):
-        return self.branches.keys()
+    @property
+    def visit_counts(self):
+        return self.stats.visit_counts
+
+    @property
+    def total_values(self):
+        return self.stats.total_values
+
+    @property
+    def total_visit_count(self):
+        return self.stats.total_visit_count
+
+    def find_branch(self, move_index):
+        branch = np.searchsorted(self.move_indices, move_index)
+        if branch < len(self.move_indices) and self.move_indices[branch] == move_index:
+            return int(branch)
+
+        return None
 
-    def add_child(self, move, child_node):
-        self.children[move] = child_node
+    def add_child(self, branch, child_node):
+        self.children[branch] = child_node
 
-    def has_child(self, move):
-        return move in self.children
+    def has_child(self, branch):
+        return branch in self.children
 
-    def get_child(self, move):
-        return self.children[move]
+    def is_terminal(self):
+        # no valid moves are left once the game is over
+        return len(self.move_indices) == 0
 
-    def record_visit(self, move, value):
-        self.total_visit_count += 1
-        self.branches[move].visit_count += 1
-        self.branches[move].total_value += value
+    def get_child(self, branch):
+        return self.children[branch]
 
-    def expected_value(self, move):
-        branch = self.branches[move]
+    def record_visit(self, branch, value):
+        self.stats.total_visit_count += 1
+        self.visit_counts[branch] += 1
+        self.total_values[branch] += value
 
-        return branch.total_value / branch.visit_count if branch.visit_count > 0 else 0.0
+    def add_virtual_loss(self, branch, loss):
+        # counts a pending visit as a loss so that other searches in the same batch look elsewhere
+        self.stats.total_visit_count += 1
+        self.visit_counts[branch] += 1
+        self.total_values[branch] -= loss
 
-    def prior(self, move):
-        return self.branches[move].prior
+    def revert_virtual_loss(self, branch, loss):
+        self.stats.total_visit_count -= 1
+        self.visit_counts[branch] -= 1
+        self.total_values[branch] += loss
 
-    def visit_count(self, move):
-        if move in self.branches:
-            return self.branches[move].visit_count
+    def expected_values(self):
+        return np.divide(self.total_values, self.visit_counts,
+                         out=np.zeros_like(self.total_values), where=self.visit_counts > 0)
 
-        return 0
+    def visit_counts_by_move(self, num_moves):
+        visit_counts = np.zeros(num_moves, dtype=np.int32)
+        visit_counts[self.move_indices] = self.visit_counts
+
+        return visit_counts
 
 
 class ZeroAgent(Agent):
-    def __init__(self, model, encoder, rounds_per_move=1600, c=2.0):
+    def __init__(self, model, encoder, rounds_per_move=1600, c=2.0, batch_size=1, virtual_loss=1.0, reuse_tree=True,
+                 transpositions=None, share_statistics=False):
         super().__init__()
 
         self.model = model
@@ -69,91 +131,239 @@ class ZeroAgent(Agent):
         self.num_rounds = rounds_per_move
         self.c = c
 
+        # leaves evaluated per call to the model; more is faster but each batch searches with staler statistics
+        self.batch_size = batch_size
+        self.virtual_loss = virtual_loss
+
+        # keeps the subtree under the move played, so the next search starts from its visit counts
+        self.reuse_tree = reuse_tree
+        self.root = None
+
+        # an optional dlgo.transposition.TranspositionTable; positions found in it aren't evaluated again, and
+        # with share_statistics their nodes also share visit counts and values
+        self.transpositions = transpositions
+        self.share_statistics = share_statistics
+
         self.collector = None
+        self.search_stats = SearchStats()
 
     def select_move(self, game_state):
-        root = self.create_node(game_state)
-
-        for i in range(self.num_rounds):
-            node = root
-            next_move = self.select_branch(node)
-            while node.has_child(next_move):
-                node = node.get_child(next_move)
-                next_move = self.select_branch(node)
-
-            new_state = node.state.apply_move(next_move)
-            child_node = self.create_node(
-                new_state, parent=node)
-
-            move = next_move
-            value = -1 * child_node.value
-            while node is not None:
-                node.record_visit(move, value)
-                move = node.last_move
-                node = node.parent
-                value = -1 * value
+        stats = self.search_stats
+        stats.begin_move()
+
+        root = self.reuse_subtree(game_state) if self.reuse_tree else None
+        if root is None:
+            stats.enter('expand')
+            root = self.create_node(game_state)
+            stats.leave()
+
+        if self.batch_size > 1:
+            self.run_batched_rounds(root)
+        else:
+            for i in range(self.num_rounds):
+                stats.enter('select')
+                node, next_branch = self.select_leaf(root)
+                stats.leave()
+
+                if node.has_child(next_branch):
+                    child_node = node.get_child(next_branch)
+                else:
+                    stats.enter('expand')
+                    new_state = node.state.apply_move(self.branch_move(node, next_branch))
+                    child_node = self.create_node(
+                        new_state, branch=next_branch, parent=node)
+                    stats.leave()
+
+                stats.enter('backup')
+                self.backup(node, next_branch, -1 * child_node.value)
+                stats.leave()
+            stats.count('rounds', self.num_rounds)
 
         if self.collector is not None:
-            root_state_tensor = self.encoder.encode(game_state)
-            visit_counts = np.array([
-                root.visit_count(
-                    self.encoder.decode_move_index(idx))
-                for idx in range(self.encoder.num_moves())
-            ])
+            # a compact collector packs the position itself and only needs the game state
+            root_state = game_state if self.collector.compact else self.encoder.encode(game_state)
+            visit_counts = root.visit_counts_by_move(self.encoder.num_moves())
             self.collector.record_decision(
-                root_state_tensor, visit_counts)
-
-        root_state_tensor = self.encoder.encode(game_state)
-        visit_counts = np.array([
-            root.visit_count(
-                self.encoder.decode_move_index(idx))
-            for idx in range(self.encoder.num_moves())
-        ])
-
-        return max(root.moves(), key=root.visit_count)
+                root_state, visit_counts)
+
+        best_branch = int(np.argmax(root.visit_counts))
+        self.root = root.get_child(best_branch) if self.reuse_tree and root.has_child(best_branch) else None
+
+        stats.end_move()
+        return self.branch_move(root, best_branch)
+
+    def diagnostics(self):
+        return self.search_stats.diagnostics()
+
+    def branch_move(self, node, branch):
+        return self.encoder.decode_move_index(node.move_indices[branch])
+
+    def reuse_subtree(self, game_state):
+        """Finds the node for game_state in the tree kept from the previous move, if there is one.
+
+        That is either the kept root itself or, when the opponent has replied since, its child for
+        game_state.last_move.
+        """
+        node = self.root
+        self.root = None
+
+        if node is not None and not same_position(node.state, game_state):
+            last_move = game_state.last_move
+            branch = None
+            if last_move is not None and not last_move.is_resign:
+                branch = node.find_branch(self.encoder.encode_move(last_move))
+            node = node.get_child(branch) if branch is not None and node.has_child(branch) else None
+
+        if node is None or not same_position(node.state, game_state) or node.is_terminal():
+            return None
+
+        # detach the subtree and give its root Dirichlet noise, like a new root gets, unless it already was a root
+        node.parent = None
+        if not node.noised:
+            noise = np.random.dirichlet(0.03 * np.ones(len(node.priors)))
+            node.priors = 0.75 * node.priors + 0.25 * noise.astype(np.float32)
+            node.noised = True
+
+        return node
+
+    def select_leaf(self, root, virtual_loss=None):
+        """Walks down from root to a branch that hasn't been expanded yet, or that ends the game.
+
+        Returns the node and that branch. With virtual_loss set, every branch taken on the way
+        is given a virtual loss.
+        """
+        node = root
+        next_branch = self.select_branch(node)
+        while node.has_child(next_branch) and not node.get_child(next_branch).is_terminal():
+            if virtual_loss is not None:
+                node.add_virtual_loss(next_branch, virtual_loss)
+            node = node.get_child(next_branch)
+            next_branch = self.select_branch(node)
+
+        if virtual_loss is not None:
+            node.add_virtual_loss(next_branch, virtual_loss)
+
+        return node, next_branch
+
+    @staticmethod
+    def backup(node, branch, value, virtual_loss=None):
+        while node is not None:
+            if virtual_loss is not None:
+                node.revert_virtual_loss(branch, virtual_loss)
+            node.record_visit(branch, value)
+            branch = node.last_branch
+            node = node.parent
+            value = -1 * value
+
+    def run_batched_rounds(self, root):
+        """Searches batch_size leaves at a time, evaluating each batch with a single predict call.
+
+        Every branch on the way to a selected leaf gets a virtual loss until the batch is backed up,
+        which steers the remaining selections of the batch towards other leaves.
+        """
+        stats = self.search_stats
+        rounds = 0
+
+        while rounds < self.num_rounds:
+            stats.enter('select')
+            leaves = [self.select_leaf(root, self.virtual_loss)
+                      for _ in range(min(self.batch_size, self.num_rounds - rounds))]
+            stats.leave()
+
+            # the same leaf can come up more than once in a batch, only expand it once
+            stats.enter('expand')
+            new_leaves = list({(id(node), branch): (node, branch) for node, branch in leaves
+                               if not node.has_child(branch)}.values())
+            self.create_nodes(
+                [node.state.apply_move(self.branch_move(node, branch)) for node, branch in new_leaves],
+                branches=[branch for _, branch in new_leaves],
+                parents=[node for node, _ in new_leaves])
+            stats.leave()
+
+            stats.enter('backup')
+            for node, branch in leaves:
+                self.backup(node, branch, -1 * node.get_child(branch).value, self.virtual_loss)
+            stats.leave()
+
+            rounds += len(leaves)
+            stats.count('batches')
+
+        stats.count('rounds', rounds)
 
     def set_collector(self, collector):
         self.collector = collector
 
-    def create_node(self, game_state, move=None, parent=None):
-        state_tensor = self.encoder.encode(game_state)
-        model_input = np.array([state_tensor])
-        priors, values = self.model.predict(model_input)
-        priors = priors[0]
-
-        # add Dirichlet noise to encourage exploration
-        if parent is None:
-            noise = np.random.dirichlet(0.03 * np.ones_like(priors))
-            priors = 0.75 * priors + 0.25 * noise
-
-        value = values[0][0]
-
-        move_priors = {
-            self.encoder.decode_move_index(idx): p
-            for idx, p in enumerate(priors)
-        }
-        new_node = ZeroTreeNode(game_state, value, move_priors, parent, move)
-
-        if parent is not None:
-            parent.add_child(move, new_node)
-        return new_node
+    def create_node(self, game_state, branch=None, parent=None):
+        return self.create_nodes([game_state], [branch], [parent])[0]
+
+    def create_nodes(self, game_states, branches, parents):
+        """Evaluates game_states with at most one call to the model and creates a tree node for each."""
+        if not game_states:
+            return []
+
+        new_nodes = []
+        for game_state, branch, parent, evaluation in zip(game_states, branches, parents,
+                                                          self.evaluate(game_states)):
+            move_indices = self.valid_move_indices(game_state)
+            priors = evaluation.priors
+            shared_stats = None
+
+            # add Dirichlet noise to encourage exploration
+            if parent is None:
+                noise = np.zeros_like(priors)
+                noise[move_indices] = np.random.dirichlet(0.03 * np.ones(len(move_indices)))
+                priors = 0.75 * priors + 0.25 * noise
+            elif self.share_statistics:
+                shared_stats = evaluation.stats
+
+            new_node = ZeroTreeNode(game_state, evaluation.value, priors, parent, branch, move_indices, shared_stats)
+            new_node.noised = parent is None
+
+            if parent is not None:
+                parent.add_child(branch, new_node)
+                if self.share_statistics and evaluation.stats is None:
+                    evaluation.stats = new_node.stats
+            new_nodes.append(new_node)
+
+        self.search_stats.count('nodes', len(new_nodes))
+        return new_nodes
+
+    def valid_move_indices(self, game_state):
+        self.search_stats.enter('legality')
+        move_indices = np.array([idx for idx in range(self.encoder.num_moves())
+                                 if game_state.is_valid_move(self.encoder.decode_move_index(idx))], dtype=np.int32)
+        self.search_stats.leave()
+        return move_indices
+
+    def evaluate(self, game_states):
+        """Returns an Evaluation for each of game_states, running the model only on those not in the table."""
+        evaluations = [None] * len(game_states)
+        if self.transpositions is not None:
+            evaluations = [self.transpositions.get(game_state) for game_state in game_states]
+
+        missing = [i for i, evaluation in enumerate(evaluations) if evaluation is None]
+        if self.transpositions is not None:
+            self.search_stats.count('transposition_hits', len(game_states) - len(missing))
+        if missing:
+            all_priors, values = predict_states(self.model, self.encoder, [game_states[i] for i in missing],
+                                                self.search_stats)
+
+            for i, priors, value in zip(missing, all_priors, values[:, 0]):
+                evaluations[i] = Evaluation(priors, value)
+                if self.transpositions is not None:
+                    self.transpositions.put(game_states[i], evaluations[i])
+
+        return evaluations
 
     def select_branch(self, node):
-        total_n = node.total_visit_count
-
-        # see 14.2.1 for explanation
-        def score_branch(move):
-            q = node.expected_value(move)
-            p = node.prior(move)
-            n = node.visit_count(move)
+        # see 14.2.1 for explanation, scored for all branches of the node at once
+        scores = node.expected_values() + \
+            self.c * node.priors * np.sqrt(node.total_visit_count) / (node.visit_counts + 1)
 
-            return q + self.c * p * np.sqrt(total_n) / (n + 1)
-
-        return max(node.moves(), key=score_branch)
+        return int(np.argmax(scores))
 
     def train(self, experience, learning_rate, batch_size):
         num_examples = experience.states.shape[0]
-        model_input = experience.states
 
         visit_sums = np.sum(experience.visit_counts, axis=1).reshape((num_examples, 1))
 
@@ -161,7 +371,17 @@ class ZeroAgent(Agent):
         value_target = experience.rewards
 
         self.model.compile(SGD(lr=learning_rate), loss=['categorical_crossentropy', 'mse'])
-        self.model.fit(model_input, [action_target, value_target], batch_size=batch_size)
+
+        if not is_packed(experience.states):
+            self.model.fit(experience.states, [action_target, value_target], batch_size=batch_size)
+            return
+
+        # packed positions are encoded one shuffled batch at a time, like fit would draw them
+        order = np.random.permutation(num_examples)
+        for start in range(0, num_examples, batch_size):
+            indices = np.sort(order[start:start + batch_size])
+            model_input = experience.encoded_states(self.encoder, indices)
+            self.model.train_on_batch(model_input, [action_target[indices], value_target[indices]])
 
     def serialize(self, h5file):
         h5file.create_group('encoder')  # stores enough information to reconstruct the board encoder
@@ -171,21 +391,25 @@ class ZeroAgent(Agent):
         h5file['encoder'].attrs['board_size'] = self.encoder.board_size
         h5file['meta'].attrs['num_rounds'] = self.num_rounds
         h5file['meta'].attrs['c'] = self.c
+        h5file['meta'].attrs['batch_size'] = self.batch_size
 
         h5file.create_group('model')    # Uses built in Keras features to persist the model and its weights
         kerasutil.save_model_to_hdf5_group(
             self.model, h5file['model'])
 
 
-def load_zero_agent(h5file):
-    model = kerasutil.load_model_from_hdf5_group(
-        h5file['model'])    # Uses built in Keras functions to load the model structure and weights
+def load_zero_agent(h5file, model=None):
+    # model can be given to use something else in place of the saved network, e.g. an InferenceClient
+    if model is None:
+        model = kerasutil.load_model_from_hdf5_group(
+            h5file['model'])    # Uses built in Keras functions to load the model structure and weights
     encoder_name = h5file['encoder'].attrs['name']      # Recovers the board encoder
     board_size= h5file['encoder'].attrs['board_size']
     num_rounds = h5file['meta'].attrs['num_rounds']
     c = h5file['meta'].attrs['c']
+    batch_size = h5file['meta'].attrs.get('batch_size', 1)
 
     # zero encoder isn't in dlgo.encoders ... should it be?
     encoder = ZeroEncoder(board_size)
 
-    return ZeroAgent(model, encoder, num_rounds, c)
+    return ZeroAgent(model, encoder, num_rounds, c, batch_size)
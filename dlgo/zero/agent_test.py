@@ -0,0 +1,231 @@
+import gc
+import unittest
+import weakref
+
+import numpy as np
+
+from dlgo.goboard_fast import GameState, Move
+from dlgo.gotypes import Point
+from dlgo.transposition import TranspositionTable
+from dlgo.zero.agent import ZeroAgent, ZeroTreeNode, same_position
+from dlgo.zero.encoder import ZeroEncoder
+
+
+class FakeModel:
+    """A fixed random linear policy and value head, the same output for the same input every time."""
+    def __init__(self, encoder):
+        rng = np.random.RandomState(0)
+        num_inputs = int(np.prod(encoder.shape()))
+        self.policy_weights = rng.randn(num_inputs, encoder.num_moves())
+        self.value_weights = rng.randn(num_inputs)
+        self.num_states = 0
+
+    def predict(self, x):
+        self.num_states += len(x)
+        x = x.reshape(len(x), -1)
+        logits = x.dot(self.policy_weights)
+        priors = np.exp(logits - logits.max(axis=1, keepdims=True))
+        priors /= priors.sum(axis=1, keepdims=True)
+        values = np.tanh(0.1 * x.dot(self.value_weights))
+        return [priors, values.reshape(-1, 1)]
+
+
+class RootRecordingAgent(ZeroAgent):
+    def create_node(self, game_state, branch=None, parent=None):
+        node = super().create_node(game_state, branch, parent)
+        if parent is None:
+            self.search_root = node
+        return node
+
+
+def play(game_state, *points):
+    for point in points:
+        game_state = game_state.apply_move(Move.play(point))
+    return game_state
+
+
+class ZeroTreeNodeTest(unittest.TestCase):
+    def setUp(self):
+        self.move_indices = np.array([2, 7, 11, 25], dtype=np.int32)
+        priors = np.arange(26, dtype=np.float32) / 325
+        self.node = ZeroTreeNode(GameState.new_game(5), 0.0, priors, None, None, self.move_indices)
+
+    def test_find_branch(self):
+        self.assertEqual(0, self.node.find_branch(2))
+        self.assertEqual(3, self.node.find_branch(25))
+        # absent moves before, between and after the valid ones
+        self.assertIsNone(self.node.find_branch(0))
+        self.assertIsNone(self.node.find_branch(8))
+        self.assertIsNone(self.node.find_branch(26))
+
+    def test_priors_follow_the_branches(self):
+        np.testing.assert_allclose(self.move_indices / 325, self.node.priors)
+
+    def test_visit_counts_by_move(self):
+        self.node.record_visit(1, 1.0)
+        self.node.record_visit(1, -1.0)
+        self.node.record_visit(3, 0.5)
+
+        visit_counts = self.node.visit_counts_by_move(26)
+        self.assertEqual({7: 2, 25: 1}, {i: visit_counts[i] for i in np.nonzero(visit_counts)[0]})
+
+    def test_expected_values(self):
+        np.testing.assert_array_equal([0, 0, 0, 0], self.node.expected_values())
+
+        self.node.record_visit(2, 1.0)
+        self.node.record_visit(2, 0.0)
+        np.testing.assert_array_equal([0, 0, 0.5, 0], self.node.expected_values())
+
+    def test_is_terminal(self):
+        self.assertFalse(self.node.is_terminal())
+
+        encoder = ZeroEncoder(5)
+        game_over = GameState.new_game(5).apply_move(Move.pass_turn()).apply_move(Move.pass_turn())
+        agent = ZeroAgent(FakeModel(encoder), encoder)
+        self.assertTrue(agent.create_node(game_over).is_terminal())
+
+
+class ZeroAgentTest(unittest.TestCase):
+    def setUp(self):
+        np.random.seed(1)
+        self.encoder = ZeroEncoder(5)
+        self.start = GameState.new_game(5)
+
+    def agent(self, **kwargs):
+        return ZeroAgent(FakeModel(self.encoder), self.encoder, **kwargs)
+
+    def assert_backed_up(self, node):
+        """Checks that node's statistics are what backing up its leaves one at a time would give."""
+        self.assertEqual(node.visit_counts.sum() + 1, node.total_visit_count)
+        for branch in range(len(node.move_indices)):
+            if branch not in node.children:
+                self.assertEqual(0, node.visit_counts[branch])
+                continue
+
+            child = node.children[branch]
+            # visits that ended at the child add its value, the others what was backed up through it
+            ended_here = node.visit_counts[branch] - child.visit_counts.sum()
+            self.assertGreaterEqual(ended_here, 1)
+            self.assertAlmostEqual(-child.value * ended_here - child.total_values.sum(),
+                                   node.total_values[branch], places=4)
+            self.assert_backed_up(child)
+
+    def test_batched_search_reverts_virtual_losses(self):
+        agent = self.agent(rounds_per_move=64, batch_size=8)
+        root = agent.create_node(self.start)
+        agent.run_batched_rounds(root)
+
+        self.assertEqual(65, root.total_visit_count)
+        self.assertEqual(64, root.visit_counts.sum())
+        self.assert_backed_up(root)
+
+    def test_leaf_selected_twice_is_expanded_once(self):
+        # without virtual loss only the visit counts push the searches of a batch apart
+        agent = self.agent(rounds_per_move=4, batch_size=4, virtual_loss=0.0)
+        root = agent.create_node(self.start)
+
+        selected = []
+        select_leaf = agent.select_leaf
+
+        def recording_select_leaf(*args):
+            selected.append(select_leaf(*args))
+            return selected[-1]
+
+        agent.select_leaf = recording_select_leaf
+        num_states = agent.model.num_states
+        agent.run_batched_rounds(root)
+
+        leaves = set(branch for node, branch in selected)
+        self.assertLess(len(leaves), len(selected))
+        self.assertEqual(len(leaves), agent.model.num_states - num_states)
+        self.assertEqual(len(leaves), len(root.children))
+        self.assert_backed_up(root)
+
+    def test_batch_sizes_agree(self):
+        for batch_size in [1, 5]:
+            agent = RootRecordingAgent(FakeModel(self.encoder), self.encoder, rounds_per_move=40,
+                                       batch_size=batch_size)
+            agent.select_move(self.start)
+            root = agent.search_root
+
+            self.assertEqual(41, root.total_visit_count)
+            self.assertEqual(40, root.visit_counts.sum())
+            self.assertEqual(40, agent.search_stats.last_move['counts']['rounds'])
+            self.assert_backed_up(root)
+
+    def test_subtree_is_kept_after_the_reply(self):
+        agent = self.agent(rounds_per_move=60)
+        after_move = self.start.apply_move(agent.select_move(self.start))
+        kept = agent.root
+        self.assertTrue(same_position(kept.state, after_move))
+
+        # the opponent replies with the move the search looked at most
+        reply_branch = int(np.argmax(kept.visit_counts))
+        expected = kept.get_child(reply_branch)
+        visit_counts = expected.visit_counts.copy()
+        after_reply = after_move.apply_move(agent.branch_move(kept, reply_branch))
+
+        node = agent.reuse_subtree(after_reply)
+        self.assertIs(expected, node)
+        self.assertIsNone(node.parent)
+        np.testing.assert_array_equal(visit_counts, node.visit_counts)
+
+    def test_subtree_is_dropped_for_other_positions(self):
+        agent = self.agent(rounds_per_move=20)
+        agent.select_move(self.start)
+        self.assertIsNone(agent.reuse_subtree(play(self.start, Point(1, 1), Point(5, 5), Point(2, 2))))
+        self.assertIsNone(agent.root)
+
+        game_over = self.start.apply_move(Move.pass_turn()).apply_move(Move.pass_turn())
+        agent.root = agent.create_node(game_over)
+        self.assertIsNone(agent.reuse_subtree(game_over))
+
+    def test_kept_root_is_noised_once(self):
+        agent = self.agent()
+        root = agent.create_node(self.start)
+        child = agent.create_node(play(self.start, Point(3, 3)), branch=0, parent=root)
+        priors = child.priors.copy()
+
+        agent.root = child
+        self.assertIs(child, agent.reuse_subtree(child.state))
+        noised_priors = child.priors.copy()
+        self.assertFalse(np.array_equal(priors, noised_priors))
+
+        # searching the same position again doesn't add more noise
+        agent.root = child
+        self.assertIs(child, agent.reuse_subtree(child.state))
+        np.testing.assert_array_equal(noised_priors, child.priors)
+
+    def test_transposed_nodes_share_their_statistics(self):
+        agent = self.agent(transpositions=TranspositionTable(), share_statistics=True)
+        root = agent.create_node(self.start)
+        # the same position, reached with black's moves in the opposite order
+        first = agent.create_node(play(self.start, Point(1, 1), Point(3, 3), Point(5, 5)), branch=0, parent=root)
+        second = agent.create_node(play(self.start, Point(5, 5), Point(3, 3), Point(1, 1)), branch=1, parent=root)
+
+        self.assertIs(first.stats, second.stats)
+        for branch in [0, 4, 4, 7]:
+            first.record_visit(branch, 0.5)
+        second.add_virtual_loss(2, 1.0)
+
+        # the visits of both nodes count towards the same total, so both explore alike
+        self.assertEqual(6, second.total_visit_count)
+        self.assertEqual(first.visit_counts.sum() + 1, first.total_visit_count)
+        self.assertEqual(agent.select_branch(first), agent.select_branch(second))
+
+    def test_transposition_table_does_not_keep_the_tree(self):
+        transpositions = TranspositionTable()
+        agent = self.agent(transpositions=transpositions, share_statistics=True)
+        root = agent.create_node(self.start)
+        node = agent.create_node(play(self.start, Point(3, 3)), branch=0, parent=root)
+        alive = weakref.ref(root)
+
+        del root, node
+        gc.collect()
+
+        self.assertIsNone(alive())
+        self.assertIsNotNone(transpositions.get(play(self.start, Point(3, 3))).stats)
+
+
+if __name__ == '__main__':
+    unittest.main()
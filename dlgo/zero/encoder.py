@@ -1,9 +1,12 @@
 import numpy as np
+from dlgo.encoders.base import Encoder
+from dlgo.encoders.encoder_utils import ko_points
 from dlgo.goboard_fast import Move
 from dlgo.gotypes import Player, Point
+from dlgo import goboard_array
 
 
-class ZeroEncoder:
+class ZeroEncoder(Encoder):
     def __init__(self, board_size):
         self.board_size = board_size
 
@@ -21,33 +24,31 @@ class ZeroEncoder:
         # 10: illegal moves due to ko
         self.num_planes = 11
 
+    def name(self):
+        return 'zeroencoder'
+
     def encode(self, game_state):
         board_tensor = np.zeros(self.shape())
-        next_player = game_state.next_player
+        self.encode_into(game_state, board_tensor)
+        return board_tensor
 
-        if game_state.next_player == Player.white:
+    def encode_into(self, game_state, board_tensor):
+        # the array board checks ko without playing every empty point
+        array_state = goboard_array.GameState.from_game_state(game_state)
+        colors, liberties, _ = array_state.board.point_arrays()
+        self.encode_arrays(board_tensor, game_state.next_player, colors, liberties, ko_points(array_state))
+
+    def encode_arrays(self, board_tensor, next_player, colors, liberties, ko):
+        if next_player == Player.white:
             board_tensor[8] = 1
         else:
             board_tensor[9] = 1
 
-        for r in range(self.board_size):
-            for c in range(self.board_size):
-                p = Point(row=r + 1, col=c + 1)
-                go_string = game_state.board.get_go_string(p)
-
-                if go_string is None:
-                    if game_state.does_move_violate_ko(next_player, Move.play(p)):
-                        board_tensor[10][r][c] = 1
+        for player, base in ((next_player, 0), (next_player.other, 4)):
+            rows, cols = np.nonzero(colors == player.value)
+            board_tensor[base + np.minimum(liberties[rows, cols], 4) - 1, rows, cols] = 1
 
-                else:
-                    liberty_plane = min(4, go_string.num_liberties) - 1
-
-                    if go_string.color != next_player:
-                        liberty_plane += 4
-
-                    board_tensor[liberty_plane][r][c] = 1
-
-        return board_tensor
+        board_tensor[10][ko] = 1
 
     # convert move to index, except passing is now the (num rows * num cols)-th option
     def encode_move(self, move):
@@ -1,8 +1,14 @@
 import numpy as np
 
+from dlgo.compact import encode_positions, is_packed, pack_position
+from dlgo.experience_writer import ExperienceWriter
+
 
 class ZeroExperienceCollector:
-    def __init__(self):
+    # with compact=True the agent records game states, which are kept as packed positions (see dlgo.compact)
+    # instead of encoded tensors
+    def __init__(self, compact=False):
+        self.compact = compact
         self.states = []
         self.visit_counts = []
         self.rewards = []
@@ -14,6 +20,8 @@ class ZeroExperienceCollector:
         self._current_episode_visit_counts = []
 
     def record_decision(self, state, visit_counts):
+        if self.compact:
+            state = pack_position(state)
         self._current_episode_states.append(state)
         self._current_episode_visit_counts.append(visit_counts)
 
@@ -34,28 +42,18 @@ class ZeroExperienceBuffer:
         self.rewards = rewards
         self.board_size = board_size
 
+    def encoded_states(self, encoder, indices=None):
+        # model input for the states at indices, packed positions are only encoded here
+        states = self.states if indices is None else self.states[indices]
+        if is_packed(states):
+            return encode_positions(encoder, states)
+        return states
+
     def serialize(self, h5file):
-        if 'experience' not in h5file:
-            h5file.create_group('experience')
-            h5file['experience'].create_dataset('states', data=self.states,
-                                                maxshape=(None, 11, self.board_size, self.board_size), chunks=True)
-            h5file['experience'].create_dataset('visit_counts', data=self.visit_counts,
-                                                maxshape=(None, self.board_size * self.board_size + 1), chunks=True)
-            h5file['experience'].create_dataset('rewards', data=self.rewards,
-                                                maxshape=(None,), chunks=True)
-            h5file['experience']['board_size'] = self.board_size
-        else:
-            states = h5file['experience']['states']
-            visit_counts = h5file['experience']['visit_counts']
-            rewards = h5file['experience']['rewards']
-
-            states.resize(states.shape[0] + self.states.shape[0], axis=0)
-            visit_counts.resize(visit_counts.shape[0] + self.visit_counts.shape[0], axis=0)
-            rewards.resize(rewards.shape[0] + self.rewards.shape[0], axis=0)
-
-            states[-self.states.shape[0]:] = self.states
-            visit_counts[-self.visit_counts.shape[0]:] = self.visit_counts
-            rewards[-self.rewards.shape[0]:] = self.rewards
+        # appends to the experience already in h5file, states are (N, 11, board_size, board_size)
+        # tensors or (N,) packed positions
+        with ExperienceWriter(h5file, background=False) as writer:
+            writer.append(self)
 
 
 def combine_experience(collectors, board_size):
@@ -0,0 +1,163 @@
+"""Replay buffer for AlphaGo Zero training.
+
+Combining every new game into one experience buffer copies the whole buffer
+each time, and the buffer never forgets anything. A ZeroReplayBuffer keeps at
+most capacity positions in preallocated arrays, optionally memory-mapped
+files, so adding a game only copies that game's positions.
+
+Games carry the generation (training iteration) they were played in. By
+default the buffer is a sliding window: the oldest positions make room for
+new ones, and with window=k only the last k generations are kept, like the
+500,000 game window of AlphaGo Zero. With reservoir=True a full buffer keeps
+a uniform sample of every position it was ever given instead.
+
+sample() draws a minibatch uniformly or weighted towards recent positions
+and returns it as a ZeroExperienceBuffer, ready for ZeroAgent.train.
+"""
+
+import numpy as np
+
+from dlgo.compact import position_dtype
+from dlgo.zero.experience import ZeroExperienceBuffer
+
+__all__ = [
+    'ZeroReplayBuffer',
+]
+
+
+class ZeroReplayBuffer:
+    def __init__(self, capacity, board_size, num_planes=11, compact=False, window=None, reservoir=False,
+                 path=None, seed=None):
+        self.capacity = capacity
+        self.board_size = board_size
+        self.window = window
+        self.reservoir = reservoir
+        self.rng = np.random.RandomState(seed)
+
+        if compact:
+            state_dtype, state_shape = position_dtype(board_size, board_size), ()
+        else:
+            state_dtype, state_shape = np.float32, (num_planes, board_size, board_size)
+        num_moves = board_size * board_size + 1
+
+        def allocate(name, shape, dtype):
+            if path is None:
+                return np.zeros(shape, dtype=dtype)
+            return np.lib.format.open_memmap('{}_{}.npy'.format(path, name), mode='w+', dtype=dtype, shape=shape)
+
+        self.states = allocate('states', (capacity,) + state_shape, state_dtype)
+        self.visit_counts = allocate('visit_counts', (capacity, num_moves), np.float32)
+        self.rewards = allocate('rewards', (capacity,), np.float32)
+        self.generations = allocate('generations', (capacity,), np.int32)
+
+        # slots [start, start + size) modulo capacity hold the positions, oldest first
+        self._start = 0
+        self.size = 0
+        # every position ever added, reservoir sampling needs the count
+        self.num_seen = 0
+
+    def __len__(self):
+        return self.size
+
+    def slots(self):
+        """Slot indices of the stored positions, oldest first."""
+        return (self._start + np.arange(self.size)) % self.capacity
+
+    def add_game(self, experience, generation=0):
+        """Adds the positions of a ZeroExperienceBuffer, usually one game, played in generation."""
+        num_states = len(experience.rewards)
+        if num_states == 0:
+            return
+
+        if self.window is not None:
+            self.evict_before(generation - self.window + 1)
+
+        if self.reservoir:
+            slots = self._reservoir_slots(num_states)
+            keep = slots >= 0
+            slots = slots[keep]
+        else:
+            slots = self._window_slots(num_states)
+            keep = np.arange(num_states) >= num_states - len(slots)
+
+        self.states[slots] = experience.states[keep]
+        self.visit_counts[slots] = experience.visit_counts[keep]
+        self.rewards[slots] = experience.rewards[keep]
+        self.generations[slots] = generation
+        self.num_seen += num_states
+
+    def _window_slots(self, num_states):
+        # a game larger than the whole buffer only keeps its last positions
+        num_states = min(num_states, self.capacity)
+        overflow = max(0, self.size + num_states - self.capacity)
+        self._start = (self._start + overflow) % self.capacity
+        self.size -= overflow
+
+        slots = (self._start + self.size + np.arange(num_states)) % self.capacity
+        self.size += num_states
+        return slots
+
+    def _reservoir_slots(self, num_states):
+        # position n of the stream replaces a random slot with probability capacity / (n + 1)
+        slots = np.full(num_states, -1)
+        for i in range(num_states):
+            if self.size < self.capacity:
+                slots[i] = self.size
+                self.size += 1
+            else:
+                j = self.rng.randint(0, self.num_seen + i + 1)
+                if j < self.capacity:
+                    slots[i] = j
+
+        # a slot drawn twice keeps only the later position
+        last = {slot: i for i, slot in enumerate(slots) if slot >= 0}
+        return np.array([slot if slot >= 0 and last[slot] == i else -1 for i, slot in enumerate(slots)])
+
+    def evict_before(self, generation):
+        """Drops every position played before generation."""
+        if self.size == 0:
+            return
+
+        slots = self.slots()
+        old = self.generations[slots] < generation
+        if not old.any():
+            return
+
+        if not self.reservoir:
+            # generations only grow along the window, so the old positions are all at the front
+            num_old = int(np.count_nonzero(old))
+            self._start = (self._start + num_old) % self.capacity
+            self.size -= num_old
+            return
+
+        kept = slots[~old]
+        for array in (self.states, self.visit_counts, self.rewards, self.generations):
+            array[:len(kept)] = array[kept]
+        self._start = 0
+        self.size = len(kept)
+
+    def sample_slots(self, batch_size, half_life=None):
+        """Draws batch_size slots, uniformly or with weights halving every half_life positions of age."""
+        if self.size == 0:
+            raise ValueError('the replay buffer is empty')
+
+        if half_life is None:
+            positions = self.rng.randint(0, self.size, size=batch_size)
+        else:
+            age = np.arange(self.size)[::-1]
+            weights = 0.5 ** (age / half_life)
+            positions = self.rng.choice(self.size, size=batch_size, p=weights / weights.sum())
+
+        return np.sort((self._start + positions) % self.capacity)
+
+    def sample(self, batch_size, half_life=None):
+        """Returns a minibatch as a ZeroExperienceBuffer."""
+        slots = self.sample_slots(batch_size, half_life)
+        return ZeroExperienceBuffer(self.states[slots], self.visit_counts[slots], self.rewards[slots],
+                                    self.board_size)
+
+    def experience(self):
+        """All stored positions as one ZeroExperienceBuffer, oldest first."""
+        slots = self.slots()
+        return ZeroExperienceBuffer(self.states[slots], self.visit_counts[slots], self.rewards[slots],
+                                    self.board_size)
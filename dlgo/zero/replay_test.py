@@ -0,0 +1,76 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from dlgo.zero.experience import ZeroExperienceBuffer
+from dlgo.zero.replay import ZeroReplayBuffer
+
+
+def game(num_states, reward, board_size=3, first=0):
+    # rewards count the positions so they can be told apart
+    states = np.zeros((num_states, 11, board_size, board_size))
+    visit_counts = np.ones((num_states, board_size * board_size + 1))
+    rewards = np.arange(first, first + num_states, dtype=float) * reward
+    return ZeroExperienceBuffer(states, visit_counts, rewards, board_size)
+
+
+class ZeroReplayBufferTest(unittest.TestCase):
+    def test_sliding_window(self):
+        replay = ZeroReplayBuffer(10, 3)
+        replay.add_game(game(4, 1, first=0))
+        replay.add_game(game(4, 1, first=4))
+        replay.add_game(game(4, 1, first=8))
+
+        self.assertEqual(10, len(replay))
+        np.testing.assert_array_equal(np.arange(2, 12), replay.experience().rewards)
+
+    def test_generation_window(self):
+        replay = ZeroReplayBuffer(100, 3, window=2)
+        for generation in range(4):
+            replay.add_game(game(3, 1, first=10 * generation), generation=generation)
+
+        np.testing.assert_array_equal([20, 21, 22, 30, 31, 32], replay.experience().rewards)
+
+        replay.evict_before(3)
+        np.testing.assert_array_equal([30, 31, 32], replay.experience().rewards)
+
+    def test_reservoir(self):
+        replay = ZeroReplayBuffer(50, 3, reservoir=True, seed=0)
+        for first in range(0, 1000, 10):
+            replay.add_game(game(10, 1, first=first))
+
+        rewards = replay.experience().rewards
+        self.assertEqual(50, len(replay))
+        self.assertEqual(50, len(set(rewards)))
+        # a uniform sample of the stream, not just its end
+        self.assertLess(rewards.min(), 500)
+
+    def test_sample(self):
+        replay = ZeroReplayBuffer(100, 3, seed=1)
+        replay.add_game(game(100, 1))
+
+        batch = replay.sample(32)
+        self.assertEqual((32, 11, 3, 3), batch.states.shape)
+        self.assertEqual((32, 10), batch.visit_counts.shape)
+
+        recent = replay.sample(1000, half_life=5).rewards
+        self.assertGreater(recent.mean(), 85)
+
+    def test_memory_mapped(self):
+        path = tempfile.mkdtemp()
+        try:
+            replay = ZeroReplayBuffer(10, 3, path=os.path.join(path, 'replay'))
+            replay.add_game(game(4, -1))
+
+            self.assertTrue(os.path.isfile(os.path.join(path, 'replay_states.npy')))
+            np.testing.assert_array_equal([0, -1, -2, -3], replay.experience().rewards)
+            del replay
+        finally:
+            shutil.rmtree(path)
+
+
+if __name__ == '__main__':
+    unittest.main()
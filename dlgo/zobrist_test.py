@@ -0,0 +1,53 @@
+import random
+import unittest
+
+import numpy as np
+
+from dlgo import goboard
+from dlgo import goboard_array
+from dlgo import goboard_fast
+from dlgo import zobrist
+from dlgo.gotypes import Player, Point
+
+
+class ZobristTest(unittest.TestCase):
+    def test_reproducible(self):
+        stones, side_to_move, ko = zobrist.generate_tables()
+        np.testing.assert_array_equal(zobrist.HASH_TABLE, stones)
+        np.testing.assert_array_equal(zobrist.KO_CODES, ko)
+        self.assertEqual(zobrist.SIDE_TO_MOVE, side_to_move)
+
+        self.assertEqual(np.uint64, zobrist.HASH_TABLE.dtype)
+        self.assertEqual((25 * 25, 3), zobrist.HASH_TABLE.shape)
+        self.assertFalse(zobrist.HASH_TABLE[:, 0].any())
+        # black and white codes all differ
+        self.assertEqual(2 * 25 * 25, len(np.unique(zobrist.HASH_TABLE[:, 1:])))
+
+    def test_boards_agree(self):
+        modules = (goboard, goboard_fast, goboard_array)
+        for size in (9, 25):
+            random.seed(size)
+            games = [module.GameState.new_game(size) for module in modules]
+
+            for _ in range(200):
+                moves = [move for move in games[1].legal_moves() if move.is_play]
+                if games[1].is_over() or not moves:
+                    break
+                point = random.choice(moves).point
+                games = [game.apply_move(module.Move.play(point)) for module, game in zip(modules, games)]
+                hashes = {game.board.zobrist_hash() for game in games}
+                self.assertEqual(1, len(hashes))
+
+    def test_capture_restores_hash(self):
+        board = goboard_fast.Board(5, 5)
+        board.place_stone(Player.white, Point(1, 1))
+        board.place_stone(Player.black, Point(1, 2))
+        expected = zobrist.POINT_CODES[Point(1, 2)][Player.black.value]
+
+        board.place_stone(Player.black, Point(2, 1))
+        self.assertIsNone(board.get(Point(1, 1)))
+        self.assertEqual(expected ^ zobrist.POINT_CODES[Point(2, 1)][Player.black.value], board.zobrist_hash())
+
+
+if __name__ == '__main__':
+    unittest.main()
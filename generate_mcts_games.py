@@ -4,23 +4,24 @@ import argparse
 import numpy as np
 
 from dlgo.encoders import get_encoder_by_name
-from dlgo import goboard_fast as goboard
+from dlgo.utils import get_goboard_by_name
 from dlgo import mcts
 from utils import print_board, print_move
 
 
-def generate_game(board_size, rounds, max_moves, temperature):
+def generate_game(board_size, rounds, max_moves, temperature, board='goboard_fast', rollouts_per_leaf=None):
     # initialize encoded board state and encoded moves
     boards, moves = [], []
 
     # initialize a OnePlaneEncoder by name with given board size
     encoder = get_encoder_by_name('oneplane', board_size)
 
-    # Instantiate a new game with board_size
+    # Instantiate a new game with board_size, using the requested board implementation
+    goboard = get_goboard_by_name(board)
     game = goboard.GameState.new_game(board_size)
 
     # MCTS agent bot with specified rounds and temp
-    bot = mcts.MCTSAgent(rounds, temperature)
+    bot = mcts.MCTSAgent(rounds, temperature, rollouts_per_leaf)
 
     num_moves = 0
     while not game.is_over():
@@ -58,6 +59,9 @@ def main():
     parser.add_argument('--num-games', '-n', type=int, default=10)
     parser.add_argument('--board-out')
     parser.add_argument('--move-out')
+    parser.add_argument('--board', default='goboard_fast', help='Board implementation, e.g. goboard_array.')
+    parser.add_argument('--rollouts-per-leaf', '-k', type=int, default=None,
+                        help='Score each leaf with this many batched random games instead of one.')
 
     # Customize through command line arguments
     args = parser.parse_args()
@@ -67,7 +71,8 @@ def main():
     for i in range(args.num_games):
         # Generate game data depending on number of games
         print('Generating game %d/%d...' % (i+1, args.num_games))
-        x, y = generate_game(args.board_size, args.rounds, args.max_moves, args.temperature)
+        x, y = generate_game(args.board_size, args.rounds, args.max_moves, args.temperature, args.board,
+                             args.rollouts_per_leaf)
         xs.append(x)
         ys.append(y)
 
@@ -8,7 +8,7 @@ import argparse
 import numpy as np
 
 from dlgo.encoders import get_encoder_by_name
-from dlgo import goboard_fast as goboard
+from dlgo.utils import get_goboard_by_name
 from dlgo import mcts
 from utils import print_board, print_move
 
@@ -29,18 +29,19 @@ def thread_print(*args):
 builtins.print = thread_print
 
 
-def generate_game(board_size, rounds, max_moves, temperature):
+def generate_game(board_size, rounds, max_moves, temperature, board='goboard_fast', rollouts_per_leaf=None):
     # initialize encoded board state and encoded moves
     boards, moves = [], []
 
     # initialize a OnePlaneEncoder by name with given board size
     encoder = get_encoder_by_name('oneplane', board_size)
 
-    # Instantiate a new game with board_size
+    # Instantiate a new game with board_size, using the requested board implementation
+    goboard = get_goboard_by_name(board)
     game = goboard.GameState.new_game(board_size)
 
     # MCTS agent bot with specified rounds and temp
-    bot = mcts.MCTSAgent(rounds, temperature)
+    bot = mcts.MCTSAgent(rounds, temperature, rollouts_per_leaf)
 
     num_moves = 0
     while not game.is_over():
@@ -78,6 +79,9 @@ def main():
     parser.add_argument('--num-games', '-n', type=int, default=10)
     parser.add_argument('--board-out')
     parser.add_argument('--move-out')
+    parser.add_argument('--board', default='goboard_fast', help='Board implementation, e.g. goboard_array.')
+    parser.add_argument('--rollouts-per-leaf', '-k', type=int, default=None,
+                        help='Score each leaf with this many batched random games instead of one.')
 
     # Customize through command line arguments
     args = parser.parse_args()
@@ -85,7 +89,8 @@ def main():
     ys = []
 
     with concurrent.futures.ProcessPoolExecutor() as executor:  # ThreadPoolExecutor is still not parallel
-        futures = {executor.submit(generate_game, args.board_size, args.rounds, args.max_moves, args.temperature)
+        futures = {executor.submit(generate_game, args.board_size, args.rounds, args.max_moves, args.temperature,
+                                   args.board, args.rollouts_per_leaf)
                    for _ in range(args.num_games)}
 
         for completed in concurrent.futures.as_completed(futures):
@@ -110,7 +115,8 @@ def main():
                 # rather than throwing all work away, just try simulating this game again
                 real_print("*** ERROR appending result; simulating again ***")
                 futures.add(executor.submit
-                            (generate_game, args.board_size, args.rounds, args.max_moves, args.temperature))
+                            (generate_game, args.board_size, args.rounds, args.max_moves, args.temperature,
+                             args.board, args.rollouts_per_leaf))
 
     # Create labels after all games have been generated
     x = np.concatenate(xs)
@@ -1,5 +1,6 @@
 import argparse
 import datetime
+import functools
 import multiprocessing
 import os
 import random
@@ -12,14 +13,27 @@ import h5py
 import numpy as np
 
 from dlgo import kerasutil
+from dlgo.inference import InferenceServer
 from dlgo import scoring
 from dlgo import rl
+from dlgo.experience_writer import ExperienceWriter, merge_experience
 from dlgo.goboard_fast import GameState, Player, Point
 
 
-def load_agent(filename):
+def load_agent(filename, model=None):
     with h5py.File(filename, 'r') as h5file:
-        return rl.load_ac_agent(h5file)
+        return rl.load_ac_agent(h5file, model=model)
+
+
+def start_inference_servers(agent_filenames, num_workers):
+    # one server per agent file, each worker gets its own client of every server
+    return [InferenceServer(functools.partial(kerasutil.load_agent_model, filename), num_workers).start()
+            for filename in agent_filenames]
+
+
+def stop_inference_servers(servers):
+    for server in servers:
+        server.stop()
 
 
 COLS = 'ABCDEFGHJKLMNOPQRST'
@@ -96,48 +110,54 @@ def get_temp_file():
 def do_self_play(board_size, agent1_filename, agent2_filename,
                  num_games,
                  experience_filename,
-                 gpu_frac):
+                 gpu_frac,
+                 clients=(None, None)):
     kerasutil.set_gpu_memory_target(gpu_frac)
 
     random.seed(int(time.time()) + os.getpid())
     np.random.seed(int(time.time()) + os.getpid())
 
-    agent1 = load_agent(agent1_filename)
-    agent2 = load_agent(agent2_filename)
-
-    collector1 = rl.ExperienceCollector()
-
-    color1 = Player.black
-    for i in range(num_games):
-        print('Simulating game %d/%d...' % (i + 1, num_games))
-        collector1.begin_episode()
-        agent1.set_collector(collector1)
-
-        if color1 == Player.black:
-            black_player, white_player = agent1, agent2
-        else:
-            white_player, black_player = agent1, agent2
-        game_record = simulate_game(black_player, white_player, board_size)
-        if game_record.winner == color1:
-            print('Agent 1 wins.')
-            collector1.complete_episode(reward=1)
-        else:
-            print('Agent 2 wins.')
-            collector1.complete_episode(reward=-1)
-        color1 = color1.other
-
-    experience = rl.combine_experience([collector1])
-    print('Saving experience buffer to %s\n' % experience_filename)
-    with h5py.File(experience_filename, 'w') as experience_outf:
-        experience.serialize(experience_outf)
+    agent1 = load_agent(agent1_filename, clients[0])
+    agent2 = load_agent(agent2_filename, clients[1])
+
+    # every game is appended to the file as it ends instead of keeping all of them until the end
+    with h5py.File(experience_filename, 'w') as experience_outf, \
+            ExperienceWriter(experience_outf, compression='lzf') as writer:
+        color1 = Player.black
+        for i in range(num_games):
+            print('Simulating game %d/%d...' % (i + 1, num_games))
+            collector1 = rl.ExperienceCollector()
+            collector1.begin_episode()
+            agent1.set_collector(collector1)
+
+            if color1 == Player.black:
+                black_player, white_player = agent1, agent2
+            else:
+                white_player, black_player = agent1, agent2
+            game_record = simulate_game(black_player, white_player, board_size)
+            if game_record.winner == color1:
+                print('Agent 1 wins.')
+                collector1.complete_episode(reward=1)
+            else:
+                print('Agent 2 wins.')
+                collector1.complete_episode(reward=-1)
+            color1 = color1.other
+
+            writer.append(rl.combine_experience([collector1]))
+    print('Saved experience buffer to %s\n' % experience_filename)
 
 
 def generate_experience(learning_agent, reference_agent, exp_file,
-                        num_games, board_size, num_workers):
+                        num_games, board_size, num_workers, use_inference_server=False):
     experience_files = []
     workers = []
     gpu_frac = 0.95 / float(num_workers)
     games_per_worker = num_games // num_workers
+
+    servers = []
+    if use_inference_server:
+        servers = start_inference_servers([learning_agent, reference_agent], num_workers)
+
     for i in range(num_workers):
         filename = get_temp_file()
         experience_files.append(filename)
@@ -150,6 +170,7 @@ def generate_experience(learning_agent, reference_agent, exp_file,
                 games_per_worker,
                 filename,
                 gpu_frac,
+                tuple(server.clients[i] for server in servers) or (None, None),
             )
         )
         worker.start()
@@ -159,20 +180,11 @@ def generate_experience(learning_agent, reference_agent, exp_file,
     print('Waiting for workers...')
     for worker in workers:
         worker.join()
+    stop_inference_servers(servers)
 
     # Merge experience buffers.
-    print('Merging experience buffers...')
-    first_filename = experience_files[0]
-    other_filenames = experience_files[1:]
-    with h5py.File(first_filename, 'r') as expf:
-        combined_buffer = rl.load_experience(expf)
-    for filename in other_filenames:
-        with h5py.File(filename, 'r') as expf:
-            next_buffer = rl.load_experience(expf)
-        combined_buffer = rl.combine_experience([combined_buffer, next_buffer])
-    print('Saving into %s...' % exp_file)
-    with h5py.File(exp_file, 'w') as experience_outf:
-        combined_buffer.serialize(experience_outf)
+    print('Merging experience buffers into %s...' % exp_file)
+    merge_experience(exp_file, experience_files, compression='lzf')
 
     # Clean up.
     for fname in experience_files:
@@ -210,15 +222,15 @@ def train_on_experience(learning_agent, output_file, experience_file,
 
 
 def play_games(args):
-    agent1_fname, agent2_fname, num_games, board_size, gpu_frac = args
+    agent1_fname, agent2_fname, num_games, board_size, gpu_frac, clients = args
 
     kerasutil.set_gpu_memory_target(gpu_frac)
 
     random.seed(int(time.time()) + os.getpid())
     np.random.seed(int(time.time()) + os.getpid())
 
-    agent1 = load_agent(agent1_fname)
-    agent2 = load_agent(agent2_fname)
+    agent1 = load_agent(agent1_fname, clients[0])
+    agent2 = load_agent(agent2_fname, clients[1])
 
     wins, losses = 0, 0
     color1 = Player.black
@@ -241,18 +253,25 @@ def play_games(args):
 
 
 def evaluate(learning_agent, reference_agent,
-             num_games, num_workers, board_size):
+             num_games, num_workers, board_size, use_inference_server=False):
     games_per_worker = num_games // num_workers
     gpu_frac = 0.95 / float(num_workers)
+
+    servers = []
+    if use_inference_server:
+        servers = start_inference_servers([learning_agent, reference_agent], num_workers)
+
     pool = multiprocessing.Pool(num_workers)
     worker_args = [
         (
             learning_agent, reference_agent,
             games_per_worker, board_size, gpu_frac,
+            tuple(server.clients[i] for server in servers) or (None, None),
         )
-        for _ in range(num_workers)
+        for i in range(num_workers)
     ]
     game_results = pool.map(play_games, worker_args)
+    stop_inference_servers(servers)
 
     total_wins, total_losses = 0, 0
     for wins, losses in game_results:
@@ -276,6 +295,8 @@ def main():
     parser.add_argument('--lr', type=float, default=0.01)
     parser.add_argument('--bs', type=int, default=512)
     parser.add_argument('--log-file', '-l')
+    parser.add_argument('--inference-server', action='store_true',
+                        help='Serve each model from a single process that batches predictions for all workers.')
 
     args = parser.parse_args()
 
@@ -298,7 +319,8 @@ def main():
             experience_file,
             num_games=args.games_per_batch,
             board_size=args.board_size,
-            num_workers=args.num_workers)
+            num_workers=args.num_workers,
+            use_inference_server=args.inference_server)
         train_on_experience(
             learning_agent, tmp_agent, experience_file,
             lr=args.lr, batch_size=args.bs)
@@ -307,7 +329,8 @@ def main():
             learning_agent, reference_agent,
             num_games=480,
             num_workers=args.num_workers,
-            board_size=args.board_size)
+            board_size=args.board_size,
+            use_inference_server=args.inference_server)
         print('Won %d / 480 games (%.3f)' % (
             wins, float(wins) / 480.0))
         logf.write('Won %d / 480 games (%.3f)\n' % (